@@ -0,0 +1,62 @@
+# 启动耗时对比：同一份合成历史分别保存为 JSON 数据文件和二进制快照，
+# 比较加载（JSON 解析全部任务 / 二进制映射文件）加上首屏查询（当天的任务、当月每天的任务数）的耗时，
+# 以及压缩时写快照的耗时和文件大小
+# 用法: python benchmarks/bench_binary_load.py [任务数,...] [重复次数]
+import datetime
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pomodoro_binary import write_snapshot
+from pomodoro_storage import DEFAULT_SETTINGS, JournalStore, open_store
+from suite import generate_history
+
+
+def first_screen(backend, data_file):
+    store = open_store(backend, data_file)
+    task_repo, _ = store.load_repository()
+    today = datetime.date.today()
+    task_repo.tasks_for_date(today.isoformat())
+    task_repo.day_counts(today.year, today.month)
+    return task_repo
+
+
+def measure(func, runs):
+    samples = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples) * 1000
+
+
+def main():
+    sizes = [int(size) for size in sys.argv[1].split(',')] if len(sys.argv) > 1 else [10000, 100000]
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    print(f"{'任务数':>7}  {'格式':<6}{'大小 MB':>9}{'启动 ms':>10}{'写快照 ms':>11}")
+    for count in sizes:
+        workdir = tempfile.mkdtemp(prefix='pomodoro-bench-')
+        try:
+            tasks = [task.to_dict() for task in generate_history(count)]
+            json_file = os.path.join(workdir, 'pomodoro_data.json')
+            binary_file = os.path.join(workdir, 'pomodoro_data.pmdb')
+            settings = dict(DEFAULT_SETTINGS)
+            results = {
+                'json': measure(lambda: JournalStore(json_file).compact(tasks, settings), runs),
+                'binary': measure(lambda: write_snapshot(binary_file, tasks, settings), runs)
+            }
+            for backend, data_file in (('json', json_file), ('binary', binary_file)):
+                load = measure(lambda: first_screen(backend, data_file), runs)
+                size = os.path.getsize(data_file) / 1e6
+                print(f"{count:>10}  {backend:<8}{size:>9.1f}{load:>10.1f}{results[backend]:>11.1f}")
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# 日历热力图基准测试：月视图和年视图每次渲染需要的每日计数查询；
+# 有图形界面时（可在 xvfb-run 下运行）再测量年视图的实际绘制耗时
+# 用法: python benchmarks/bench_heatmap.py [任务数]
+import datetime
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_month_navigation import make_tasks
+from pomodoro_calendar import day_activity, month_cells, year_cells
+from pomodoro_sessions import StatsAggregator
+from pomodoro_tasks import Task, TaskRepository
+
+
+def make_stats(days=3 * 365, seed=42):
+    # 每天 0-10 个完成的番茄
+    rng = random.Random(seed)
+    stats = StatsAggregator()
+    start = datetime.datetime(2023, 1, 1, 9).timestamp()
+    for day in range(days):
+        for i in range(rng.randrange(11)):
+            begin = start + day * 86400 + i * 1800
+            stats.add({'start': begin, 'end': begin + 1500, 'elapsed': 1500, 'mode': 'work', 'completed': True})
+    return stats
+
+
+def measure(func, repeat):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - t0) / repeat
+
+
+def measure_year_window(repo, stats):
+    import tkinter as tk
+    from pomodoro_app import PomodoroApp, setup_styles
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        print(f"跳过年视图绘制（需要显示器或 xvfb-run）: {e}")
+        return
+    root.withdraw()
+    setup_styles(root)
+    os.chdir(tempfile.mkdtemp())
+    app = PomodoroApp(root)
+    app.task_repo, app.stats = repo, stats
+
+    t0 = time.perf_counter()
+    app.open_year_view()
+    root.update_idletasks()
+    first = time.perf_counter() - t0
+
+    years = [2023, 2024, 2025] * 10
+    t0 = time.perf_counter()
+    for year in years:
+        app.year_view_year = year
+        app.render_year_view()
+        root.update_idletasks()
+    switch = (time.perf_counter() - t0) / len(years)
+    print(f"年视图首次打开: {first * 1000:.1f} ms")
+    print(f"年视图切换年份: {switch * 1000:.2f} ms/次")
+    root.destroy()
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    repo = TaskRepository(Task.from_dict(task) for task in make_tasks(count))
+    stats = make_stats()
+
+    months = [(2024, m) for m in range(1, 13)]
+    month_dates = [[date_str for _, date_str in month_cells(y, m)] for y, m in months]
+    year_dates = [date_str for _, _, _, date_str in year_cells(2024)]
+
+    month_time = measure(lambda: [day_activity(repo, stats, dates) for dates in month_dates], 50) / len(months)
+    year_time = measure(lambda: day_activity(repo, stats, year_dates), 50)
+
+    print(f"任务数: {count}, 番茄数: {sum(t['pomodoros'] for t in stats.daily.values())}")
+    print(f"月视图每日计数: {month_time * 1000:.3f} ms/次")
+    print(f"年视图每日计数: {year_time * 1000:.3f} ms/次")
+    measure_year_window(repo, stats)
+
+
+if __name__ == "__main__":
+    main()
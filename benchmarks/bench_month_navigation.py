@@ -0,0 +1,68 @@
+# 月份切换基准测试：比较旧的线性扫描和按日期索引的任务仓库
+# 用法: python benchmarks/bench_month_navigation.py [任务数]
+import datetime
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pomodoro_tasks import Task, TaskRepository
+
+
+def make_tasks(count, seed=42):
+    rng = random.Random(seed)
+    start = datetime.date(2023, 1, 1)
+    tasks = []
+    for i in range(count):
+        date_str = (start + datetime.timedelta(days=rng.randrange(3 * 365))).strftime("%Y-%m-%d")
+        tasks.append({'name': f"{date_str} - 任务 {i}", 'completed': False, 'date': date_str})
+    return tasks
+
+
+def month_cells(year, month):
+    first_day = datetime.datetime(year, month, 1)
+    start_date = first_day - datetime.timedelta(days=first_day.weekday())
+    return [(start_date + datetime.timedelta(days=i)).strftime("%Y-%m-%d") for i in range(42)]
+
+
+def navigate_linear(tasks, months):
+    # 原 render_calendar 的做法：每个格子扫描一遍全部任务
+    for year, month in months:
+        for date_str in month_cells(year, month):
+            any(task['date'] == date_str for task in tasks)
+
+
+def navigate_indexed(repo, months):
+    for year, month in months:
+        for date_str in month_cells(year, month):
+            repo.has_tasks(date_str)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    tasks = make_tasks(count)
+    # 空日期最坏：每个格子都要扫完整个列表
+    months = [(2026, m) for m in range(1, 13)]
+
+    t0 = time.perf_counter()
+    repo = TaskRepository(Task.from_dict(task) for task in tasks)
+    build = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    navigate_linear(tasks, months[:2])
+    linear = (time.perf_counter() - t0) / 2
+
+    t0 = time.perf_counter()
+    navigate_indexed(repo, months)
+    indexed = (time.perf_counter() - t0) / len(months)
+
+    print(f"任务数: {count}")
+    print(f"建立索引: {build * 1000:.1f} ms")
+    print(f"切换月份（线性扫描）: {linear * 1000:.2f} ms/次")
+    print(f"切换月份（日期索引）: {indexed * 1000:.3f} ms/次")
+
+
+if __name__ == "__main__":
+    main()
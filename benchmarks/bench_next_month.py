@@ -0,0 +1,41 @@
+# 连续切换月份的微基准测试，需要图形界面（可在 xvfb-run 下运行）
+# 用法: python benchmarks/bench_next_month.py [次数]
+import os
+import sys
+import tempfile
+import time
+import tkinter as tk
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pomodoro_app import PomodoroApp
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 240
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        print(f"无法创建窗口（需要显示器或 xvfb-run）: {e}")
+        return
+    root.withdraw()
+
+    # 在临时目录中运行，避免读写真实的数据文件
+    os.chdir(tempfile.mkdtemp())
+    app = PomodoroApp(root)
+    root.update()
+
+    widgets_before = len(app.calendar_grid.winfo_children())
+    t0 = time.perf_counter()
+    for _ in range(count):
+        app.next_month()
+        root.update_idletasks()
+    elapsed = time.perf_counter() - t0
+
+    print(f"next_month x {count}: 共 {elapsed * 1000:.1f} ms, 平均 {elapsed / count * 1000:.3f} ms/次")
+    print(f"日历控件数: {widgets_before} -> {len(app.calendar_grid.winfo_children())}")
+    root.destroy()
+
+
+if __name__ == "__main__":
+    main()
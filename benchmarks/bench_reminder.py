@@ -0,0 +1,57 @@
+# 提醒延迟测试：不需要界面和声卡，用 RecordingSink 代替音频设备（每次播放耗时 delay 秒）。
+# 比较在 phase_end 回调中同步播放提示音与交给 Notifier 后台线程时，
+# 阶段结束到切换为下一模式之间的耗时，并确认后台线程确实播放了每一次提醒
+# 用法: python benchmarks/bench_reminder.py [阶段数] [播放耗时毫秒]
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pomodoro_engine import FakeClock, PomodoroEngine
+from pomodoro_notify import Notifier, RecordingSink, tone
+from pomodoro_storage import DEFAULT_SETTINGS
+
+
+def run(phases, on_phase_end):
+    # 返回每次阶段结束到引擎切换为下一模式的耗时
+    engine = PomodoroEngine(dict(DEFAULT_SETTINGS), clock=FakeClock())
+    ended_at = []
+    switch_delays = []
+    engine.on('phase_end', lambda mode: ended_at.append(time.perf_counter()))
+    engine.on('phase_end', on_phase_end)
+    engine.on('mode_change', lambda mode: ended_at and switch_delays.append(time.perf_counter() - ended_at.pop()))
+    for _ in range(phases):
+        engine.start()
+        engine.advance(engine.countdown.remaining(), auto_continue=False)
+    return switch_delays
+
+
+def report(name, delays):
+    print(f"{name}: 切换模式平均 {sum(delays) / len(delays) * 1000:.2f} ms, 最大 {max(delays) * 1000:.2f} ms")
+
+
+def main():
+    phases = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    delay = (int(sys.argv[2]) if len(sys.argv) > 2 else 500) / 1000
+
+    t0 = time.perf_counter()
+    data = tone()
+    print(f"生成提示音: {(time.perf_counter() - t0) * 1000:.1f} ms, {len(data)} 字节")
+
+    blocking_sink = RecordingSink(delay)
+    report("界面线程中同步播放", run(phases, lambda mode: blocking_sink.play('reminder', data)))
+
+    sink = RecordingSink(delay)
+    notifier = Notifier(sink=sink, desktop=lambda title, message: None)
+    notifier.start()
+    report("交给后台线程播放", run(phases, lambda mode: notifier.play('reminder')))
+    t0 = time.perf_counter()
+    played = sink.wait(phases, timeout=phases * delay + 5)
+    print(f"后台线程播放 {len(sink.played)}/{phases} 次{'' if played else '（超时）'}，"
+          f"再用 {time.perf_counter() - t0:.1f} s 播完")
+    notifier.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# 任务列表渲染基准测试：统计全量重建和差异渲染分别发出多少次 Tk 操作
+# 使用记录调用的假 Treeview，无需显示器
+# 用法: python benchmarks/bench_render_tasks.py [每天任务数]
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pomodoro_widgets import TreeviewReconciler
+
+
+class CountingTree:
+    # 只记录调用次数的 Treeview 替身
+    def __init__(self):
+        self.ops = 0
+        self.children = []
+
+    def get_children(self):
+        return tuple(self.children)
+
+    def insert(self, parent, index, iid=None, values=()):
+        self.ops += 1
+        self.children.append(iid)
+
+    def delete(self, *items):
+        self.ops += 1
+        gone = set(items)
+        self.children = [c for c in self.children if c not in gone]
+
+    def move(self, item, parent, index):
+        self.ops += 1
+
+    def item(self, item, **kw):
+        self.ops += 1
+
+
+def full_rebuild(tree, rows):
+    # 原 render_tasks 的做法：逐个删除再全部插入
+    for item in tree.get_children():
+        tree.delete(item)
+    for iid, values in rows:
+        tree.insert('', 'end', iid=iid, values=values)
+
+
+def make_day(prefix, count):
+    return [(f"{prefix}{i}", (f"任务 {i}", "否")) for i in range(count)]
+
+
+def scenarios(count):
+    day_a = make_day('a', count)
+    day_b = make_day('b', count)
+    added = day_a + [('a-new', ("新任务", "否"))]
+    edited = list(added)
+    edited[count // 2] = (edited[count // 2][0], ("改名的任务", "否"))
+    deleted = edited[:10] + edited[11:]
+    return [
+        ('添加一个任务', day_a, added),
+        ('编辑一个任务', added, edited),
+        ('删除一个任务', edited, deleted),
+        ('切换日期', deleted, day_b),
+    ]
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    print(f"每天任务数: {count}")
+    for name, before, after in scenarios(count):
+        naive = CountingTree()
+        full_rebuild(naive, before)
+        naive.ops = 0
+        t0 = time.perf_counter()
+        full_rebuild(naive, after)
+        naive_time = time.perf_counter() - t0
+
+        tree = CountingTree()
+        view = TreeviewReconciler(tree)
+        view.reconcile(before)
+        tree.ops = 0
+        t0 = time.perf_counter()
+        view.reconcile(after)
+        diff_time = time.perf_counter() - t0
+
+        print(f"{name}: 全量重建 {naive.ops} 次操作 / 差异渲染 {tree.ops} 次操作 {view.op_counts} "
+              f"(Python 侧 {naive_time * 1000:.2f} ms / {diff_time * 1000:.2f} ms)")
+
+
+if __name__ == "__main__":
+    main()
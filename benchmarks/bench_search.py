@@ -0,0 +1,77 @@
+# 任务搜索基准测试：比较逐个任务的子串过滤和倒排索引的查询延迟
+# 用法: python benchmarks/bench_search.py [任务数]
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pomodoro_search import SearchIndex
+from pomodoro_tasks import Task, TaskRepository
+
+CJK_WORDS = ['写', '文档', '修复', '会议', '准备', '周报', '阅读', '论文', '番茄钟', '测试', '发布', '整理', '邮件', '设计', '评审']
+LATIN_WORDS = ['readme', 'bug', 'review', 'api', 'release', 'docs', 'sprint', 'login', 'refactor', 'cache',
+               'deploy', 'report', 'python', 'tkinter', 'sqlite', 'search', 'index', 'v2', 'ci', 'meeting']
+
+QUERIES = ['r', 're', 'rev', 'review', '文档', '修复 bug', '番茄钟', 'api 设计', 'sqlite cache', '不存在的词']
+
+
+def make_tasks(count, seed=42):
+    # 名称由 2-5 个中英文词混合组成
+    rng = random.Random(seed)
+    tasks = []
+    for i in range(count):
+        words = [rng.choice(CJK_WORDS if rng.random() < 0.5 else LATIN_WORDS) for _ in range(rng.randint(2, 5))]
+        date_str = f"2026-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+        tasks.append({'name': f"{date_str} - {' '.join(words)} #{i}", 'completed': False, 'date': date_str})
+    return tasks
+
+
+def substring_search(tasks, query, limit=200):
+    words = query.lower().split()
+    return [t.id for t in tasks if all(w in t.title.lower() for w in words)][:limit]
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    repo = TaskRepository(Task.from_dict(task) for task in make_tasks(count))
+    tasks = list(repo)
+
+    t0 = time.perf_counter()
+    index = SearchIndex(repo)
+    build = time.perf_counter() - t0
+
+    print(f"任务数: {count}")
+    print(f"建立索引: {build * 1000:.0f} ms")
+    print(f"{'查询':<14}{'结果':>6}{'子串过滤 ms':>14}{'倒排索引 ms':>14}")
+    index_times = []
+    for query in QUERIES:
+        t0 = time.perf_counter()
+        substring_search(tasks, query)
+        linear = time.perf_counter() - t0
+
+        times = []
+        for _ in range(20):
+            t0 = time.perf_counter()
+            result = index.search(query)
+            times.append(time.perf_counter() - t0)
+        index_times.extend(times)
+        print(f"{query:<14}{len(result):>6}{linear * 1000:>14.2f}{percentile(times, 0.5) * 1000:>14.2f}")
+
+    print(f"倒排索引查询 p50 {percentile(index_times, 0.5) * 1000:.2f} ms, p99 {percentile(index_times, 0.99) * 1000:.2f} ms")
+
+    # 增量维护的开销
+    t0 = time.perf_counter()
+    for task in tasks[:1000]:
+        index.update(Task(task.title + ' updated', task.date, task_id=task.id))
+    print(f"增量更新: {(time.perf_counter() - t0) * 1000:.3f} us/次")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+# 事件流基准测试：宿主线程按固定间隔“走时”并 publish 计时器状态，
+# 比较没有订阅者和有大量事件流客户端时宿主线程的走时延迟和 publish 耗时。
+# 客户端在子进程中运行，只统计收到的事件数
+# 用法: python benchmarks/bench_sse.py [客户端数] [走时次数] [间隔毫秒]
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pomodoro_server import ApiServer
+
+
+class StateApi:
+    def __init__(self):
+        self.remaining = 1500
+
+    def get_state(self, query):
+        return {'mode': 'work', 'running': True, 'remaining': self.remaining, 'duration': 1500, 'task_id': None}
+
+
+async def run_clients(port, count, seconds):
+    # 子进程：打开 count 个事件流连接，seconds 秒后输出收到的事件总数
+    received = [0]
+
+    async def client():
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(f"GET /api/events HTTP/1.1\r\nHost: 127.0.0.1:{port}\r\n\r\n".encode())
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            if line.startswith(b'event: '):
+                received[0] += 1
+
+    tasks = [asyncio.create_task(client()) for _ in range(count)]
+    await asyncio.sleep(seconds)
+    for task in tasks:
+        task.cancel()
+    print(received[0])
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def run(server, api, ticks, interval):
+    # 模拟 Tk 的 after 循环：记录每次走时比预定时刻晚了多少，以及 publish 本身的耗时
+    late = []
+    publish_cost = []
+    next_at = time.perf_counter()
+    for _ in range(ticks):
+        next_at += interval
+        time.sleep(max(0, next_at - time.perf_counter()))
+        late.append(time.perf_counter() - next_at)
+        api.remaining -= 1
+        t0 = time.perf_counter()
+        server.publish('tick', api.get_state({}))
+        publish_cost.append(time.perf_counter() - t0)
+    return late, publish_cost
+
+
+def report(name, late, publish_cost):
+    print(f"{name}: 走时延迟 中位 {statistics.median(late) * 1000:.2f} ms, "
+          f"p99 {percentile(late, 0.99) * 1000:.2f} ms, 最大 {max(late) * 1000:.2f} ms; "
+          f"publish 中位 {statistics.median(publish_cost) * 1e6:.0f} us, "
+          f"p99 {percentile(publish_cost, 0.99) * 1e6:.0f} us")
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == '--clients':
+        asyncio.run(run_clients(int(sys.argv[2]), int(sys.argv[3]), float(sys.argv[4])))
+        return
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    ticks = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    interval = (int(sys.argv[3]) if len(sys.argv) > 3 else 20) / 1000
+
+    api = StateApi()
+    server = ApiServer(api)
+    server.start()
+    try:
+        report("无客户端", *run(server, api, ticks, interval))
+
+        seconds = 5 + ticks * interval
+        clients = subprocess.Popen([sys.executable, __file__, '--clients', str(server.port), str(count), str(seconds)],
+                                   stdout=subprocess.PIPE, text=True)
+        # 等所有客户端连上
+        deadline = time.monotonic() + 5
+        while len(server._subscribers) < count and time.monotonic() < deadline:
+            time.sleep(0.05)
+        print(f"已连接客户端: {len(server._subscribers)}")
+        report(f"{count} 个客户端", *run(server, api, ticks, interval))
+        received = int(clients.communicate()[0])
+        print(f"客户端收到事件: {received}（每个客户端最多 {ticks + 1} 个，写得慢的客户端只保留最新的事件）")
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
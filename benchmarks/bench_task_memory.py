@@ -0,0 +1,73 @@
+# 任务表示的内存和渲染基准测试：比较旧的字典任务和使用 __slots__ 的 Task
+# 用法: python benchmarks/bench_task_memory.py [任务数]
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_month_navigation import make_tasks
+from pomodoro_tasks import Task, ensure_task_ids
+
+
+def json_lines(count):
+    # 数据文件中的任务格式；逐行解析，每个任务的字符串都是新对象，与从文件加载时一致
+    tasks = make_tasks(count)
+    ensure_task_ids(tasks)
+    return [json.dumps(task, ensure_ascii=False) for task in tasks]
+
+
+def measure_memory(build, lines):
+    gc.collect()
+    tracemalloc.start()
+    result = build(lines)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+
+def legacy_row(task):
+    # 旧的 task_row：每次渲染都要切掉名称中的日期前缀
+    task_name = task['name'].split(' - ', 1)[1] if ' - ' in task['name'] else task['name']
+    return (task['id'], (task_name, "是" if task['completed'] else "否"))
+
+
+def slots_row(task):
+    return (task.id, (task.title, "是" if task.completed else "否"))
+
+
+def measure_rows(tasks, row_builder):
+    t0 = time.perf_counter()
+    for task in tasks:
+        row_builder(task)
+    return time.perf_counter() - t0
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    lines = json_lines(count)
+
+    dicts, dict_size = measure_memory(lambda lines: [json.loads(line) for line in lines], lines)
+    dict_rows = measure_rows(dicts, legacy_row)
+
+    t0 = time.perf_counter()
+    converted = [Task.from_dict(task) for task in dicts]
+    convert = time.perf_counter() - t0
+    del converted, dicts
+
+    tasks, slots_size = measure_memory(lambda lines: [Task.from_dict(json.loads(line)) for line in lines], lines)
+    slots_rows = measure_rows(tasks, slots_row)
+
+    print(f"任务数: {count}")
+    print(f"内存（字典）: {dict_size / 2 ** 20:.0f} MB, {dict_size / count:.0f} 字节/任务")
+    print(f"内存（Task）: {slots_size / 2 ** 20:.0f} MB, {slots_size / count:.0f} 字节/任务 ({(1 - slots_size / dict_size) * 100:.0f}% 减少)")
+    print(f"加载时转换: {convert * 1000:.0f} ms")
+    print(f"生成表格行（字典）: {dict_rows * 1000:.0f} ms, {dict_rows / count * 1e9:.0f} ns/行")
+    print(f"生成表格行（Task）: {slots_rows * 1000:.0f} ms, {slots_rows / count * 1e9:.0f} ns/行")
+
+
+if __name__ == "__main__":
+    main()
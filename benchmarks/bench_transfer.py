@@ -0,0 +1,65 @@
+# 批量导入导出基准测试：生成大 CSV 文件，流式导入 SQLite 数据库再按日期范围导出，
+# 输出各阶段耗时和进程内存峰值（Linux 上 ru_maxrss 单位为 KB）
+# 用法: python benchmarks/bench_transfer.py [行数]
+import csv
+import datetime
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pomodoro_sqlite import SqliteStore
+from pomodoro_transfer import CSV_FIELDS, ImportReport, export_tasks, import_tasks, read_tasks
+
+
+def peak_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def write_csv(path, count, seed=42):
+    # 逐行生成，不在内存中保留数据；每 1000 行有一行日期错误
+    rng = random.Random(seed)
+    start = datetime.date(2020, 1, 1)
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_FIELDS)
+        for i in range(count):
+            date_str = (start + datetime.timedelta(days=rng.randrange(6 * 365))).isoformat()
+            if i % 1000 == 999:
+                date_str = 'not-a-date'
+            writer.writerow(['', date_str, f"任务 {i} review docs", rng.random() < 0.3])
+
+
+def timed(name, func):
+    t0 = time.perf_counter()
+    result = func()
+    print(f"{name}: {time.perf_counter() - t0:.1f} s, 内存峰值 {peak_mb():.0f} MB")
+    return result
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    workdir = tempfile.mkdtemp()
+    csv_file = os.path.join(workdir, 'tasks.csv')
+    print(f"行数: {count}, 起始内存峰值 {peak_mb():.0f} MB")
+
+    timed("生成 CSV", lambda: write_csv(csv_file, count))
+    print(f"文件大小: {os.path.getsize(csv_file) / 2 ** 20:.0f} MB")
+
+    timed("只解析校验", lambda: sum(1 for _ in read_tasks(csv_file)))
+
+    repo, _ = SqliteStore(os.path.join(workdir, 'tasks.db')).load_repository()
+    report = timed("导入 SQLite", lambda: import_tasks(repo, csv_file, report=ImportReport()))
+    print(report.summary().splitlines()[0])
+
+    exported = timed("导出 2023 年到 JSON Lines",
+                     lambda: export_tasks(repo.iter_range('2023-01-01', '2023-12-31'), os.path.join(workdir, '2023.jsonl')))
+    print(f"导出任务数: {exported}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+# 用假时钟驱动 PomodoroEngine，模拟连续一整年的番茄钟阶段
+# 用法: python benchmarks/simulate_year.py [天数]
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pomodoro_engine import FakeClock, PomodoroEngine
+from pomodoro_storage import DEFAULT_SETTINGS
+
+
+def main():
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else 365
+    clock = FakeClock()
+    engine = PomodoroEngine(dict(DEFAULT_SETTINGS), clock=clock)
+
+    phases = {}
+    engine.on('phase_end', lambda mode: phases.__setitem__(mode, phases.get(mode, 0) + 1))
+
+    t0 = time.perf_counter()
+    engine.start()
+    engine.advance(days * 86400)
+    elapsed = time.perf_counter() - t0
+
+    print(f"模拟 {days} 天: {sum(phases.values())} 个阶段 {phases}")
+    print(f"模拟时钟: {clock() / 86400:.1f} 天, 耗时 {elapsed * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,383 @@
+# 基准测试套件：按种子生成跨越数年的合成任务历史，回放一段脚本化的用户操作
+# （添加、编辑、勾选、删除、选择日期、切换月份、搜索），统计每种操作的延迟分位数，结果保存为 JSON 便于比较。
+# 默认在不依赖 Tk 的核心模块上运行（与界面相同的仓库、索引、存储和日历计算，渲染用假 Treeview）；
+# --gui 时驱动真正的 PomodoroApp，每个操作之后 update_idletasks() 把重绘也计入，需要显示器或虚拟帧缓冲：
+#   xvfb-run -a python benchmarks/suite.py --gui
+# 用法: python benchmarks/suite.py [--sizes 1000,10000,100000] [--actions 500] [--backend json|sqlite]
+#                                  [--seed 42] [--output 结果.json] [--compare 基准.json]
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_render_tasks import CountingTree
+from pomodoro_calendar import day_activity, heat_level, month_cells
+from pomodoro_search import index_for
+from pomodoro_storage import BACKENDS, DEFAULT_SETTINGS, open_store
+from pomodoro_tasks import Task
+from pomodoro_widgets import TreeviewReconciler
+
+# 合成历史从这一天开始，保证同一种子在任何日期运行都得到相同的数据
+HISTORY_START = datetime.date(2020, 1, 1)
+WORDS = ('写', '报告', '会议', '设计', '测试', '阅读', '论文', '整理', '复习', '邮件',
+         'review', 'docs', 'email', 'bug', 'plan', 'deploy', 'refactor', 'api', 'notes', 'sprint')
+# 回放脚本中各操作的权重
+ACTION_WEIGHTS = {
+    'select_date': 25,
+    'next_month': 10,
+    'prev_month': 10,
+    'add': 15,
+    'toggle': 15,
+    'edit': 10,
+    'delete': 5,
+    'search': 10
+}
+# 任务列表可见的行数（与界面的 Treeview 高度加缓冲行一致）
+VISIBLE_ROWS = 20
+PERCENTILES = (50, 90, 99)
+# 各后端的数据文件名（分片后端为目录）
+DATA_FILES = {'json': 'pomodoro_data.json', 'sqlite': 'pomodoro_data.db', 'shards': 'pomodoro_data.shards',
+              'binary': 'pomodoro_data.pmdb'}
+
+
+def generate_history(count, years=3, seed=42):
+    # 逐个产出 Task：工作日的任务比周末多，过去的任务大多已完成
+    rng = random.Random(seed)
+    days = years * 365
+    weights = [3 if (HISTORY_START + datetime.timedelta(days=i)).weekday() < 5 else 1 for i in range(days)]
+    dates = [(HISTORY_START + datetime.timedelta(days=i)).isoformat() for i in range(days)]
+    for i, date_str in enumerate(rng.choices(dates, weights, k=count)):
+        title = ' '.join(rng.sample(WORDS, rng.randint(2, 4))) + f" {i}"
+        yield Task(title, date_str, completed=rng.random() < 0.7)
+
+
+def make_script(actions, seed):
+    rng = random.Random(seed)
+    return rng.choices(list(ACTION_WEIGHTS), list(ACTION_WEIGHTS.values()), k=actions)
+
+
+def percentile(values, p):
+    # 最近秩法
+    values = sorted(values)
+    return values[max(0, min(len(values) - 1, int(round(p / 100 * len(values) + 0.5)) - 1))]
+
+
+def summarize(samples):
+    result = {'count': len(samples), 'mean_ms': sum(samples) / len(samples) * 1000}
+    for p in PERCENTILES:
+        result[f'p{p}_ms'] = percentile(samples, p) * 1000
+    result['max_ms'] = max(samples) * 1000
+    return result
+
+
+def write_history(backend, data_file, count, years, seed):
+    store = open_store(backend, data_file)
+    if store.snapshot_tasks:
+        store.compact([task.to_dict() for task in generate_history(count, years, seed)], dict(DEFAULT_SETTINGS))
+    else:
+        # 与界面相同：修改仓库后再交给存储写入（SQLite 的任务由仓库直接提交，分片和二进制快照由存储写入）
+        task_repo, _ = store.load_repository()
+        tasks = task_repo.add_many(generate_history(count, years, seed))
+        if not store.repository_commits:
+            store.append('add_many', tasks=[task.to_dict() for task in tasks])
+            store.compact(None, dict(DEFAULT_SETTINGS))
+
+
+class CoreTarget:
+    # 不依赖 Tk：与界面相同的任务操作，渲染只计算行和格子并交给假 Treeview
+    def __init__(self, backend, data_file):
+        self.store = open_store(backend, data_file)
+        self.task_repo, self.settings = self.store.load_repository()
+        self.search_index = index_for(self.task_repo)
+        self.current_date = datetime.date.today().replace(day=1)
+        self.selected_date = None
+        self.search_query = ''
+        self.view = TreeviewReconciler(CountingTree())
+        self.calendar_state = [None] * 42
+        self.render_tasks()
+        self.render_calendar()
+
+    def save(self, op, **fields):
+        # 后台持久化线程的工作量：追加日志，日志过长时写完整快照
+        if self.store.append(op, **fields):
+            tasks = [task.to_dict() for task in self.task_repo] if self.store.snapshot_tasks else None
+            self.store.compact(tasks, dict(self.settings))
+
+    def render_tasks(self):
+        if self.search_query:
+            ids = self.search_index.search(self.search_query)
+            tasks = [self.task_repo.get(task_id) for task_id in ids[:VISIBLE_ROWS]]
+        elif self.selected_date:
+            tasks = self.task_repo.tasks_for_date(self.selected_date)[:VISIBLE_ROWS]
+        else:
+            tasks = self.task_repo.page(0, VISIBLE_ROWS)
+        self.view.reconcile([(task.id, (task.title, "是" if task.completed else "否")) for task in tasks])
+
+    def render_calendar(self):
+        cells = month_cells(self.current_date.year, self.current_date.month)
+        activity = day_activity(self.task_repo, None, [date_str for _, date_str in cells])
+        for i, ((day, date_str), (task_count, pomodoros)) in enumerate(zip(cells, activity)):
+            level = heat_level(task_count + pomodoros)
+            selected = self.selected_date == date_str
+            self.calendar_state[i] = (day.day, level, selected, day.month == self.current_date.month)
+
+    def add(self, title, date_str):
+        task = self.task_repo.add(Task(title, date_str))
+        self.search_index.add(task)
+        self.render_tasks()
+        self.render_calendar()
+        self.save('add', task=task.to_dict())
+        return task.id
+
+    def edit(self, task_id, title):
+        task = self.task_repo.update(task_id, title=title)
+        self.search_index.update(task)
+        self.render_tasks()
+        self.save('edit', id=task_id, task=task.to_dict())
+
+    def toggle(self, task_id):
+        task = self.task_repo.update(task_id, completed=not self.task_repo.get(task_id).completed)
+        self.render_tasks()
+        self.save('complete', id=task_id, completed=task.completed)
+
+    def delete(self, task_id):
+        self.task_repo.remove(task_id)
+        self.search_index.remove(task_id)
+        self.render_tasks()
+        self.render_calendar()
+        self.save('delete', id=task_id)
+
+    def select_date(self, date_str):
+        self.search_query = ''
+        self.selected_date = date_str
+        self.render_calendar()
+        self.render_tasks()
+
+    def shift_month(self, delta):
+        month = self.current_date.month - 1 + delta
+        self.current_date = datetime.date(self.current_date.year + month // 12, month % 12 + 1, 1)
+        self.render_calendar()
+        # 与界面相同，预读当前月份和翻页方向上的下一个月
+        adjacent = self.current_date + datetime.timedelta(days=32) if delta > 0 else self.current_date - datetime.timedelta(days=1)
+        self.task_repo.prefetch([self.current_date.strftime("%Y-%m"), adjacent.strftime("%Y-%m")])
+
+    def search(self, query):
+        self.search_query = query
+        self.render_tasks()
+
+    def close(self):
+        pass
+
+
+class GuiTarget:
+    # 驱动真正的 PomodoroApp；每个操作都等到 Tk 处理完空闲任务（布局和重绘）才计时结束
+    def __init__(self, backend, data_file):
+        import tkinter as tk
+        from pomodoro_app import PomodoroApp, setup_styles
+
+        self.root = tk.Tk()
+        setup_styles(self.root)
+        self.app = PomodoroApp(self.root, backend=backend, data_file=data_file)
+        self.task_repo = self.app.task_repo
+        self.root.update()
+
+    def idle(self):
+        self.root.update_idletasks()
+
+    def add(self, title, date_str):
+        task = self.app.create_task(title, date_str)
+        self.idle()
+        return task.id
+
+    def edit(self, task_id, title):
+        self.app.update_task(task_id, title=title)
+        self.idle()
+
+    def toggle(self, task_id):
+        self.app.update_task(task_id, completed=not self.app.task_repo.get(task_id).completed)
+        self.idle()
+
+    def delete(self, task_id):
+        self.app.remove_task(task_id)
+        self.idle()
+
+    def select_date(self, date_str):
+        self.app.search_query = ''
+        self.app.select_date(datetime.date.fromisoformat(date_str))
+        self.idle()
+
+    def shift_month(self, delta):
+        (self.app.next_month if delta > 0 else self.app.prev_month)()
+        self.idle()
+
+    def search(self, query):
+        self.app.search_query = query
+        self.app.render_tasks(reset_scroll=True)
+        self.idle()
+
+    def close(self):
+        # 等后台线程把修改全部写完，也计入结果
+        self.app.persistence.flush()
+        self.app.on_close()
+
+
+def replay(target, script, task_ids, years, seed):
+    # 操作的参数（任务、日期、搜索词）也由种子决定；task_ids 与仓库同步维护，随机取任务是 O(1)
+    rng = random.Random(seed + 1)
+    samples = {}
+    days = years * 365
+    for i, action in enumerate(script):
+        date_str = (HISTORY_START + datetime.timedelta(days=rng.randrange(days))).isoformat()
+        if action in ('edit', 'toggle', 'delete'):
+            if not task_ids:
+                continue
+            index = rng.randrange(len(task_ids))
+            task_id = task_ids[index]
+        t0 = time.perf_counter()
+        if action == 'add':
+            task_ids.append(target.add(f"新任务 {' '.join(rng.sample(WORDS, 2))} {i}", date_str))
+        elif action == 'edit':
+            target.edit(task_id, f"改名 {' '.join(rng.sample(WORDS, 2))} {i}")
+        elif action == 'toggle':
+            target.toggle(task_id)
+        elif action == 'delete':
+            target.delete(task_id)
+            task_ids[index] = task_ids[-1]
+            task_ids.pop()
+        elif action == 'select_date':
+            target.select_date(date_str)
+        elif action == 'next_month':
+            target.shift_month(1)
+        elif action == 'prev_month':
+            target.shift_month(-1)
+        elif action == 'search':
+            target.search(rng.choice(WORDS)[:rng.randint(1, 3)])
+        samples.setdefault(action, []).append(time.perf_counter() - t0)
+    return samples
+
+
+def run_size(args, count):
+    workdir = tempfile.mkdtemp(prefix='pomodoro-bench-')
+    data_file = os.path.join(workdir, DATA_FILES[args.backend])
+    try:
+        t0 = time.perf_counter()
+        write_history(args.backend, data_file, count, args.years, args.seed)
+        print(f"  生成 {count} 个任务: {time.perf_counter() - t0:.1f} s")
+
+        # 冷启动加载：读取数据文件、建立仓库和搜索索引并完成首次渲染
+        target_class = GuiTarget if args.gui else CoreTarget
+        samples = {'load': []}
+        for _ in range(args.load_runs):
+            t0 = time.perf_counter()
+            target = target_class(args.backend, data_file)
+            samples['load'].append(time.perf_counter() - t0)
+            if len(samples['load']) < args.load_runs:
+                target.close()
+
+        task_ids = [task.id for task in target.task_repo]
+        samples.update(replay(target, make_script(args.actions, args.seed), task_ids, args.years, args.seed))
+        t0 = time.perf_counter()
+        target.close()
+        samples['close'] = [time.perf_counter() - t0]
+        return {action: summarize(samples[action]) for action in ('load', *ACTION_WEIGHTS, 'close') if action in samples}
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def print_results(results):
+    for size, operations in results.items():
+        print(f"任务数 {size}:")
+        print(f"  {'操作':<12}{'次数':>6}{'平均':>10}" + ''.join(f"{f'p{p}':>10}" for p in PERCENTILES) + f"{'最大':>10}  (ms)")
+        for action, stats in operations.items():
+            print(f"  {action:<12}{stats['count']:>6}{stats['mean_ms']:>10.2f}"
+                  + ''.join(f"{stats[f'p{p}_ms']:>10.2f}" for p in PERCENTILES) + f"{stats['max_ms']:>10.2f}")
+
+
+def compare(baseline, results):
+    # 只比较两次运行都有的任务数和操作；比值大于 1 表示变慢，
+    # p50 变慢 20% 以上且多出 0.1 ms 以上时标记出来
+    print(f"与 {baseline['meta'].get('revision')}（{baseline['meta'].get('time')}）比较，p50 / p99 比值:")
+    for size, operations in results.items():
+        old_operations = baseline['results'].get(size)
+        if not old_operations:
+            continue
+        print(f"任务数 {size}:")
+        for action, stats in operations.items():
+            old = old_operations.get(action)
+            if old:
+                ratios = [stats[key] / old[key] if old[key] else float('inf') for key in ('p50_ms', 'p99_ms')]
+                flag = '  <- 变慢' if ratios[0] > 1.2 and stats['p50_ms'] - old['p50_ms'] > 0.1 else ''
+                print(f"  {action:<12}{ratios[0]:>8.2f}{ratios[1]:>8.2f}{flag}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="番茄钟基准测试套件")
+    parser.add_argument('--sizes', default='1000,10000,100000', help="逗号分隔的任务数，如 1000,10000,1000000")
+    parser.add_argument('--years', type=int, default=3, help="任务分布的年数")
+    parser.add_argument('--actions', type=int, default=500, help="回放的用户操作数")
+    parser.add_argument('--load-runs', type=int, default=3, help="冷启动加载的重复次数")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--backend', choices=BACKENDS, default='json')
+    parser.add_argument('--gui', action='store_true', help="驱动 Tk 界面（需要显示器或 Xvfb）")
+    parser.add_argument('--output', help="结果 JSON 文件，默认为当前目录下的 bench-时间.json")
+    parser.add_argument('--compare', metavar='FILE', help="与之前保存的结果比较")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.gui and sys.platform.startswith('linux') and not os.environ.get('DISPLAY'):
+        print("没有 DISPLAY，无法启动界面；请用 xvfb-run -a 运行，或去掉 --gui 在核心模块上测试")
+        sys.exit(1)
+
+    sizes = [int(size) for size in args.sizes.split(',')]
+    results = {}
+    for count in sizes:
+        print(f"任务数 {count} ({'界面' if args.gui else '核心'}, {args.backend}):")
+        results[str(count)] = run_size(args, count)
+    print_results(results)
+
+    now = datetime.datetime.now()
+    output = {
+        'meta': {
+            'time': now.isoformat(timespec='seconds'),
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'target': 'gui' if args.gui else 'core',
+            'backend': args.backend,
+            'seed': args.seed,
+            'years': args.years,
+            'actions': args.actions
+        },
+        'results': results
+    }
+    path = args.output or f"bench-{now:%Y%m%d-%H%M%S}.json"
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(output, f, ensure_ascii=False, indent=2)
+    print(f"结果已保存到 {path}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            compare(json.load(f), results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+# 计时器漂移模拟：用假时钟驱动一个模拟的 after 事件循环，并在每次回调上注入随机延迟，
+# 比较原来“每次回调减 1 秒”的做法与基于截止时间的 Countdown 的实际结束时刻
+# 用法: python benchmarks/timer_drift.py [会话数] [最大延迟毫秒]
+import heapq
+import math
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pomodoro_engine import Countdown, FakeClock
+
+
+class SimulatedLoop:
+    # 模拟 root.after：回调在预定时间之后再加上一段随机延迟才执行
+    def __init__(self, clock, max_latency, seed):
+        self.clock = clock
+        self.max_latency = max_latency
+        self.rng = random.Random(seed)
+        self.queue = []
+        self.counter = 0
+        self.ticks = 0
+
+    def after(self, ms, callback):
+        fire_at = self.clock() + ms / 1000 + self.rng.uniform(0, self.max_latency)
+        self.counter += 1
+        heapq.heappush(self.queue, (fire_at, self.counter, callback))
+
+    def run(self):
+        while self.queue:
+            fire_at, _, callback = heapq.heappop(self.queue)
+            self.clock.now = max(self.clock.now, fire_at)
+            self.ticks += 1
+            callback()
+
+
+def run_legacy(duration, max_latency, seed):
+    clock = FakeClock()
+    loop = SimulatedLoop(clock, max_latency, seed)
+    state = {'remaining': duration, 'end': None}
+
+    def update_timer():
+        state['remaining'] -= 1
+        if state['remaining'] <= 0:
+            state['end'] = clock()
+            return
+        loop.after(1000, update_timer)
+
+    update_timer()
+    loop.run()
+    return state['end'], loop.ticks
+
+
+def run_deadline(duration, max_latency, seed):
+    clock = FakeClock()
+    loop = SimulatedLoop(clock, max_latency, seed)
+    countdown = Countdown(duration, clock=clock)
+    state = {'end': None, 'shown': []}
+
+    def update_timer():
+        state['shown'].append(countdown.remaining_seconds())
+        if countdown.finished():
+            state['end'] = clock()
+            return
+        loop.after(math.ceil(countdown.next_tick_delay() * 1000), update_timer)
+
+    countdown.start()
+    update_timer()
+    loop.run()
+    return state['end'], loop.ticks, state['shown']
+
+
+def main():
+    sessions = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    max_latency = (int(sys.argv[2]) if len(sys.argv) > 2 else 50) / 1000
+    duration = 1500
+
+    worst_legacy = 0.0
+    worst_deadline = 0.0
+    total_ticks = 0
+    for seed in range(sessions):
+        legacy_end, _ = run_legacy(duration, max_latency, seed)
+        deadline_end, ticks, shown = run_deadline(duration, max_latency, seed)
+        total_ticks += ticks
+        worst_legacy = max(worst_legacy, legacy_end - duration)
+        worst_deadline = max(worst_deadline, deadline_end - duration)
+        # 截止时间方式下每个整秒都被显示且只递减 1，不会跳秒
+        assert all(a - b in (0, 1) for a, b in zip(shown, shown[1:])), "显示跳秒"
+        # 结束时刻的误差不超过一次回调延迟加 1 毫秒的取整
+        assert 0 <= deadline_end - duration <= max_latency + 0.001, deadline_end - duration
+
+    print(f"{sessions} 个 {duration // 60} 分钟会话，共 {total_ticks} 次模拟回调，每次注入 0~{max_latency * 1000:.0f} ms 延迟")
+    print(f"原实现最大超时: {worst_legacy:.3f} 秒")
+    print(f"截止时间实现最大超时: {worst_deadline:.3f} 秒（不随会话长度累积）")
+
+
+if __name__ == "__main__":
+    main()
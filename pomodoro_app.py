@@ -1,11 +1,32 @@
+import time
+
+# 进程启动时刻，用于统计启动耗时
+STARTUP_TIME = time.perf_counter()
+
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
+import argparse
 import datetime
-import json
-import os
+import itertools
+import math
+import queue
+import threading
+from pomodoro_storage import BACKENDS, PersistenceWorker, DEFAULT_SETTINGS, apply_to_repository, open_store
+from pomodoro_tasks import Task, TaskRepository
+from pomodoro_search import SearchIndex, index_for
+from pomodoro_engine import MODE_SETTINGS, PomodoroEngine
+from pomodoro_calendar import day_activity, heat_level, month_cells, year_cells
+from pomodoro_sessions import StatsAggregator, format_totals, load_stats, save_stats
+from pomodoro_widgets import RenderScheduler, VirtualTreeview
+from pomodoro_transfer import ImportReport, batched, export_tasks, read_tasks
+from pomodoro_watch import FileWatcher
+from pomodoro_server import ApiServer
+from pomodoro_notify import Notifier
+from pomodoro_profile import Profiler, format_summary
 
 class PomodoroApp:
-    def __init__(self, root):
+    def __init__(self, root, save_debounce=0.5, fast_start=False, startup_report=False, backend='json', data_file=None,
+                 serve_port=None, profile=False, trace_file=None):
         self.root = root
         self.root.title("番茄钟")
         self.root.geometry("1000x700")
@@ -13,21 +34,57 @@ class PomodoroApp:
         
         # 全局变量
         self.timer_interval = None
-        self.remaining_time = 1500  # 默认工作时间（25分钟）
-        self.current_mode = 'work'
-        self.is_running = False
-        self.tasks = []
-        self.settings = {
-            'work_time': 1500,
-            'short_break': 300,
-            'long_break': 900,
-            'reminder': 'none'
-        }
+        self.task_repo = TaskRepository()
+        self.settings = dict(DEFAULT_SETTINGS)
         self.current_date = datetime.datetime.now()
         self.selected_date = None
-        
-        # 数据文件路径
-        self.data_file = 'pomodoro_data.json'
+        self.save_debounce = save_debounce
+        self.persistence = None
+        # 数据文件加载失败时的异常；此时不再写入任务和设置，原文件保持不变
+        self.load_error = None
+        # 任务仓库的修改次数（本进程的修改、导入和应用的外部记录）；
+        # 后台重新加载期间有过修改时，读到的数据不一定包含它，需要再加载一次
+        self.data_generation = 0
+        self.reloading = False
+        self.reload_again = False
+        self.watcher = None
+        self.serve_port = serve_port
+        self.server = None
+        self.notifier = None
+        self.toasts = []
+        # 性能探针默认关闭；打开后热点方法换成计时版本，可以显示浮层或导出跟踪文件
+        self.profiler = None
+        self.trace_file = trace_file
+        self.profile_window = None
+        self.profile_job = None
+        self.lag_expected = None
+        self.startup_report = startup_report
+        self.startup_marks = {}
+        
+        # 设置窗口和编辑窗口在第一次打开时创建，之后隐藏复用
+        self.settings_window = None
+        self.edit_window = None
+        self.editing_task_id = None
+        self.stats_window = None
+        self.year_window = None
+        
+        # 数据加载完成之前结束的会话先暂存，加载后再写入日志和统计
+        self.stats = None
+        self.pending_sessions = []
+        
+        # 任务搜索：倒排索引随数据一起加载，输入停顿后才执行查询
+        self.search_index = SearchIndex()
+        self.search_query = ''
+        self.search_job = None
+        
+        # 数据存储：默认为 JSON 数据文件，也可以选择 SQLite 数据库
+        self.store = open_store(backend, data_file)
+        self.session_log = self.store.open_session_log()
+        
+        # 后台线程不能直接调用 Tk，需要界面线程处理的事情放入收件箱，由界面线程定期取出执行
+        self.inbox = queue.Queue()
+        # 已经应用到任务仓库的其他进程（如命令行）日志记录的最大序号
+        self.external_seq = 0
         
         # 颜色定义
         self.colors = {
@@ -41,18 +98,61 @@ class PomodoroApp:
             'text_light': '#999999'
         }
         
-        # 加载数据
-        self.load_data()
+        # 计时逻辑在与界面无关的引擎中，倒计时按单调时钟的截止时间计算
+        self.engine = PomodoroEngine(self.settings)
+        self.root.protocol('WM_DELETE_WINDOW', self.on_close)
         
         # 创建主布局
         self.create_main_layout()
         
+        # 修改数据后只标记需要重新渲染的视图，空闲时每个视图只渲染一次；
+        # 通过属性查找调用渲染方法，性能探针换上的计时版本同样生效
+        self.renders = RenderScheduler(self.root.after_idle, {
+            'timer': lambda: self.update_timer_display(),
+            'tasks': lambda reset_scroll=False: self.render_tasks(reset_scroll),
+            'calendar': lambda: self.render_calendar(),
+            'year': lambda: self.render_year_view()
+        })
+        
+        # 订阅引擎事件
+        self.engine.on('tick', lambda remaining: self.renders.invalidate('timer'))
+        self.engine.on('mode_change', self.on_mode_change)
+        self.engine.on('phase_end', self.on_phase_end)
+        self.engine.on('session', self.record_session)
+        self.engine.on('tick', self.publish_timer)
+        
         # 初始化界面
         self.update_timer_display()
-        self.render_tasks()
-        self.render_calendar()
+        self.root.after(0, self.mark_first_paint)
+        
+        if profile or trace_file:
+            self.enable_profiling()
+        
+        # 加载数据；快速启动时先显示窗口，数据在后台线程中加载和建立索引
+        if fast_start:
+            self.set_data_controls(tk.DISABLED)
+            self.render_calendar()
+            self.load_data_in_background()
+        else:
+            self.on_data_loaded(*self.load_data())
+    
+    def create_menu(self):
+        menubar = tk.Menu(self.root)
+        self.file_menu = tk.Menu(menubar, tearoff=0)
+        self.file_menu.add_command(label="导入任务…", command=self.import_tasks)
+        self.file_menu.add_command(label="导出全部任务…", command=self.export_tasks)
+        self.file_menu.add_command(label="导出本月任务…", command=lambda: self.export_tasks(month_only=True))
+        menubar.add_cascade(label="文件", menu=self.file_menu)
+        debug_menu = tk.Menu(menubar, tearoff=0)
+        debug_menu.add_command(label="性能浮层", accelerator="F12", command=self.toggle_profile_window)
+        debug_menu.add_command(label="导出性能跟踪…", command=self.export_trace)
+        menubar.add_cascade(label="调试", menu=debug_menu)
+        self.root.config(menu=menubar)
+        self.root.bind('<F12>', self.toggle_profile_window)
     
     def create_main_layout(self):
+        self.create_menu()
+        
         # 创建主框架
         main_frame = ttk.Frame(self.root, padding="15")
         main_frame.pack(fill=tk.BOTH, expand=True)
@@ -121,6 +221,9 @@ class PomodoroApp:
         
         self.settings_btn = ttk.Button(settings_frame, text="⚙️ 设置", command=self.open_settings, style='Settings.TButton')
         self.settings_btn.pack(side=tk.RIGHT, padx=5)
+        
+        self.stats_btn = ttk.Button(settings_frame, text="📊 统计", command=self.open_stats, style='Settings.TButton')
+        self.stats_btn.pack(side=tk.RIGHT, padx=5)
     
     def create_tasks_section(self, parent):
         # 创建任务管理框架
@@ -141,6 +244,17 @@ class PomodoroApp:
         self.add_task_btn = ttk.Button(task_input_frame, text="添加", command=self.add_task, style='AddTask.TButton')
         self.add_task_btn.pack(side=tk.LEFT, padx=5)
         
+        # 搜索框
+        search_frame = ttk.Frame(tasks_frame, style='Input.TFrame')
+        search_frame.pack(fill=tk.X)
+        
+        ttk.Label(search_frame, text="🔍", background=self.colors['card_bg']).pack(side=tk.LEFT, padx=5)
+        self.search_var = tk.StringVar()
+        self.search_var.trace_add('write', self.schedule_search)
+        self.search_entry = ttk.Entry(search_frame, textvariable=self.search_var, style='TaskInput.TEntry')
+        self.search_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+        self.search_entry.bind('<Escape>', lambda event: self.search_var.set(''))
+        
         # 任务列表
         self.task_list_frame = ttk.Frame(tasks_frame, style='List.TFrame')
         self.task_list_frame.pack(fill=tk.BOTH, expand=True, pady=10)
@@ -150,14 +264,15 @@ class PomodoroApp:
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         
         # 任务列表树
-        self.task_tree = ttk.Treeview(self.task_list_frame, columns=('name', 'completed'), show='headings', yscrollcommand=scrollbar.set, style='TaskTree.Treeview')
+        self.task_tree = ttk.Treeview(self.task_list_frame, columns=('name', 'completed'), show='headings', style='TaskTree.Treeview')
         self.task_tree.heading('name', text='任务名称')
         self.task_tree.heading('completed', text='完成状态')
         self.task_tree.column('name', width=200)
         self.task_tree.column('completed', width=100, anchor=tk.CENTER)
         self.task_tree.pack(fill=tk.BOTH, expand=True)
         
-        scrollbar.config(command=self.task_tree.yview)
+        # 虚拟滚动：只创建可见区域内的行，滚动条由 task_list 驱动
+        self.task_list = VirtualTreeview(self.task_tree, scrollbar, lambda task: (task.id, self.task_row(task)), on_select=self.on_task_select)
         
         # 任务操作按钮
         task_buttons_frame = ttk.Frame(tasks_frame)
@@ -169,8 +284,11 @@ class PomodoroApp:
         self.delete_task_btn = ttk.Button(task_buttons_frame, text="删除", command=self.delete_task, state=tk.DISABLED, style='Delete.TButton')
         self.delete_task_btn.pack(side=tk.LEFT, padx=5, expand=True)
         
-        # 绑定任务列表选择事件
-        self.task_tree.bind('<<TreeviewSelect>>', self.on_task_select)
+        self.complete_all_btn = ttk.Button(task_buttons_frame, text="当天全部完成", command=self.complete_all, style='Action.TButton')
+        self.complete_all_btn.pack(side=tk.LEFT, padx=5, expand=True)
+        
+        # 绑定任务列表双击事件
+        self.task_tree.bind('<Double-1>', self.toggle_task)
     
     def create_calendar_section(self, parent):
         # 创建日历框架
@@ -194,18 +312,62 @@ class PomodoroApp:
         self.next_month_btn = ttk.Button(calendar_header, text="下月 →", command=self.next_month, style='Nav.TButton')
         self.next_month_btn.pack(side=tk.RIGHT, padx=5)
         
+        self.year_view_btn = ttk.Button(calendar_header, text="年视图", command=self.open_year_view, style='Nav.TButton')
+        self.year_view_btn.pack(side=tk.RIGHT, padx=5)
+        
         # 日历网格
         self.calendar_grid = ttk.Frame(calendar_frame, style='CalendarGrid.TFrame')
         self.calendar_grid.pack(fill=tk.BOTH, expand=True, pady=10)
+        
+        # 星期标题和 42 个日期按钮只创建一次，之后由 render_calendar 原地更新
+        weekdays = ['日', '一', '二', '三', '四', '五', '六']
+        for i, day in enumerate(weekdays):
+            day_label = ttk.Label(self.calendar_grid, text=day, font=('Helvetica', 10, 'bold'))
+            day_label.grid(row=0, column=i, sticky=tk.NSEW, padx=2, pady=2)
+        
+        self.calendar_cells = []
+        self.calendar_cell_dates = [None] * 42
+        self.calendar_cell_state = [None] * 42
+        for i in range(42):  # 6周 x 7天
+            date_btn = ttk.Button(self.calendar_grid, command=lambda i=i: self.select_date(self.calendar_cell_dates[i]))
+            date_btn.grid(row=i // 7 + 1, column=i % 7, sticky=tk.NSEW, padx=2, pady=2)
+            self.calendar_cells.append(date_btn)
+        
+        # 配置网格权重
+        for i in range(7):
+            self.calendar_grid.grid_columnconfigure(i, weight=1)
+        for i in range(7):
+            self.calendar_grid.grid_rowconfigure(i, weight=1)
     
     def open_settings(self):
+        if self.settings_window is None:
+            self.create_settings_window()
+        
+        # 每次打开时用当前设置刷新输入框
+        self.work_time_var.set(self.settings['work_time'] // 60)
+        self.short_break_var.set(self.settings['short_break'] // 60)
+        self.long_break_var.set(self.settings['long_break'] // 60)
+        self.reminder_var.set(self.settings['reminder'])
+        
+        self.settings_window.deiconify()
+        self.settings_window.lift()
+        self.settings_window.grab_set()
+    
+    def close_settings(self):
+        self.settings_window.grab_release()
+        self.settings_window.withdraw()
+    
+    def create_settings_window(self):
+        setup_dialog_styles(self.root)
+        
         # 创建设置窗口
         settings_window = tk.Toplevel(self.root)
         settings_window.title("设置")
         settings_window.geometry("450x350")
         settings_window.transient(self.root)
-        settings_window.grab_set()
         settings_window.configure(bg=self.colors['background'])
+        settings_window.protocol('WM_DELETE_WINDOW', self.close_settings)
+        self.settings_window = settings_window
         
         # 创建设置窗口内容
         settings_frame = ttk.Frame(settings_window, padding="30", style='Card.TFrame')
@@ -220,8 +382,8 @@ class PomodoroApp:
         work_time_frame.pack(fill=tk.X, pady=10)
         
         ttk.Label(work_time_frame, text="工作时间（分钟）:", font=('Helvetica', 11), style='Label.TLabel').pack(side=tk.LEFT, padx=5, pady=5)
-        work_time_var = tk.IntVar(value=self.settings['work_time'] // 60)
-        work_time_entry = ttk.Entry(work_time_frame, textvariable=work_time_var, style='SettingEntry.TEntry')
+        self.work_time_var = tk.IntVar()
+        work_time_entry = ttk.Entry(work_time_frame, textvariable=self.work_time_var, style='SettingEntry.TEntry')
         work_time_entry.pack(side=tk.LEFT, padx=5, fill=tk.X, expand=True, pady=5)
         
         # 短休息设置
@@ -229,8 +391,8 @@ class PomodoroApp:
         short_break_frame.pack(fill=tk.X, pady=10)
         
         ttk.Label(short_break_frame, text="短休息（分钟）:", font=('Helvetica', 11), style='Label.TLabel').pack(side=tk.LEFT, padx=5, pady=5)
-        short_break_var = tk.IntVar(value=self.settings['short_break'] // 60)
-        short_break_entry = ttk.Entry(short_break_frame, textvariable=short_break_var, style='SettingEntry.TEntry')
+        self.short_break_var = tk.IntVar()
+        short_break_entry = ttk.Entry(short_break_frame, textvariable=self.short_break_var, style='SettingEntry.TEntry')
         short_break_entry.pack(side=tk.LEFT, padx=5, fill=tk.X, expand=True, pady=5)
         
         # 长休息设置
@@ -238,8 +400,8 @@ class PomodoroApp:
         long_break_frame.pack(fill=tk.X, pady=10)
         
         ttk.Label(long_break_frame, text="长休息（分钟）:", font=('Helvetica', 11), style='Label.TLabel').pack(side=tk.LEFT, padx=5, pady=5)
-        long_break_var = tk.IntVar(value=self.settings['long_break'] // 60)
-        long_break_entry = ttk.Entry(long_break_frame, textvariable=long_break_var, style='SettingEntry.TEntry')
+        self.long_break_var = tk.IntVar()
+        long_break_entry = ttk.Entry(long_break_frame, textvariable=self.long_break_var, style='SettingEntry.TEntry')
         long_break_entry.pack(side=tk.LEFT, padx=5, fill=tk.X, expand=True, pady=5)
         
         # 提醒设置
@@ -247,103 +409,224 @@ class PomodoroApp:
         reminder_frame.pack(fill=tk.X, pady=10)
         
         ttk.Label(reminder_frame, text="提醒方式:", font=('Helvetica', 11), style='Label.TLabel').pack(side=tk.LEFT, padx=5, pady=5)
-        reminder_var = tk.StringVar(value=self.settings['reminder'])
-        reminder_combobox = ttk.Combobox(reminder_frame, textvariable=reminder_var, values=['none', 'notification', 'sound', 'both'], style='SettingCombobox.TCombobox')
+        self.reminder_var = tk.StringVar()
+        reminder_combobox = ttk.Combobox(reminder_frame, textvariable=self.reminder_var, values=list(REMINDERS), style='SettingCombobox.TCombobox')
         reminder_combobox.pack(side=tk.LEFT, padx=5, fill=tk.X, expand=True, pady=5)
         
         # 保存按钮
         def save_settings():
-            self.settings['work_time'] = work_time_var.get() * 60
-            self.settings['short_break'] = short_break_var.get() * 60
-            self.settings['long_break'] = long_break_var.get() * 60
-            self.settings['reminder'] = reminder_var.get()
-            
-            # 如果当前是工作模式，更新剩余时间
-            if self.current_mode == 'work':
-                self.remaining_time = self.settings['work_time']
-                self.update_timer_display()
-            
-            self.save_data()
-            settings_window.destroy()
+            self.apply_settings({
+                'work_time': self.work_time_var.get() * 60,
+                'short_break': self.short_break_var.get() * 60,
+                'long_break': self.long_break_var.get() * 60,
+                'reminder': self.reminder_var.get()
+            })
+            self.close_settings()
             messagebox.showinfo("提示", "设置已保存！")
         
         save_btn = ttk.Button(settings_frame, text="保存", command=save_settings, style='Save.TButton')
         save_btn.pack(pady=30)
-
     
-    def start_timer(self):
-        if self.is_running:
+    def apply_settings(self, settings):
+        self.settings.update(settings)
+        
+        # 如果当前是工作模式，更新剩余时间
+        if self.engine.mode == 'work':
+            self.engine.refresh_duration()
+        
+        self.save_data('settings', settings=dict(self.settings))
+    
+    def start_timer(self, task_id=None):
+        if self.engine.running:
             return
         
-        self.is_running = True
         self.start_btn.config(state=tk.DISABLED)
         self.pause_btn.config(state=tk.NORMAL)
         
-        def update_timer():
-            self.remaining_time -= 1
-            self.update_timer_display()
-            
-            if self.remaining_time <= 0:
-                self.pause_timer()
-                self.show_reminder()
-                self.switch_mode()
-                return
-            
-            self.timer_interval = self.root.after(1000, update_timer)
-        
-        update_timer()
+        # 本阶段关联指定的任务，默认为当前选中的任务
+        selected = self.task_list.selection()
+        self.engine.task_id = task_id or (selected if selected and selected in self.task_repo else None)
+        self.engine.start()
+        self.update_timer()
+    
+    def update_timer(self):
+        # 剩余时间和阶段结束都由引擎计算并通过事件通知，这里只按它给出的间隔调度下一次 tick
+        self.timer_interval = None
+        delay = self.engine.tick()
+        if delay is not None:
+            self.timer_interval = self.root.after(math.ceil(delay * 1000), self.update_timer)
     
     def pause_timer(self):
-        if not self.is_running:
+        if not self.engine.running:
             return
         
-        self.is_running = False
+        self.engine.pause()
+        self.stop_timer_ui()
+    
+    def stop_timer_ui(self):
         self.start_btn.config(state=tk.NORMAL)
         self.pause_btn.config(state=tk.DISABLED)
         
         if self.timer_interval:
             self.root.after_cancel(self.timer_interval)
             self.timer_interval = None
+        self.publish_timer()
     
     def reset_timer(self):
         self.pause_timer()
-        self.set_mode(self.current_mode)
+        self.set_mode(self.engine.mode)
     
     def set_mode(self, mode):
-        self.current_mode = mode
-        
+        self.engine.set_mode(mode)
+    
+    def on_mode_change(self, mode):
         # 更新按钮状态
         self.work_btn.config(style='TButton' if mode != 'work' else 'Accent.TButton')
         self.short_break_btn.config(style='TButton' if mode != 'short-break' else 'Accent.TButton')
         self.long_break_btn.config(style='TButton' if mode != 'long-break' else 'Accent.TButton')
+    
+    def on_phase_end(self, mode):
+        self.stop_timer_ui()
+        self.publish('phase_end', {'mode': mode})
+        self.show_reminder(mode)
+    
+    def timer_state(self):
+        return {
+            'mode': self.engine.mode,
+            'running': self.engine.running,
+            'remaining': self.engine.remaining_seconds(),
+            'duration': self.engine.duration(self.engine.mode),
+            'task_id': self.engine.task_id or None
+        }
+    
+    def publish(self, event, data):
+        # 通过 HTTP 接口的事件流推送给网页版等客户端；只是放入服务器的事件循环，不会阻塞界面
+        if self.server:
+            self.server.publish(event, data)
+    
+    def publish_timer(self, remaining=None):
+        self.publish('tick', self.timer_state())
+    
+    def record_session(self, session):
+        if self.stats is None:
+            self.pending_sessions.append(session)
+            return
+        
+        # 会话日志在后台线程中追加，统计随后从日志中增量补上，
+        # 这样命令行等其他进程追加的会话同样只统计一次
+        self.persistence.submit_call(self.append_session, session)
+    
+    def append_session(self, session):
+        # 在后台线程中执行
+        self.session_log.append(session)
+        self.call_soon(self.refresh_stats)
+    
+    def refresh_stats(self):
+        if not self.stats.catch_up(self.session_log):
+            return
+        self.publish('stats', {})
+        if self.stats_window is not None and self.stats_window.winfo_viewable():
+            self.render_stats()
+        self.renders.invalidate('calendar')
+    
+    def open_stats(self):
+        if self.stats_window is None:
+            self.create_stats_window()
         
-        # 设置对应时间
-        if mode == 'work':
-            self.remaining_time = self.settings['work_time']
-        elif mode == 'short-break':
-            self.remaining_time = self.settings['short_break']
-        elif mode == 'long-break':
-            self.remaining_time = self.settings['long_break']
+        self.render_stats()
+        self.stats_window.deiconify()
+        self.stats_window.lift()
+    
+    def create_stats_window(self):
+        # 创建统计窗口，关闭时隐藏，之后复用
+        stats_window = tk.Toplevel(self.root)
+        stats_window.title("统计")
+        stats_window.geometry("560x380")
+        stats_window.transient(self.root)
+        stats_window.configure(bg=self.colors['background'])
+        stats_window.protocol('WM_DELETE_WINDOW', stats_window.withdraw)
+        self.stats_window = stats_window
+        
+        stats_frame = ttk.Frame(stats_window, padding="20", style='Card.TFrame')
+        stats_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        
+        title_label = ttk.Label(stats_frame, text="统计", font=('Helvetica', 16, 'bold'), style='Title.TLabel')
+        title_label.pack(anchor=tk.W, pady=(0, 15))
         
-        self.update_timer_display()
+        # 今天、本周、本月，以及最近 7 天，共 10 行
+        self.stats_labels = []
+        for _ in range(10):
+            label = ttk.Label(stats_frame, font=('Courier', 10), background=self.colors['card_bg'])
+            label.pack(anchor=tk.W, pady=2)
+            self.stats_labels.append(label)
     
-    def switch_mode(self):
-        if self.current_mode == 'work':
-            self.set_mode('short-break')
-        else:
-            self.set_mode('work')
+    def render_stats(self):
+        stats = self.stats or StatsAggregator()
+        today = datetime.date.today()
+        lines = [
+            f"今天      {format_totals(stats.day(today))}",
+            f"本周      {format_totals(stats.week(today))}",
+            f"本月      {format_totals(stats.month(today))}"
+        ]
+        lines.append("最近 7 天:")
+        for i in range(6, -1, -1):
+            day = today - datetime.timedelta(days=i)
+            lines.append(f"{day.strftime('%m-%d')}     {format_totals(stats.day(day))}")
+        
+        for label, text in zip(self.stats_labels, lines):
+            label.config(text=text)
     
-    def update_timer_display(self):
-        minutes = self.remaining_time // 60
-        seconds = self.remaining_time % 60
+    def update_timer_display(self, remaining=None):
+        if remaining is None:
+            remaining = self.engine.remaining_seconds()
+        minutes = remaining // 60
+        seconds = remaining % 60
         self.time_display.config(text=f"{minutes:02d}:{seconds:02d}")
     
-    def show_reminder(self):
-        if self.settings['reminder'] == 'none':
-            return
-        
-        if self.settings['reminder'] in ['notification', 'both']:
-            messagebox.showinfo("番茄钟提醒", f"{'工作时间结束！' if self.current_mode == 'work' else '休息时间结束！'}")
+    def show_reminder(self, mode):
+        # 提醒都不阻塞界面线程，阶段结束后立即切换到下一模式
+        reminder = self.settings['reminder']
+        message = '工作时间结束！' if mode == 'work' else '休息时间结束！'
+        if reminder in ['notification', 'both']:
+            self.show_toast("番茄钟提醒", message)
+            # 窗口不在前台时再发一条桌面通知
+            if self.notifier and self.root.focus_displayof() is None:
+                self.notifier.notify("番茄钟提醒", message)
+        if reminder in ['sound', 'both']:
+            if self.notifier and self.notifier.can_play:
+                self.notifier.play('reminder')
+            else:
+                self.root.bell()
+    
+    def show_toast(self, title, message):
+        # 非模态的提醒小窗：显示在主窗口右下角，不抢焦点，几秒后自动关闭，点击立即关闭
+        toast = tk.Toplevel(self.root)
+        toast.overrideredirect(True)
+        toast.attributes('-topmost', True)
+        frame = tk.Frame(toast, bg=STYLE_COLORS['primary'], padx=16, pady=12)
+        frame.pack(fill=tk.BOTH, expand=True)
+        tk.Label(frame, text=title, bg=STYLE_COLORS['primary'], fg='white',
+                 font=('Helvetica', 12, 'bold')).pack(anchor=tk.W)
+        tk.Label(frame, text=message, bg=STYLE_COLORS['primary'], fg='white',
+                 font=('Helvetica', 11)).pack(anchor=tk.W, pady=(4, 0))
+        
+        # 多个提醒依次向上堆叠
+        toast.update_idletasks()
+        offset = sum(other.winfo_reqheight() + TOAST_MARGIN for other in self.toasts)
+        x = self.root.winfo_rootx() + self.root.winfo_width() - toast.winfo_reqwidth() - TOAST_MARGIN
+        y = self.root.winfo_rooty() + self.root.winfo_height() - toast.winfo_reqheight() - TOAST_MARGIN - offset
+        toast.geometry(f"+{max(x, 0)}+{max(y, 0)}")
+        self.toasts.append(toast)
+        
+        close = lambda event=None: self.close_toast(toast)
+        for widget in (toast, frame, *frame.winfo_children()):
+            widget.bind('<Button-1>', close)
+        toast.after(TOAST_DURATION, close)
+    
+    def close_toast(self, toast):
+        if toast in self.toasts:
+            self.toasts.remove(toast)
+            toast.destroy()
     
     def add_task(self):
         task_name = self.task_input.get().strip()
@@ -353,20 +636,45 @@ class PomodoroApp:
         # 如果没有选择日期，使用当天的日期
         date_to_use = self.selected_date or datetime.datetime.now().strftime("%Y-%m-%d")
         
-        self.tasks.append({
-            'name': f"{date_to_use} - {task_name}",
-            'completed': False,
-            'date': date_to_use
-        })
-        
+        self.create_task(task_name, date_to_use)
         self.task_input.delete(0, tk.END)
-        self.render_tasks()
-        self.render_calendar()
-        self.save_data()
+    
+    def create_task(self, title, date):
+        # 添加任务、渲染并保存；界面和 HTTP 接口共用以下几个任务操作
+        task = self.task_repo.add(Task(title, date))
+        self.search_index.add(task)
+        self.invalidate_dates({date})
+        self.save_data('add', task=task.to_dict())
+        return task
+    
+    def update_task(self, task_id, **fields):
+        old_date = self.task_repo.get(task_id).date
+        task = self.task_repo.update(task_id, **fields)
+        if 'title' in fields or 'date' in fields:
+            self.search_index.update(task)
+        self.invalidate_dates({old_date, task.date})
+        if set(fields) == {'completed'}:
+            self.save_data('complete', id=task_id, completed=task.completed)
+        else:
+            self.save_data('edit', id=task_id, task=task.to_dict())
+        return task
+    
+    def remove_task(self, task_id):
+        task = self.task_repo.remove(task_id)
+        self.search_index.remove(task_id)
+        self.invalidate_dates({task.date})
+        self.save_data('delete', id=task_id)
+        self.drop_stale_selection()
+    
+    def drop_stale_selection(self):
+        # 选中的任务已被删除（接口、其他进程或重新加载）时清除选中，编辑和删除按钮随之禁用
+        task_id = self.task_list.selection()
+        if task_id and task_id not in self.task_repo:
+            self.task_list.clear_selection()
+            self.on_task_select(None)
     
     def on_task_select(self, event):
-        selected_items = self.task_tree.selection()
-        if selected_items:
+        if self.task_list.selection():
             self.edit_task_btn.config(state=tk.NORMAL)
             self.delete_task_btn.config(state=tk.NORMAL)
         else:
@@ -374,420 +682,1101 @@ class PomodoroApp:
             self.delete_task_btn.config(state=tk.DISABLED)
     
     def edit_task(self):
-        selected_items = self.task_tree.selection()
-        if not selected_items:
+        task_id = self.task_list.selection()
+        if not task_id or task_id not in self.task_repo:
             return
         
-        item = selected_items[0]
-        task_id = int(item)
-        task = self.tasks[task_id]
+        task = self.task_repo.get(task_id)
+        if self.edit_window is None:
+            self.create_edit_window()
         
+        self.editing_task_id = task_id
+        self.task_name_var.set(task.title)
+        
+        self.edit_window.deiconify()
+        self.edit_window.lift()
+        self.edit_window.grab_set()
+    
+    def close_edit_window(self):
+        self.editing_task_id = None
+        self.edit_window.grab_release()
+        self.edit_window.withdraw()
+    
+    def create_edit_window(self):
         # 创建编辑窗口
         edit_window = tk.Toplevel(self.root)
         edit_window.title("编辑任务")
         edit_window.geometry("400x200")
         edit_window.transient(self.root)
-        edit_window.grab_set()
+        edit_window.protocol('WM_DELETE_WINDOW', self.close_edit_window)
+        self.edit_window = edit_window
         
         edit_frame = ttk.Frame(edit_window, padding="20")
         edit_frame.pack(fill=tk.BOTH, expand=True)
         
         # 任务名称输入
         ttk.Label(edit_frame, text="任务名称:").pack(pady=10)
-        task_name_var = tk.StringVar(value=task['name'].split(' - ', 1)[1])
-        task_name_entry = ttk.Entry(edit_frame, textvariable=task_name_var)
+        self.task_name_var = tk.StringVar()
+        task_name_entry = ttk.Entry(edit_frame, textvariable=self.task_name_var)
         task_name_entry.pack(fill=tk.X, pady=5)
         
         # 保存按钮
-        def save_edit():
-            new_name = task_name_var.get().strip()
-            if new_name:
-                task['name'] = f"{task['date']} - {new_name}"
-                self.render_tasks()
-                self.render_calendar()
-                self.save_data()
-                edit_window.destroy()
-        
-        save_btn = ttk.Button(edit_frame, text="保存", command=save_edit)
+        save_btn = ttk.Button(edit_frame, text="保存", command=self.save_edit)
         save_btn.pack(pady=20)
     
+    def save_edit(self):
+        task_id = self.editing_task_id
+        new_name = self.task_name_var.get().strip()
+        if task_id in self.task_repo and new_name:
+            self.update_task(task_id, title=new_name)
+            self.close_edit_window()
+    
     def delete_task(self):
-        selected_items = self.task_tree.selection()
-        if not selected_items:
+        task_id = self.task_list.selection()
+        if not task_id or task_id not in self.task_repo:
             return
         
-        item = selected_items[0]
-        task_id = int(item)
-        
-        if messagebox.askyesno("确认删除", "确定要删除这个任务吗？"):
-            self.tasks.pop(task_id)
-            self.render_tasks()
-            self.render_calendar()
-            self.save_data()
+        # 确认对话框打开期间任务可能已被其他进程删除
+        if messagebox.askyesno("确认删除", "确定要删除这个任务吗？") and task_id in self.task_repo:
+            self.task_list.clear_selection()
+            self.remove_task(task_id)
+            self.on_task_select(None)
     
-    def render_tasks(self):
-        # 清空任务列表
-        for item in self.task_tree.get_children():
-            self.task_tree.delete(item)
-        
-        # 过滤当前选中日期的任务
-        filtered_tasks = [task for task in self.tasks if task['date'] == self.selected_date] if self.selected_date else self.tasks
+    def toggle_task(self, event):
+        # 双击任务切换完成状态
+        task_id = self.task_tree.identify_row(event.y)
+        if not task_id or task_id not in self.task_repo:
+            return
         
-        if not filtered_tasks:
-            # 显示空任务提示
-            pass
+        self.update_task(task_id, completed=not self.task_repo.get(task_id).completed)
+    
+    def complete_all(self):
+        # 把选中日期（未选时为今天）未完成的任务全部标记为完成；批量修改只在最后渲染一次
+        date_str = self.selected_date or datetime.date.today().isoformat()
+        with self.renders.batch():
+            for task in self.task_repo.tasks_for_date(date_str):
+                if not task.completed:
+                    self.update_task(task.id, completed=True)
+    
+    def task_row(self, task):
+        completed = "是" if task.completed else "否"
+        return (task.title, completed)
+    
+    def schedule_search(self, *args):
+        # 连续输入时只在停顿 150 ms 后查询一次
+        if self.search_job:
+            self.root.after_cancel(self.search_job)
+        self.search_job = self.root.after(150, self.apply_search)
+    
+    def apply_search(self):
+        self.search_job = None
+        query = self.search_var.get().strip()
+        if query != self.search_query:
+            self.search_query = query
+            self.renders.invalidate('tasks', reset_scroll=True)
+    
+    def render_tasks(self, reset_scroll=False):
+        # 有搜索词时显示全部搜索结果（按相关度排序，不限日期，列表只取出可见的几行）；
+        # 否则过滤当前选中日期的任务，未选日期时直接从任务仓库分页读取
+        if self.search_query:
+            result_ids = self.search_index.search(self.search_query)
+            self.task_list.set_source(len(result_ids), lambda offset, limit: [self.task_repo.get(task_id) for task_id in result_ids[offset:offset + limit]], reset_scroll)
+        elif self.selected_date:
+            filtered_tasks = self.task_repo.tasks_for_date(self.selected_date)
+            self.task_list.set_source(len(filtered_tasks), lambda offset, limit: filtered_tasks[offset:offset + limit], reset_scroll)
         else:
-            for i, task in enumerate(filtered_tasks):
-                task_name = task['name'].split(' - ', 1)[1] if ' - ' in task['name'] else task['name']
-                completed = "是" if task['completed'] else "否"
-                self.task_tree.insert('', tk.END, iid=str(i), values=(task_name, completed))
+            self.task_list.set_source(len(self.task_repo), self.task_repo.page, reset_scroll)
     
     def render_calendar(self):
-        # 清空日历网格
-        for widget in self.calendar_grid.winfo_children():
-            widget.destroy()
-        
         year = self.current_date.year
         month = self.current_date.month
         
         # 更新日历标题
         self.calendar_title.config(text=f"{year}年{month}月")
         
-        # 添加星期标题
-        weekdays = ['日', '一', '二', '三', '四', '五', '六']
-        for i, day in enumerate(weekdays):
-            day_label = ttk.Label(self.calendar_grid, text=day, font=('Helvetica', 10, 'bold'))
-            day_label.grid(row=0, column=i, sticky=tk.NSEW, padx=2, pady=2)
-        
-        # 计算日历数据
-        first_day = datetime.datetime(year, month, 1)
-        start_date = first_day - datetime.timedelta(days=first_day.weekday())
+        # 格子的日期按月缓存，每天的任务数和番茄数来自预先维护的计数
+        cells = month_cells(year, month)
+        activity = day_activity(self.task_repo, self.stats, [date_str for _, date_str in cells])
+        today = datetime.date.today()
         
-        # 添加日期
-        for i in range(42):  # 6周 x 7天
-            current_date = start_date + datetime.timedelta(days=i)
-            row = i // 7 + 1
-            col = i % 7
-            
-            # 创建日期按钮
-            date_btn = ttk.Button(
-                self.calendar_grid, 
-                text=str(current_date.day),
-                command=lambda d=current_date: self.select_date(d)
-            )
+        for i, ((current_date, date_str), (task_count, pomodoros)) in enumerate(zip(cells, activity)):
+            self.calendar_cell_dates[i] = current_date
             
+            style = 'TButton'
             # 检查是否是今天
-            today = datetime.datetime.now()
-            if current_date.date() == today.date():
-                date_btn.config(style='Today.TButton')
+            if current_date == today:
+                style = 'Today.TButton'
+            # 按任务数和番茄数显示颜色深浅
+            level = heat_level(task_count + pomodoros)
+            if level:
+                style = f'Heat{level}.TButton'
+            # 检查是否是选中的日期
+            if self.selected_date == date_str:
+                style = 'Selected.TButton'
             
             # 检查是否是当前月份
-            if current_date.month != month:
-                date_btn.config(state=tk.DISABLED)
+            state = tk.NORMAL if current_date.month == month else tk.DISABLED
             
-            # 检查是否有任务
-            date_str = current_date.strftime("%Y-%m-%d")
-            has_task = any(task['date'] == date_str for task in self.tasks)
-            if has_task:
-                date_btn.config(style='Task.TButton')
+            # 第二行显示 任务数·番茄数，没有活动时留空以保持格子高度一致
+            text = f"{current_date.day}\n{task_count}·{pomodoros}" if level else f"{current_date.day}\n "
             
-            # 检查是否是选中的日期
-            if self.selected_date == date_str:
-                date_btn.config(style='Selected.TButton')
-            
-            date_btn.grid(row=row, column=col, sticky=tk.NSEW, padx=2, pady=2)
-        
-        # 配置网格权重
-        for i in range(7):
-            self.calendar_grid.grid_columnconfigure(i, weight=1)
-        for i in range(7):
-            self.calendar_grid.grid_rowconfigure(i, weight=1)
+            # 只更新外观发生变化的格子
+            cell_state = (text, style, state)
+            if cell_state != self.calendar_cell_state[i]:
+                self.calendar_cells[i].config(text=text, style=style, state=state)
+                self.calendar_cell_state[i] = cell_state
+        
+        if self.year_window is not None and self.year_window.winfo_viewable():
+            self.renders.invalidate('year')
+    
+    def open_year_view(self):
+        if self.year_window is None:
+            self.create_year_window()
+        
+        self.year_view_year = self.current_date.year
+        self.renders.invalidate('year')
+        self.year_window.deiconify()
+        self.year_window.lift()
+    
+    def create_year_window(self):
+        # 年视图：每列一周、每行一天的热力图。Canvas 上的方块只创建一次，之后只改颜色
+        year_window = tk.Toplevel(self.root)
+        year_window.title("年视图")
+        year_window.transient(self.root)
+        year_window.configure(bg=self.colors['background'])
+        year_window.protocol('WM_DELETE_WINDOW', year_window.withdraw)
+        self.year_window = year_window
+        
+        header = ttk.Frame(year_window, padding="10")
+        header.pack(fill=tk.X)
+        ttk.Button(header, text="←", width=3, command=lambda: self.shift_year_view(-1), style='Nav.TButton').pack(side=tk.LEFT)
+        self.year_title = ttk.Label(header, font=('Helvetica', 14, 'bold'))
+        self.year_title.pack(side=tk.LEFT, padx=10, expand=True)
+        ttk.Button(header, text="→", width=3, command=lambda: self.shift_year_view(1), style='Nav.TButton').pack(side=tk.RIGHT)
+        
+        size, gap, left, top = YEAR_CELL_SIZE, YEAR_CELL_GAP, 24, 18
+        canvas = tk.Canvas(year_window, width=left + 54 * (size + gap), height=top + 7 * (size + gap) + 4,
+                           bg=STYLE_COLORS['card_bg'], highlightthickness=0)
+        canvas.pack(padx=10, pady=(0, 5))
+        self.year_canvas = canvas
+        
+        for row, name in ((0, '一'), (2, '三'), (4, '五')):
+            canvas.create_text(left - 6, top + row * (size + gap) + size // 2, text=name, anchor=tk.E, font=('Helvetica', 8))
+        self.year_month_labels = [canvas.create_text(0, 4, anchor=tk.NW, font=('Helvetica', 8)) for _ in range(12)]
+        
+        # 53 周之外最多再跨一列，共 54 x 7 个方块；不属于当年的方块隐藏
+        self.year_rects = []
+        for column in range(54):
+            for row in range(7):
+                x, y = left + column * (size + gap), top + row * (size + gap)
+                self.year_rects.append(canvas.create_rectangle(x, y, x + size, y + size, width=0, state=tk.HIDDEN))
+        self.year_rect_state = [None] * len(self.year_rects)
+        self.year_rect_dates = {}
+        
+        canvas.tag_bind('all', '<Button-1>', self.on_year_cell_click)
+        canvas.tag_bind('all', '<Enter>', self.on_year_cell_hover)
+        
+        self.year_status = ttk.Label(year_window, padding="10")
+        self.year_status.pack(anchor=tk.W)
+    
+    def render_year_view(self):
+        year = self.year_view_year
+        self.year_title.config(text=f"{year}年")
+        
+        cells = year_cells(year)
+        activity = day_activity(self.task_repo, self.stats, [date_str for _, _, _, date_str in cells])
+        
+        new_state = [(tk.HIDDEN, '')] * len(self.year_rects)
+        self.year_rect_dates = {}
+        for (column, row, day, date_str), (task_count, pomodoros) in zip(cells, activity):
+            index = column * 7 + row
+            new_state[index] = (tk.NORMAL, HEAT_COLORS[heat_level(task_count + pomodoros)])
+            self.year_rect_dates[self.year_rects[index]] = (day, task_count, pomodoros)
+        
+        # 只更新颜色或可见性发生变化的方块
+        for index, state in enumerate(new_state):
+            if state != self.year_rect_state[index]:
+                self.year_canvas.itemconfig(self.year_rects[index], state=state[0], fill=state[1])
+                self.year_rect_state[index] = state
+        
+        size, gap, left = YEAR_CELL_SIZE, YEAR_CELL_GAP, 24
+        for month, label in enumerate(self.year_month_labels, 1):
+            column = (datetime.date(year, month, 1).timetuple().tm_yday - 1 + datetime.date(year, 1, 1).weekday()) // 7
+            self.year_canvas.coords(label, left + column * (size + gap), 4)
+            self.year_canvas.itemconfig(label, text=f"{month}月")
+    
+    def shift_year_view(self, delta):
+        self.year_view_year += delta
+        self.renders.invalidate('year')
+    
+    def year_cell_at_pointer(self):
+        current = self.year_canvas.find_withtag('current')
+        return self.year_rect_dates.get(current[0]) if current else None
+    
+    def on_year_cell_hover(self, event):
+        cell = self.year_cell_at_pointer()
+        if cell:
+            day, task_count, pomodoros = cell
+            self.year_status.config(text=f"{day.isoformat()}: {task_count} 个任务, {pomodoros} 个番茄")
+    
+    def on_year_cell_click(self, event):
+        # 点击某一天时在主窗口中跳到该月并选中这一天
+        cell = self.year_cell_at_pointer()
+        if cell:
+            day = cell[0]
+            self.current_date = datetime.datetime(day.year, day.month, 1)
+            self.select_date(day)
     
     def select_date(self, date):
         self.selected_date = date.strftime("%Y-%m-%d")
-        self.render_calendar()
-        self.render_tasks()
+        self.renders.invalidate('calendar')
+        self.renders.invalidate('tasks', reset_scroll=True)
     
     def prev_month(self):
         self.current_date = self.current_date - datetime.timedelta(days=1)
         self.current_date = datetime.datetime(self.current_date.year, self.current_date.month, 1)
-        self.render_calendar()
+        self.renders.invalidate('calendar')
+        self.prefetch_months(-1)
     
     def next_month(self):
         self.current_date = self.current_date + datetime.timedelta(days=32)
         self.current_date = datetime.datetime(self.current_date.year, self.current_date.month, 1)
-        self.render_calendar()
+        self.renders.invalidate('calendar')
+        self.prefetch_months(1)
+    
+    def prefetch_months(self, step):
+        # 日历只用每天的任务数；按需加载的仓库在后台预读当前月份和翻页方向上的下一个月，
+        # 点选日期或继续翻页时不用等待读取
+        adjacent = self.current_date + datetime.timedelta(days=32) if step > 0 else self.current_date - datetime.timedelta(days=1)
+        self.task_repo.prefetch([self.current_date.strftime("%Y-%m"), adjacent.strftime("%Y-%m")])
     
     def load_data(self):
-        if os.path.exists(self.data_file):
+        # 返回 (任务仓库, 设置, 会话统计, 搜索索引, 加载失败时的异常)；不访问界面，可以在后台线程中调用
+        load_error = None
+        try:
+            task_repo, settings = self.store.load_repository()
+        except Exception as e:
+            print(f"加载数据失败: {e}")
+            task_repo, settings = TaskRepository(), dict(DEFAULT_SETTINGS)
+            load_error = e
+        
+        # 统计从缓存读取，只补上缓存之后新增的会话
+        try:
+            stats = load_stats(self.session_log, self.store.stats_cache_file)
+        except Exception as e:
+            print(f"加载统计失败: {e}")
+            stats = StatsAggregator()
+        return task_repo, settings, stats, index_for(task_repo), load_error
+    
+    def load_data_in_background(self):
+        result = []
+        thread = threading.Thread(target=lambda: result.append(self.load_data()), name='pomodoro-load', daemon=True)
+        thread.start()
+        
+        def poll():
+            if thread.is_alive():
+                self.root.after(20, poll)
+            else:
+                self.on_data_loaded(*result[0])
+        
+        self.root.after(20, poll)
+    
+    def on_data_loaded(self, task_repo, settings, stats, search_index, load_error=None):
+        self.task_repo = task_repo
+        self.load_error = load_error
+        self.search_index = search_index
+        # 引擎持有同一个设置字典，这里原地更新
+        self.settings.clear()
+        self.settings.update(settings)
+        if not self.engine.running:
+            self.engine.refresh_duration()
+        
+        # 文件写入交给后台线程，窗口关闭前把未写入的修改全部落盘
+        self.persistence = PersistenceWorker(self.store, debounce=self.save_debounce,
+                                             on_error=lambda e: self.call_soon(self.report_save_error, e),
+                                             on_external=lambda records: self.call_soon(self.apply_external, records))
+        self.persistence.start()
+        self.process_inbox()
+        
+        # 桌面通知和提示音在后台线程中完成，提示音在这里预先生成
+        self.notifier = Notifier()
+        self.notifier.start()
+        
+        self.stats = stats
+        for session in self.pending_sessions:
+            self.record_session(session)
+        self.pending_sessions = []
+        
+        if load_error is not None:
+            # 不能用空的任务列表接管读取失败的数据文件（压缩时会覆盖全部历史）：
+            # 禁止修改任务和设置，不写入数据文件，也不监视它和开放 HTTP 接口；计时和会话记录照常
+            self.set_data_controls(tk.DISABLED)
+            self.renders.invalidate('tasks', 'calendar')
+            messagebox.showerror("加载数据失败",
+                                 f"{load_error}\n\n数据文件保持原样，本次运行不会保存任务和设置。"
+                                 "请修复或移走数据文件后重新启动。")
+            return
+        
+        # 其他进程或同步工具修改数据文件后及时读入并只重新渲染变化的部分
+        self.watcher = FileWatcher(self.store.watch_paths(), self.on_files_changed)
+        self.watcher.start()
+        
+        if self.serve_port is not None:
+            self.start_server()
+        
+        self.set_data_controls(tk.NORMAL)
+        self.renders.invalidate('tasks', 'calendar')
+        
+        self.root.update_idletasks()
+        self.mark_startup('interactive')
+    
+    def set_data_controls(self, state):
+        # 数据加载完成之前禁止修改任务和设置
+        for widget in (self.task_input, self.add_task_btn, self.complete_all_btn, self.settings_btn, self.search_entry):
+            widget.config(state=state)
+        self.file_menu.entryconfig(0, state=state)
+    
+    def mark_first_paint(self):
+        self.root.update_idletasks()
+        self.mark_startup('first_paint')
+    
+    def mark_startup(self, name):
+        if not self.startup_report or name in self.startup_marks:
+            return
+        self.startup_marks[name] = time.perf_counter() - STARTUP_TIME
+        if len(self.startup_marks) == 2:
+            # 同步加载时数据在窗口显示之前就绪，此时可交互时间等于首次绘制时间
+            first_paint = self.startup_marks['first_paint']
+            interactive = max(first_paint, self.startup_marks['interactive'])
+            print(f"启动耗时: 首次绘制 {first_paint * 1000:.1f} ms, 可交互 {interactive * 1000:.1f} ms")
+    
+    def import_tasks(self):
+        path = filedialog.askopenfilename(title="导入任务", filetypes=[("CSV / JSON Lines", "*.csv *.jsonl"), ("所有文件", "*.*")])
+        if not path:
+            return
+        
+        # 后台线程逐行解析和校验，通过有界队列分批交给界面线程，文件再大内存也有上限；
+        # 界面线程每次只加入一批，全部完成后才渲染一次、保存一次
+        self.set_data_controls(tk.DISABLED)
+        report = ImportReport()
+        batches = queue.Queue(maxsize=4)
+        failure = []
+        imported = []
+        
+        def produce():
+            try:
+                for batch in batched(read_tasks(path, report=report), IMPORT_BATCH_SIZE):
+                    batches.put(batch)
+            except (OSError, ValueError) as e:
+                failure.append(e)
+            batches.put(None)
+        
+        def consume():
+            try:
+                batch = batches.get_nowait()
+            except queue.Empty:
+                self.root.after(20, consume)
+                return
+            
+            if batch is not None:
+                self.data_generation += 1
+                added = self.task_repo.add_many(batch)
+                for task in added:
+                    self.search_index.add(task)
+                imported.extend(added)
+                report.add_batch(batch, added)
+                self.root.after(1, consume)
+                return
+            
+            self.finish_import(report, failure, imported)
+        
+        threading.Thread(target=produce, name='pomodoro-import', daemon=True).start()
+        self.root.after(20, consume)
+    
+    def finish_import(self, report, failure, imported):
+        if report.imported:
+            self.renders.invalidate('tasks', 'calendar')
+            # 追加一条包含全部新任务的记录后立即压缩；SQLite 的任务在导入时已经逐批提交
+            if not self.store.repository_commits:
+                self.save_data('add_many', tasks=[task.to_dict() for task in imported])
+                self.save_data()
+        self.set_data_controls(tk.NORMAL)
+        
+        if failure:
+            print(f"导入任务失败: {failure[0]}")
+            messagebox.showerror("导入失败", f"{failure[0]}\n\n{report.summary()}")
+        else:
+            messagebox.showinfo("导入完成", report.summary())
+    
+    def export_tasks(self, month_only=False):
+        path = filedialog.asksaveasfilename(title="导出任务", defaultextension='.csv',
+                                            filetypes=[("CSV", "*.csv"), ("JSON Lines", "*.jsonl")])
+        if not path:
+            return
+        
+        # 只导出日历当前显示的月份
+        start = end = None
+        if month_only:
+            month = self.current_date.strftime("%Y-%m")
+            start, end = f"{month}-01", f"{month}-31"
+        
+        # 逐个任务写出，不构造中间列表
+        self.root.config(cursor='watch')
+        self.root.update_idletasks()
+        try:
+            count = export_tasks(self.task_repo.iter_range(start, end), path)
+        except (OSError, ValueError) as e:
+            print(f"导出任务失败: {e}")
+            messagebox.showerror("导出失败", str(e))
+            return
+        finally:
+            self.root.config(cursor='')
+        messagebox.showinfo("导出完成", f"已导出 {count} 个任务")
+    
+    def save_data(self, op=None, **fields):
+        # 有具体修改时追加一条日志记录；不带参数或日志过长时再写入完整快照
+        # 实际的文件写入在后台线程中进行，这里只把修改放入队列
+        if self.load_error is not None:
+            return
+        self.data_generation += 1
+        self.publish('data', {'op': op or 'snapshot'})
+        if op is not None:
+            self.persistence.submit(op, **fields)
+        if op is None or self.persistence.needs_snapshot:
+            tasks = [task.to_dict() for task in self.task_repo] if self.store.snapshot_tasks else None
+            self.persistence.submit_snapshot(tasks, dict(self.settings), self.external_seq)
+    
+    def report_save_error(self, error):
+        print(f"保存数据失败: {error}")
+    
+    def call_soon(self, func, *args):
+        # 可以在任意线程中调用
+        self.inbox.put((func, args))
+    
+    def process_inbox(self):
+        while True:
+            try:
+                func, args = self.inbox.get_nowait()
+            except queue.Empty:
+                break
+            func(*args)
+        self.root.after(INBOX_INTERVAL, self.process_inbox)
+    
+    def start_server(self):
+        # 接口请求在界面线程中处理（经 call_soon 排队），事件流的分发在服务器线程中进行
+        server = ApiServer(AppApi(self), self.serve_port, dispatch=self.call_soon)
+        try:
+            server.start()
+        except OSError as e:
+            print(f"启动 HTTP 接口失败: {e}")
+            return
+        self.server = server
+        print(f"HTTP 接口: {server.url}")
+    
+    def on_files_changed(self):
+        # 在监视线程中调用：任务数据交给后台线程检查，会话日志由界面线程补上统计
+        self.persistence.submit_check()
+        self.call_soon(self.refresh_stats)
+    
+    def apply_external(self, records):
+        # 其他进程（如命令行）追加的修改：应用到任务仓库和搜索索引，只重新渲染涉及的日期
+        op = records[0]['op']
+        if op == 'reload':
+            self.reload_data(records[0])
+            return
+        if op == 'refresh':
+            # SQLite 数据库或分片清单被其他进程修改过，同样重新加载
+            self.refresh_stats()
+            self.reload_data(records[0])
+            return
+        if op == 'restore':
+            # 数据文件在运行中被删除（如误删或同步工具移走）：用内存中的数据重新写出。
+            # 磁盘上已经没有旧快照，即使存储平时自己重建快照，这次也要交给它全部任务
+            print("数据文件已被删除，按当前数据重新写入")
+            self.data_generation += 1
+            self.persistence.submit_snapshot([task.to_dict() for task in self.task_repo], dict(self.settings),
+                                             self.external_seq)
+            return
+        
+        self.data_generation += 1
+        dates = set()
+        for record in records:
+            dates |= apply_to_repository(self.task_repo, record, self.search_index)
+            if record['op'] == 'settings':
+                self.settings.clear()
+                self.settings.update(record['settings'])
+                if not self.engine.running:
+                    self.engine.refresh_duration()
+            self.external_seq = max(self.external_seq, record['seq'])
+        
+        if dates:
+            self.invalidate_dates(dates)
+        self.drop_stale_selection()
+        self.publish('data', {'op': 'external'})
+    
+    def invalidate_dates(self, dates):
+        # 只标记显示了这些日期的任务列表、日历和年视图
+        if self.search_query or not self.selected_date or self.selected_date in dates:
+            self.renders.invalidate('tasks')
+        shown = {date_str for _, date_str in month_cells(self.current_date.year, self.current_date.month)}
+        if not shown.isdisjoint(dates):
+            self.renders.invalidate('calendar')
+        elif self.year_window is not None and self.year_window.winfo_viewable():
+            year = str(self.year_view_year)
+            if any(date_str.startswith(year) for date_str in dates):
+                self.renders.invalidate('year')
+    
+    def reload_data(self, record):
+        # 其他进程压缩过数据文件，或者文件被外部替换后已与本机的修改合并：
+        # 在后台线程中等本进程的修改全部写入后重新加载（与启动时的 load_data_in_background 相同），
+        # 界面线程继续使用原来的任务仓库，加载完成后再替换
+        if record.get('conflicts'):
+            print(f"数据文件被外部修改，已合并 {record['merged']} 条本机修改，"
+                  f"{record['conflicts']} 条修改的任务已在外部删除，未能合并")
+        if self.reloading:
+            self.reload_again = True
+            return
+        self.reloading = True
+        self.reload_again = False
+        generation = self.data_generation
+        result = []
+        
+        def load():
+            self.persistence.flush()
             try:
-                with open(self.data_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    self.tasks = data.get('tasks', [])
-                    self.settings = data.get('settings', {
-                        'work_time': 1500,
-                        'short_break': 300,
-                        'long_break': 900,
-                        'reminder': 'none'
-                    })
-                    self.remaining_time = self.settings['work_time']
+                task_repo, settings = self.store.load_repository()
+                result.append((task_repo, settings, index_for(task_repo)))
             except Exception as e:
                 print(f"加载数据失败: {e}")
+        
+        thread = threading.Thread(target=load, name='pomodoro-reload', daemon=True)
+        thread.start()
+        
+        def poll():
+            if thread.is_alive():
+                self.root.after(20, poll)
+                return
+            self.reloading = False
+            if self.reload_again or self.data_generation != generation:
+                self.reload_data({})
+            elif result:
+                self.on_data_reloaded(*result[0])
+        
+        self.root.after(20, poll)
+    
+    def on_data_reloaded(self, task_repo, settings, search_index):
+        self.task_repo = task_repo
+        self.search_index = search_index
+        self.settings.clear()
+        self.settings.update(settings)
+        if not self.engine.running:
+            self.engine.refresh_duration()
+        self.external_seq = 0
+        self.drop_stale_selection()
+        self.renders.invalidate('tasks', 'calendar')
+        self.publish('data', {'op': 'external'})
+    
+    def enable_profiling(self):
+        # 给界面的热点方法和存储的写入方法换上计时版本，并开始测量事件循环的延迟
+        if self.profiler:
+            return
+        self.profiler = Profiler()
+        self.profiler.instrument(self, PROFILED_METHODS)
+        self.profiler.instrument(self.store, ('append_many', 'compact'), prefix='store.')
+        self.lag_expected = time.perf_counter_ns() + LAG_PROBE_INTERVAL * 1000000
+        self.root.after(LAG_PROBE_INTERVAL, self.probe_event_loop)
+    
+    def probe_event_loop(self):
+        # after 回调实际执行的时刻比预定时刻晚了多少，就是事件循环被阻塞的时间
+        now = time.perf_counter_ns()
+        self.profiler.record('event_loop_lag', self.lag_expected, max(0, now - self.lag_expected))
+        self.lag_expected = now + LAG_PROBE_INTERVAL * 1000000
+        self.root.after(LAG_PROBE_INTERVAL, self.probe_event_loop)
+    
+    def toggle_profile_window(self, event=None):
+        self.enable_profiling()
+        if self.profile_window is None:
+            self.create_profile_window()
+        elif self.profile_window.winfo_viewable():
+            self.profile_window.withdraw()
+            return
+        self.profile_window.deiconify()
+        self.profile_window.lift()
+        if self.profile_job is None:
+            self.render_profile()
+    
+    def create_profile_window(self):
+        # 性能浮层：各热点方法和事件循环延迟的分位数和耗时分布，打开时定期刷新
+        profile_window = tk.Toplevel(self.root)
+        profile_window.title("性能")
+        profile_window.geometry("640x300")
+        profile_window.transient(self.root)
+        profile_window.attributes('-topmost', True)
+        profile_window.protocol('WM_DELETE_WINDOW', profile_window.withdraw)
+        self.profile_window = profile_window
+        
+        self.profile_text = tk.Text(profile_window, font=('Courier', 10), wrap=tk.NONE, height=12)
+        self.profile_text.pack(fill=tk.BOTH, expand=True, padx=10, pady=(10, 5))
+        
+        button_frame = ttk.Frame(profile_window)
+        button_frame.pack(fill=tk.X, padx=10, pady=(0, 10))
+        ttk.Button(button_frame, text="导出跟踪…", command=self.export_trace).pack(side=tk.RIGHT)
+        ttk.Button(button_frame, text="清空", command=self.clear_profile).pack(side=tk.RIGHT, padx=5)
+    
+    def render_profile(self):
+        self.profile_job = None
+        if not self.profile_window.winfo_viewable():
+            return
+        self.profile_text.config(state=tk.NORMAL)
+        self.profile_text.delete('1.0', tk.END)
+        self.profile_text.insert('1.0', format_summary(self.profiler.summary()))
+        self.profile_text.config(state=tk.DISABLED)
+        self.profile_job = self.root.after(PROFILE_REFRESH_INTERVAL, self.render_profile)
+    
+    def clear_profile(self):
+        self.profiler.events.clear()
+        self.profiler.samples.clear()
     
-    def save_data(self):
+    def export_trace(self):
+        self.enable_profiling()
+        path = filedialog.asksaveasfilename(title="导出性能跟踪", defaultextension='.json',
+                                            filetypes=[("Chrome 跟踪", "*.json"), ("JSON Lines", "*.jsonl")])
+        if not path:
+            return
         try:
-            data = {
-                'tasks': self.tasks,
-                'settings': self.settings
-            }
-            with open(self.data_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            print(f"保存数据失败: {e}")
-
-if __name__ == "__main__":
-    root = tk.Tk()
+            count = self.profiler.dump(path)
+        except OSError as e:
+            print(f"导出性能跟踪失败: {e}")
+            messagebox.showerror("导出失败", str(e))
+            return
+        messagebox.showinfo("导出完成", f"已导出 {count} 个事件")
     
-    # 设置窗口图标
-    try:
-        # 尝试设置图标，即使失败也不会影响程序运行
-        pass
-    except:
-        pass
+    def save_stats_cache(self):
+        save_stats(self.stats.to_dict(), self.store.stats_cache_file)
     
-    # 创建自定义样式
-    style = ttk.Style()
+    def on_close(self):
+        if self.watcher:
+            self.watcher.stop()
+        if self.server:
+            self.server.stop()
+            self.server = None
+        if self.persistence:
+            # 排在所有会话记录之后保存统计缓存，下次启动不必重新扫描会话日志
+            self.persistence.submit_call(self.save_stats_cache)
+            self.persistence.close()
+        if self.notifier:
+            # 最多等正在播放的提示音一秒
+            self.notifier.close(timeout=1)
+        if self.trace_file:
+            try:
+                count = self.profiler.dump(self.trace_file)
+                print(f"已写入 {count} 个性能事件到 {self.trace_file}")
+            except OSError as e:
+                print(f"导出性能跟踪失败: {e}")
+        self.root.destroy()
+
+
+class AppApi:
+    # HTTP 接口的处理函数，由 ApiServer 在界面线程中调用；参数和返回值都是 JSON 可序列化的对象。
+    # 找不到任务时抛出 KeyError（404），参数错误时抛出 ValueError（400）
+    def __init__(self, app):
+        self.app = app
+
+    def get_state(self, query):
+        return self.app.timer_state()
+
+    def list_tasks(self, query):
+        app = self.app
+        offset = int(query.get('offset', 0))
+        limit = min(int(query.get('limit', API_PAGE_SIZE)), API_MAX_PAGE_SIZE)
+        if offset < 0 or limit < 0:
+            raise ValueError("offset 和 limit 不能为负数")
+        if query.get('q'):
+            tasks = (app.task_repo.get(task_id) for task_id in app.search_index.search(query['q'], limit=offset + limit))
+        elif query.get('date'):
+            tasks = app.task_repo.tasks_for_date(parse_api_date(query['date']))
+        else:
+            start = parse_api_date(query['start']) if query.get('start') else None
+            end = parse_api_date(query['end']) if query.get('end') else None
+            tasks = app.task_repo.iter_range(start, end)
+        return {'offset': offset, 'tasks': [task.to_dict() for task in itertools.islice(tasks, offset, offset + limit)]}
+
+    def create_task(self, data):
+        title = str(data.get('title', '')).strip()
+        if not title:
+            raise ValueError("任务名称不能为空")
+        date_str = parse_api_date(data['date']) if data.get('date') else datetime.date.today().isoformat()
+        return self.app.create_task(title, date_str).to_dict()
+
+    def update_task(self, task_id, data):
+        fields = {}
+        for name, value in data.items():
+            if name == 'title':
+                value = str(value).strip()
+                if not value:
+                    raise ValueError("任务名称不能为空")
+            elif name == 'date':
+                value = parse_api_date(value)
+            elif name == 'completed':
+                if not isinstance(value, bool):
+                    raise ValueError("completed 应为 true 或 false")
+            else:
+                raise ValueError(f"不能修改的字段: {name}")
+            fields[name] = value
+        if not fields:
+            raise ValueError("没有要修改的字段")
+        return self.app.update_task(task_id, **fields).to_dict()
+
+    def delete_task(self, task_id):
+        self.app.remove_task(task_id)
+
+    def get_settings(self, query):
+        return dict(self.app.settings)
+
+    def update_settings(self, data):
+        settings = {}
+        for name, value in data.items():
+            if name not in DEFAULT_SETTINGS:
+                raise ValueError(f"未知的设置项: {name}")
+            if name == 'reminder':
+                if value not in REMINDERS:
+                    raise ValueError(f"reminder 应为 {', '.join(REMINDERS)} 之一")
+            elif not isinstance(value, int) or isinstance(value, bool) or value <= 0:
+                raise ValueError(f"{name} 应为正整数（秒）")
+            settings[name] = value
+        self.app.apply_settings(settings)
+        return dict(self.app.settings)
+
+    def get_stats(self, query):
+        day = datetime.date.fromisoformat(parse_api_date(query['date'])) if query.get('date') else datetime.date.today()
+        stats = self.app.stats
+        return {'date': day.isoformat(), 'day': stats.day(day), 'week': stats.week(day), 'month': stats.month(day)}
+
+    def timer_action(self, action, data):
+        if action == 'start':
+            task_id = data.get('task_id')
+            if task_id is not None and task_id not in self.app.task_repo:
+                raise KeyError(task_id)
+            self.app.start_timer(task_id)
+        elif action == 'pause':
+            self.app.pause_timer()
+        else:
+            self.app.reset_timer()
+        return self.app.timer_state()
+
+    def timer_mode(self, data):
+        if data.get('mode') not in MODE_SETTINGS:
+            raise ValueError(f"mode 应为 {', '.join(MODE_SETTINGS)} 之一")
+        self.app.set_mode(data['mode'])
+        return self.app.timer_state()
+
+
+def parse_api_date(text):
+    try:
+        return datetime.date.fromisoformat(text).isoformat()
+    except (TypeError, ValueError):
+        raise ValueError(f"日期格式应为 YYYY-MM-DD: {text!r}")
+
+
+# 样式颜色定义
+STYLE_COLORS = {
+    'primary': '#667eea',
+    'secondary': '#764ba2',
+    'accent': '#f093fb',
+    'success': '#4CAF50',
+    'danger': '#f5576c',
+    'background': '#f5f5f5',
+    'card_bg': '#ffffff',
+    'text': '#333333',
+    'text_light': '#999999'
+}
+
+# 热力图等级 0-4 的颜色，由浅到深
+HEAT_COLORS = ('#ebedf0', '#d6dbfa', '#aab4f3', '#8491ec', STYLE_COLORS['primary'])
+
+# 导入时每批加入任务仓库的任务数
+IMPORT_BATCH_SIZE = 2000
+
+# 界面线程处理后台线程消息的间隔（毫秒）
+INBOX_INTERVAL = 100
+
+# 性能探针计时的方法、事件循环延迟的采样间隔和浮层的刷新间隔（毫秒）
+PROFILED_METHODS = ('render_calendar', 'render_tasks', 'render_year_view', 'render_stats',
+                    'save_data', 'update_timer', 'apply_external', 'refresh_stats')
+LAG_PROBE_INTERVAL = 50
+PROFILE_REFRESH_INTERVAL = 500
+
+# 提醒小窗显示的毫秒数和与窗口边缘、其他小窗的间距
+TOAST_DURATION = 6000
+TOAST_MARGIN = 12
+
+# HTTP 接口每页返回的任务数（默认和上限）以及提醒方式的可选值
+API_PAGE_SIZE = 500
+API_MAX_PAGE_SIZE = 5000
+REMINDERS = ('none', 'notification', 'sound', 'both')
+
+# 年视图方块的边长和间距（像素）
+YEAR_CELL_SIZE = 12
+YEAR_CELL_GAP = 3
+
+
+def setup_styles(root):
+    # 主窗口用到的样式；设置窗口的样式在第一次打开时才配置
+    style = ttk.Style(root)
     
     # 主题设置
     style.theme_use('clam')
     
     # 主窗口背景
-    root.configure(bg='#f5f5f5')
-    
-    # 颜色定义
-    colors = {
-        'primary': '#667eea',
-        'secondary': '#764ba2',
-        'accent': '#f093fb',
-        'success': '#4CAF50',
-        'danger': '#f5576c',
-        'background': '#f5f5f5',
-        'card_bg': '#ffffff',
-        'text': '#333333',
-        'text_light': '#999999'
-    }
+    root.configure(bg=STYLE_COLORS['background'])
     
     # 自定义样式
-    style.configure('TFrame', background=colors['background'])
-    style.configure('TLabel', background=colors['background'], font=('Helvetica', 10), foreground=colors['text'])
-    style.configure('TButton', font=('Helvetica', 10), padding=5, foreground=colors['text'])
-    style.configure('TLabelframe', background=colors['background'], font=('Helvetica', 12, 'bold'))
-    style.configure('TLabelframe.Label', background=colors['background'])
+    style.configure('TFrame', background=STYLE_COLORS['background'])
+    style.configure('TLabel', background=STYLE_COLORS['background'], font=('Helvetica', 10), foreground=STYLE_COLORS['text'])
+    style.configure('TButton', font=('Helvetica', 10), padding=5, foreground=STYLE_COLORS['text'])
+    style.configure('TLabelframe', background=STYLE_COLORS['background'], font=('Helvetica', 12, 'bold'))
+    style.configure('TLabelframe.Label', background=STYLE_COLORS['background'])
     
     # 卡片样式
     style.configure('Card.TFrame', 
-                   background=colors['card_bg'],
+                   background=STYLE_COLORS['card_bg'],
                    relief='flat',
                    padding=10)
     
     # 标题样式
     style.configure('Title.TLabel', 
                    font=('Helvetica', 16, 'bold'),
-                   background=colors['card_bg'],
-                   foreground=colors['text'])
+                   background=STYLE_COLORS['card_bg'],
+                   foreground=STYLE_COLORS['text'])
     
     # 模式按钮样式
     style.configure('Mode.TButton', 
                    font=('Helvetica', 10, 'bold'),
                    padding=10,
-                   foreground=colors['text'],
-                   background=colors['background'])
+                   foreground=STYLE_COLORS['text'],
+                   background=STYLE_COLORS['background'])
     style.map('Mode.TButton', 
-              background=[('active', colors['primary']), ('!active', colors['background'])],
-              foreground=[('active', 'white'), ('!active', colors['text'])])
+              background=[('active', STYLE_COLORS['primary']), ('!active', STYLE_COLORS['background'])],
+              foreground=[('active', 'white'), ('!active', STYLE_COLORS['text'])])
     
     # 控制按钮样式
     style.configure('Control.TButton', 
                    font=('Helvetica', 10, 'bold'),
                    padding=10,
                    foreground='white',
-                   background=colors['primary'])
+                   background=STYLE_COLORS['primary'])
     style.map('Control.TButton', 
-              background=[('active', '#5a67d8'), ('!active', colors['primary'])])
+              background=[('active', '#5a67d8'), ('!active', STYLE_COLORS['primary'])])
     
     # 设置按钮样式
     style.configure('Settings.TButton', 
                    font=('Helvetica', 10),
                    padding=8,
-                   foreground=colors['text'],
-                   background=colors['background'])
+                   foreground=STYLE_COLORS['text'],
+                   background=STYLE_COLORS['background'])
     style.map('Settings.TButton', 
-              background=[('active', colors['primary']), ('!active', colors['background'])],
-              foreground=[('active', 'white'), ('!active', colors['text'])])
+              background=[('active', STYLE_COLORS['primary']), ('!active', STYLE_COLORS['background'])],
+              foreground=[('active', 'white'), ('!active', STYLE_COLORS['text'])])
     
     # 输入框样式
     style.configure('TaskInput.TEntry', 
                    font=('Helvetica', 10),
                    padding=10,
                    relief='flat',
-                   fieldbackground=colors['background'],
-                   foreground=colors['text'])
+                   fieldbackground=STYLE_COLORS['background'],
+                   foreground=STYLE_COLORS['text'])
     
     # 添加任务按钮样式
     style.configure('AddTask.TButton', 
                    font=('Helvetica', 10, 'bold'),
                    padding=10,
                    foreground='white',
-                   background=colors['success'])
+                   background=STYLE_COLORS['success'])
     style.map('AddTask.TButton', 
-              background=[('active', '#388e3c'), ('!active', colors['success'])])
+              background=[('active', '#388e3c'), ('!active', STYLE_COLORS['success'])])
     
     # 操作按钮样式
     style.configure('Action.TButton', 
                    font=('Helvetica', 10),
                    padding=8,
                    foreground='white',
-                   background=colors['primary'])
+                   background=STYLE_COLORS['primary'])
     style.map('Action.TButton', 
-              background=[('active', '#5a67d8'), ('!active', colors['primary'])])
+              background=[('active', '#5a67d8'), ('!active', STYLE_COLORS['primary'])])
     
     # 删除按钮样式
     style.configure('Delete.TButton', 
                    font=('Helvetica', 10),
                    padding=8,
                    foreground='white',
-                   background=colors['danger'])
+                   background=STYLE_COLORS['danger'])
     style.map('Delete.TButton', 
-              background=[('active', '#d32f2f'), ('!active', colors['danger'])])
+              background=[('active', '#d32f2f'), ('!active', STYLE_COLORS['danger'])])
     
     # 导航按钮样式
     style.configure('Nav.TButton', 
                    font=('Helvetica', 10),
                    padding=8,
-                   foreground=colors['text'],
-                   background=colors['background'])
+                   foreground=STYLE_COLORS['text'],
+                   background=STYLE_COLORS['background'])
     style.map('Nav.TButton', 
-              background=[('active', colors['primary']), ('!active', colors['background'])],
-              foreground=[('active', 'white'), ('!active', colors['text'])])
+              background=[('active', STYLE_COLORS['primary']), ('!active', STYLE_COLORS['background'])],
+              foreground=[('active', 'white'), ('!active', STYLE_COLORS['text'])])
     
     # 日历标题样式
     style.configure('CalendarTitle.TLabel', 
                    font=('Helvetica', 16, 'bold'),
-                   background=colors['card_bg'],
-                   foreground=colors['text'])
-    
-    # 设置框架样式
-    style.configure('Setting.TFrame', 
-                   background=colors['card_bg'])
-    
-    # 设置标签样式
-    style.configure('Label.TLabel', 
-                   font=('Helvetica', 11),
-                   background=colors['card_bg'],
-                   foreground=colors['text'])
-    
-    # 设置输入框样式
-    style.configure('SettingEntry.TEntry', 
-                   font=('Helvetica', 10),
-                   padding=8,
-                   relief='flat',
-                   fieldbackground=colors['background'],
-                   foreground=colors['text'])
-    
-    # 设置下拉框样式
-    style.configure('SettingCombobox.TCombobox', 
-                   font=('Helvetica', 10),
-                   padding=8,
-                   relief='flat',
-                   fieldbackground=colors['background'],
-                   foreground=colors['text'])
-    
-    # 保存按钮样式
-    style.configure('Save.TButton', 
-                   font=('Helvetica', 11, 'bold'),
-                   padding=12,
-                   foreground='white',
-                   background=colors['primary'])
-    style.map('Save.TButton', 
-              background=[('active', '#5a67d8'), ('!active', colors['primary'])])
+                   background=STYLE_COLORS['card_bg'],
+                   foreground=STYLE_COLORS['text'])
     
     # 时间显示样式
     style.configure('Time.TLabel', 
                    font=('Helvetica', 48, 'bold'),
-                   background=colors['card_bg'],
-                   foreground=colors['primary'])
+                   background=STYLE_COLORS['card_bg'],
+                   foreground=STYLE_COLORS['primary'])
     
     # 今天按钮样式
     style.configure('Today.TButton', 
                    foreground='white', 
-                   background=colors['primary'], 
+                   background=STYLE_COLORS['primary'], 
                    font=('Helvetica', 10, 'bold'),
                    padding=5)
     style.map('Today.TButton', 
-              background=[('active', '#5a67d8'), ('!active', colors['primary'])])
+              background=[('active', '#5a67d8'), ('!active', STYLE_COLORS['primary'])])
     
-    # 有任务按钮样式
-    style.configure('Task.TButton', 
-                   foreground='black', 
-                   background=colors['accent'],
-                   font=('Helvetica', 10),
-                   padding=5)
-    style.map('Task.TButton', 
-              background=[('active', colors['danger']), ('!active', colors['accent'])])
+    # 有任务或番茄的日期按活动量分为 4 个颜色等级
+    for level in range(1, 5):
+        style.configure(f'Heat{level}.TButton', 
+                       foreground='white' if level >= 3 else 'black', 
+                       background=HEAT_COLORS[level],
+                       font=('Helvetica', 10),
+                       padding=5)
+        style.map(f'Heat{level}.TButton', 
+                  background=[('active', STYLE_COLORS['accent']), ('!active', HEAT_COLORS[level])])
     
     # 选中日期按钮样式
     style.configure('Selected.TButton', 
                    foreground='white', 
-                   background=colors['success'], 
+                   background=STYLE_COLORS['success'], 
                    font=('Helvetica', 10, 'bold'),
                    padding=5)
     style.map('Selected.TButton', 
-              background=[('active', '#388e3c'), ('!active', colors['success'])])
+              background=[('active', '#388e3c'), ('!active', STYLE_COLORS['success'])])
     
     # 时间显示框架样式
     style.configure('TimeDisplay.TFrame', 
-                   background=colors['card_bg'])
+                   background=STYLE_COLORS['card_bg'])
     
     # 输入框架样式
     style.configure('Input.TFrame', 
-                   background=colors['card_bg'])
+                   background=STYLE_COLORS['card_bg'])
     
     # 列表框架样式
     style.configure('List.TFrame', 
-                   background=colors['card_bg'])
+                   background=STYLE_COLORS['card_bg'])
     
     # 滚动条样式
     # 为垂直滚动条设置样式
     style.configure('Vertical.TScrollbar', 
-                   background=colors['background'],
-                   troughcolor=colors['background'],
-                   darkcolor=colors['primary'],
-                   lightcolor=colors['primary'])
+                   background=STYLE_COLORS['background'],
+                   troughcolor=STYLE_COLORS['background'],
+                   darkcolor=STYLE_COLORS['primary'],
+                   lightcolor=STYLE_COLORS['primary'])
     
     # 为水平滚动条设置样式
     style.configure('Horizontal.TScrollbar', 
-                   background=colors['background'],
-                   troughcolor=colors['background'],
-                   darkcolor=colors['primary'],
-                   lightcolor=colors['primary'])
+                   background=STYLE_COLORS['background'],
+                   troughcolor=STYLE_COLORS['background'],
+                   darkcolor=STYLE_COLORS['primary'],
+                   lightcolor=STYLE_COLORS['primary'])
     
     # 任务树样式
     style.configure('TaskTree.Treeview', 
                    font=('Helvetica', 10),
-                   background=colors['card_bg'],
-                   foreground=colors['text'])
+                   background=STYLE_COLORS['card_bg'],
+                   foreground=STYLE_COLORS['text'])
     style.configure('TaskTree.Treeview.Heading', 
                    font=('Helvetica', 10, 'bold'),
-                   background=colors['primary'],
+                   background=STYLE_COLORS['primary'],
                    foreground='white')
     
     # 日历头部样式
     style.configure('CalendarHeader.TFrame', 
-                   background=colors['card_bg'])
+                   background=STYLE_COLORS['card_bg'])
     
     # 日历网格样式
     style.configure('CalendarGrid.TFrame', 
-                   background=colors['card_bg'])
+                   background=STYLE_COLORS['card_bg'])
+
+
+def setup_dialog_styles(root):
+    style = ttk.Style(root)
+    
+    # 设置框架样式
+    style.configure('Setting.TFrame', 
+                   background=STYLE_COLORS['card_bg'])
+    
+    # 设置标签样式
+    style.configure('Label.TLabel', 
+                   font=('Helvetica', 11),
+                   background=STYLE_COLORS['card_bg'],
+                   foreground=STYLE_COLORS['text'])
+    
+    # 设置输入框样式
+    style.configure('SettingEntry.TEntry', 
+                   font=('Helvetica', 10),
+                   padding=8,
+                   relief='flat',
+                   fieldbackground=STYLE_COLORS['background'],
+                   foreground=STYLE_COLORS['text'])
+    
+    # 设置下拉框样式
+    style.configure('SettingCombobox.TCombobox', 
+                   font=('Helvetica', 10),
+                   padding=8,
+                   relief='flat',
+                   fieldbackground=STYLE_COLORS['background'],
+                   foreground=STYLE_COLORS['text'])
+    
+    # 保存按钮样式
+    style.configure('Save.TButton', 
+                   font=('Helvetica', 11, 'bold'),
+                   padding=12,
+                   foreground='white',
+                   background=STYLE_COLORS['primary'])
+    style.map('Save.TButton', 
+              background=[('active', '#5a67d8'), ('!active', STYLE_COLORS['primary'])])
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="番茄钟")
+    parser.add_argument('--fast-start', action='store_true', help="先显示计时器，在后台加载数据文件")
+    parser.add_argument('--startup-report', action='store_true', help="输出首次绘制和可交互的耗时")
+    parser.add_argument('--backend', choices=BACKENDS, default='json', help="数据存储方式")
+    parser.add_argument('--data-file', help="数据文件路径，默认为 pomodoro_data.json 或 pomodoro_data.db")
+    parser.add_argument('--profile', action='store_true', help="启用性能探针（F12 显示浮层）")
+    parser.add_argument('--trace', metavar='FILE',
+                        help="启用性能探针，退出时写入跟踪文件（.json 为 Chrome 跟踪格式，否则为 JSON Lines）")
+    parser.add_argument('--serve', type=int, metavar='PORT',
+                        help="在本机地址的该端口提供 HTTP 接口和网页版（0 表示任选空闲端口）")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    root = tk.Tk()
+    
+    # 设置窗口图标
+    try:
+        # 尝试设置图标，即使失败也不会影响程序运行
+        pass
+    except:
+        pass
+    
+    # 创建自定义样式
+    setup_styles(root)
     
-    app = PomodoroApp(root)
+    app = PomodoroApp(root, fast_start=args.fast_start, startup_report=args.startup_report,
+                      backend=args.backend, data_file=args.data_file, serve_port=args.serve,
+                      profile=args.profile, trace_file=args.trace)
     root.mainloop()
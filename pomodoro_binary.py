@@ -0,0 +1,451 @@
+import argparse
+import array
+import bisect
+import collections
+import json
+import mmap
+import os
+import struct
+import sys
+import uuid
+
+from pomodoro_storage import JournalStore, DEFAULT_SETTINGS, apply_to_repository
+from pomodoro_tasks import Task, set_fields
+
+MAGIC = b'PMDB'
+FORMAT_VERSION = 1
+# 文件头：魔数、格式版本、任务数、journal_seq、快照版本，
+# 以及设置（JSON）、记录、日期索引、id 索引、字符串表在文件中的位置。整数都是小端序
+HEADER = struct.Struct('<4sIIQ32sIIIII')
+# 每个任务一条定长记录，6 个 32 位整数：
+# 日期 YYYYMMDD、id 在字符串表中的位置和长度、名称的位置和长度、标志位
+RECORD_FIELDS = 6
+FLAG_COMPLETED = 1
+
+
+def date_key(date_str):
+    return int(date_str[:4]) * 10000 + int(date_str[5:7]) * 100 + int(date_str[8:10])
+
+
+def _u32_bytes(values):
+    values = array.array('I', values)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values.tobytes()
+
+
+def _u32_view(buffer, offset, count):
+    # 小端机器上直接把映射的内存看作整数数组，不复制
+    view = memoryview(buffer)[offset:offset + 4 * count]
+    if sys.byteorder == 'little':
+        return view.cast('I')
+    values = array.array('I', view.tobytes())
+    values.byteswap()
+    return values
+
+
+def encode_snapshot(tasks, settings, journal_seq=0, version=None):
+    # tasks 为数据文件格式的字典，返回快照的字节内容
+    records = array.array('I')
+    strings = bytearray()
+    keys = []
+    ids = []
+    for data in tasks:
+        task = Task.from_dict(data)
+        id_bytes = task.id.encode('utf-8')
+        title_bytes = task.title.encode('utf-8')
+        key = date_key(task.date)
+        records.extend((key, len(strings), len(id_bytes), len(strings) + len(id_bytes), len(title_bytes),
+                        FLAG_COMPLETED if task.completed else 0))
+        strings += id_bytes
+        strings += title_bytes
+        keys.append(key)
+        ids.append(id_bytes)
+
+    count = len(keys)
+    # 排序是稳定的，同一天的任务保持添加顺序
+    date_index = sorted(range(count), key=keys.__getitem__)
+    id_index = sorted(range(count), key=ids.__getitem__)
+    settings_bytes = json.dumps(settings, ensure_ascii=False).encode('utf-8')
+    # 用空格补齐到 4 字节边界，JSON 允许末尾的空白
+    settings_bytes += b' ' * (-len(settings_bytes) % 4)
+
+    settings_offset = HEADER.size
+    records_offset = settings_offset + len(settings_bytes)
+    date_offset = records_offset + 4 * len(records)
+    id_offset = date_offset + 4 * count
+    strings_offset = id_offset + 4 * count
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, count, journal_seq, (version or uuid.uuid4().hex).encode('ascii'),
+                         settings_offset, records_offset, date_offset, id_offset, strings_offset)
+    return b''.join((header, settings_bytes, _u32_bytes(records), _u32_bytes(date_index), _u32_bytes(id_index),
+                     bytes(strings)))
+
+
+def write_snapshot(path, tasks, settings, journal_seq=0, version=None):
+    # 先写临时文件再原子替换
+    content = encode_snapshot(tasks, settings, journal_seq, version)
+    tmp_file = path + '.tmp'
+    with open(tmp_file, 'wb') as f:
+        f.write(content)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, path)
+
+
+def open_snapshot(path):
+    with open(path, 'rb') as f:
+        if os.name == 'nt':
+            # Windows 上被映射的文件不能被替换，压缩时会失败，因此整个读入内存
+            return Snapshot(f.read())
+        return Snapshot(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+
+class Snapshot:
+    # 二进制快照的只读视图：记录和索引直接在映射的内存上访问，任务只在取用时解码
+    def __init__(self, buffer):
+        (magic, format_version, self.count, self.journal_seq, version, settings_offset, records_offset,
+         date_offset, id_offset, strings_offset) = HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC or format_version != FORMAT_VERSION:
+            raise ValueError("不是可以读取的二进制快照")
+        self.version = version.decode('ascii')
+        self.settings = json.loads(bytes(buffer[settings_offset:records_offset]))
+        self.records = _u32_view(buffer, records_offset, self.count * RECORD_FIELDS)
+        self.date_index = _u32_view(buffer, date_offset, self.count)
+        self.id_index = _u32_view(buffer, id_offset, self.count)
+        self.strings = memoryview(buffer)[strings_offset:]
+        # 日期整数 -> 日期字符串，同一天的任务共用一个字符串
+        self._dates = {}
+
+    def date(self, i):
+        key = self.records[i * RECORD_FIELDS]
+        date_str = self._dates.get(key)
+        if date_str is None:
+            date_str = self._dates[key] = sys.intern(f"{key // 10000:04d}-{key // 100 % 100:02d}-{key % 100:02d}")
+        return date_str
+
+    def task_id(self, i):
+        base = i * RECORD_FIELDS
+        start = self.records[base + 1]
+        return str(self.strings[start:start + self.records[base + 2]], 'utf-8')
+
+    def task(self, i):
+        base = i * RECORD_FIELDS
+        start, length = self.records[base + 3], self.records[base + 4]
+        return Task(str(self.strings[start:start + length], 'utf-8'), self.date(i),
+                    bool(self.records[base + 5] & FLAG_COMPLETED), self.task_id(i))
+
+    def find(self, task_id):
+        # 在 id 索引上二分查找，返回记录号，找不到时返回 None
+        target = task_id.encode('utf-8')
+        records, id_index, strings = self.records, self.id_index, self.strings
+
+        def id_at(k):
+            base = id_index[k] * RECORD_FIELDS
+            start = records[base + 1]
+            return bytes(strings[start:start + records[base + 2]])
+
+        k = bisect.bisect_left(range(self.count), target, key=id_at)
+        if k < self.count and id_at(k) == target:
+            return self.id_index[k]
+        return None
+
+    def date_range(self, start_key, end_key):
+        # 日期键在 [start_key, end_key) 内的记录号，按日期排列
+        records, date_index = self.records, self.date_index
+
+        def key_at(k):
+            return records[date_index[k] * RECORD_FIELDS]
+
+        lo = bisect.bisect_left(range(self.count), start_key, key=key_at)
+        hi = bisect.bisect_left(range(lo, self.count), end_key, key=key_at) + lo
+        return date_index[lo:hi]
+
+    def to_dicts(self):
+        return [self.task(i).to_dict() for i in range(self.count)]
+
+
+def empty_snapshot():
+    return Snapshot(encode_snapshot([], DEFAULT_SETTINGS, version='0' * 32))
+
+
+class MappedTaskRepository:
+    # 与 TaskRepository 接口相同、建立在二进制快照上的任务仓库：
+    # 快照中的任务只在查询到时才解码成 Task，按日期和 id 的查询在快照的索引上二分查找；
+    # 加载之后的修改（包括重放的日志）保存在内存中的覆盖层里，压缩时连同快照一起写成新的快照。
+    loads_on_demand = True
+
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+        # 快照中被修改过的任务的当前状态，以及被删除的任务（id -> 快照中的日期）
+        self._edited = {}
+        self._removed = {}
+        # 新增的任务，保持添加顺序
+        self._new = {}
+        # 日期 -> {id: 任务}：新增的任务，以及日期被改过的快照任务，按当前日期索引
+        self._extra = {}
+        # 快照中被修改过的任务原来的日期
+        self._base_dates = {}
+        # 月份 -> {日期: 任务数}，修改时按月失效
+        self._day_counts = {}
+        # 删除过快照中的任务后，分页用的未删除记录号；再次删除时置空
+        self._order = None
+
+    def __len__(self):
+        return self.snapshot.count - len(self._removed) + len(self._new)
+
+    def __iter__(self):
+        return self.iter_range()
+
+    def __contains__(self, task_id):
+        if task_id in self._new or task_id in self._edited:
+            return True
+        return task_id not in self._removed and self.snapshot.find(task_id) is not None
+
+    def _base_task(self, i):
+        # 快照中第 i 条记录的当前状态，已删除时返回 None；没有修改过快照任务时不必解码 id
+        if not self._edited and not self._removed:
+            return self.snapshot.task(i)
+        task_id = self.snapshot.task_id(i)
+        if task_id in self._removed:
+            return None
+        task = self._edited.get(task_id)
+        return task if task is not None else self.snapshot.task(i)
+
+    def get(self, task_id):
+        task = self._new.get(task_id) or self._edited.get(task_id)
+        if task is None and task_id not in self._removed:
+            i = self.snapshot.find(task_id)
+            if i is not None:
+                task = self.snapshot.task(i)
+        if task is None:
+            raise KeyError(task_id)
+        return task
+
+    def _unplace(self, task):
+        day = self._extra.get(task.date)
+        if day is not None and day.pop(task.id, None) is not None and not day:
+            del self._extra[task.date]
+
+    def _place(self, task):
+        # 新任务和不在快照原日期上的任务放进 _extra；快照任务改回原日期后回到快照中的位置
+        if self._base_dates.get(task.id) != task.date:
+            self._extra.setdefault(task.date, {})[task.id] = task
+        self._day_counts.pop(task.date[:7], None)
+
+    def add(self, task):
+        self._new[task.id] = task
+        self._place(task)
+        return task
+
+    def add_many(self, tasks):
+        # 批量添加，跳过 id 已存在的任务，返回实际添加的任务
+        added = []
+        for task in tasks:
+            if task.id not in self:
+                self.add(task)
+                added.append(task)
+        return added
+
+    def update(self, task_id, **fields):
+        task = self.get(task_id)
+        if task_id not in self._new and task_id not in self._edited:
+            self._edited[task_id] = task
+            self._base_dates[task_id] = task.date
+        self._unplace(task)
+        self._day_counts.pop(task.date[:7], None)
+        set_fields(task, fields)
+        self._place(task)
+        return task
+
+    def remove(self, task_id):
+        task = self.get(task_id)
+        self._unplace(task)
+        self._day_counts.pop(task.date[:7], None)
+        if self._new.pop(task_id, None) is None:
+            self._edited.pop(task_id, None)
+            self._removed[task_id] = self._base_dates.pop(task_id, task.date)
+            self._order = None
+        return task
+
+    def page(self, offset, limit):
+        # 先按快照中的顺序，再接新增的任务
+        result = []
+        if self._removed:
+            if self._order is None:
+                removed = {self.snapshot.find(task_id) for task_id in self._removed}
+                self._order = array.array('I', (i for i in range(self.snapshot.count) if i not in removed))
+            base = self._order[offset:offset + limit]
+            result.extend(self._base_task(i) for i in base)
+            base_count = len(self._order)
+        else:
+            base_count = self.snapshot.count
+            result.extend(self._base_task(i) for i in range(min(offset, base_count), min(offset + limit, base_count)))
+        if len(result) < limit:
+            start = max(0, offset - base_count)
+            result.extend(list(self._new.values())[start:start + limit - len(result)])
+        return result
+
+    def iter_range(self, start=None, end=None):
+        # 按添加顺序产出日期在 [start, end] 内的任务，先比较记录中的日期，只解码范围内的任务
+        start_key = date_key(start) if start else 0
+        end_key = date_key(end) if end else 99999999
+        records = self.snapshot.records
+        for i in range(self.snapshot.count):
+            if start_key <= records[i * RECORD_FIELDS] <= end_key or self._edited:
+                task = self._base_task(i)
+                if task is not None and (start is None or task.date >= start) and (end is None or task.date <= end):
+                    yield task
+        for task in list(self._new.values()):
+            if (start is None or task.date >= start) and (end is None or task.date <= end):
+                yield task
+
+    def tasks_for_date(self, date_str):
+        # 快照中这一天的任务保持原来的顺序，之后是移到这一天的和新增的任务
+        key = date_key(date_str)
+        tasks = []
+        for i in self.snapshot.date_range(key, key + 1):
+            task = self._base_task(i)
+            if task is not None and task.date == date_str:
+                tasks.append(task)
+        tasks.extend(self._extra.get(date_str, {}).values())
+        return tasks
+
+    def has_tasks(self, date_str):
+        return date_str in self.day_counts(int(date_str[:4]), int(date_str[5:7]))
+
+    def month_count(self, year, month):
+        return sum(self.day_counts(year, month).values())
+
+    def day_counts(self, year, month):
+        # 快照部分用日期索引上的一段计数，再扣除删除和移走的任务、加上覆盖层中的任务；调用方只读
+        month_str = f"{year:04d}-{month:02d}"
+        counts = self._day_counts.get(month_str)
+        if counts is None:
+            start_key = year * 10000 + month * 100
+            snapshot = self.snapshot
+            counter = collections.Counter(snapshot.date(i) for i in snapshot.date_range(start_key, start_key + 100))
+            for date in self._removed.values():
+                if date.startswith(month_str):
+                    counter[date] -= 1
+            for task_id, task in self._edited.items():
+                if task.date != self._base_dates[task_id] and self._base_dates[task_id].startswith(month_str):
+                    counter[self._base_dates[task_id]] -= 1
+            for date, day in self._extra.items():
+                if date.startswith(month_str):
+                    counter[date] += len(day)
+            counts = self._day_counts[month_str] = {date: count for date, count in sorted(counter.items()) if count > 0}
+        return counts
+
+    def prefetch(self, months):
+        # 按日期的查询直接在映射的快照上进行，不需要预读
+        pass
+
+
+class BinaryStore(JournalStore):
+    # 快照为二进制格式的 JournalStore：日志、锁、多进程同步和合并都与 JSON 数据文件相同，
+    # 只是快照换成定长记录 + 字符串表，启动时映射到内存，不解析、不解码全部任务。
+    # JSON 仍用于导入导出和与其他版本交换数据（见 main() 中的转换命令）。
+    # 压缩时界面不提交任务（把映射的任务全部转成字典会解码整个快照），
+    # 由后台持久化线程用旧快照加上日志中的记录重建（见 compact）
+    snapshot_tasks = False
+
+    def __init__(self, data_file, import_from=None, compact_threshold=500):
+        super().__init__(data_file, compact_threshold)
+        self.import_from = import_from
+
+    def _read_snapshot(self):
+        if not os.path.exists(self.data_file):
+            return None
+        snapshot = open_snapshot(self.data_file)
+        return {'version': snapshot.version, 'tasks': snapshot.to_dicts(), 'settings': snapshot.settings,
+                'journal_seq': snapshot.journal_seq}
+
+    def _snapshot_seq(self):
+        # 只读文件头
+        if not os.path.exists(self.data_file):
+            return 0
+        with open(self.data_file, 'rb') as f:
+            return HEADER.unpack(f.read(HEADER.size))[3]
+
+    def _write_snapshot(self, data):
+        write_snapshot(self.data_file, data['tasks'], data['settings'], data['journal_seq'], data['version'])
+
+    def compact(self, tasks, settings, external_seq=None):
+        # tasks 为 None 时在调用线程中重建：调用方的修改已经先于压缩追加到日志中，
+        # 其他进程的记录也在日志里，旧快照加上日志中快照之后的记录就是当前的全部数据
+        if tasks is not None:
+            return super().compact(tasks, settings, external_seq)
+        with self.lock:
+            self._sync()
+            if self.reload_needed:
+                return False
+            unseen = self.unseen
+            result = self._replay()
+            if result is None:
+                tasks, settings, _ = self._read()
+                self._compact(tasks.values(), settings)
+            else:
+                task_repo, settings = result
+                self._compact((task.to_dict() for task in task_repo), settings)
+            # 还没有交给调用方的记录已经写进快照，仍要交给它
+            self.unseen = unseen
+        return True
+
+    def _replay(self):
+        # 调用方持有锁；映射快照并在覆盖层上重放日志，返回 (任务仓库, 设置)，
+        # 日志中有需要迁移的旧记录时返回 None
+        snapshot = open_snapshot(self.data_file) if os.path.exists(self.data_file) else empty_snapshot()
+        records = self._replay_records(snapshot.journal_seq)
+        if any('index' in record or ('task' in record and 'id' not in record['task']) for record in records):
+            return None
+        self.version = snapshot.version if os.path.exists(self.data_file) else None
+        task_repo = MappedTaskRepository(snapshot)
+        settings = dict(DEFAULT_SETTINGS)
+        settings.update(snapshot.settings)
+        for record in records:
+            apply_to_repository(task_repo, record)
+            if record['op'] == 'settings':
+                settings = dict(record['settings'])
+        return task_repo, settings
+
+    def load_repository(self):
+        # 快照不存在而旧的 JSON 数据文件存在时，自动转换一次
+        with self.lock:
+            if not os.path.exists(self.data_file) and self.import_from and os.path.exists(self.import_from):
+                tasks, settings = JournalStore(self.import_from).load()
+                write_snapshot(self.data_file, tasks, settings)
+            result = self._replay()
+            if result is None:
+                # 旧版本的日志记录需要迁移，按 JSON 快照的方式完整加载一次
+                return super().load_repository()
+        return result
+
+
+def to_binary(json_file, binary_file):
+    # JSON 数据文件（及其日志）-> 二进制快照，返回任务数
+    tasks, settings = JournalStore(json_file).load()
+    write_snapshot(binary_file, tasks, settings)
+    return len(tasks)
+
+
+def to_json(binary_file, json_file):
+    # 二进制快照（及其日志）-> JSON 数据文件，返回任务数
+    tasks, settings = BinaryStore(binary_file).load()
+    store = JournalStore(json_file)
+    store.compact(tasks, settings)
+    return len(tasks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="在 JSON 数据文件和二进制快照之间转换")
+    parser.add_argument('direction', choices=('to-binary', 'to-json'))
+    parser.add_argument('source')
+    parser.add_argument('target')
+    args = parser.parse_args()
+    convert = to_binary if args.direction == 'to-binary' else to_json
+    count = convert(args.source, args.target)
+    print(f"已转换 {count} 个任务到 {args.target}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+import bisect
+import datetime
+import functools
+
+# 热力图颜色等级的下限：0 表示没有活动，1-4 为由浅到深
+HEAT_THRESHOLDS = (0, 1, 3, 6, 10)
+
+
+def heat_level(count):
+    return bisect.bisect_right(HEAT_THRESHOLDS, count) - 1
+
+
+@functools.lru_cache(maxsize=64)
+def month_cells(year, month):
+    # 月视图的 42 个格子 (date, 'YYYY-MM-DD')，从该月第一天所在的周一开始；按月缓存
+    first_day = datetime.date(year, month, 1)
+    start_date = first_day - datetime.timedelta(days=first_day.weekday())
+    cells = []
+    for i in range(42):
+        day = start_date + datetime.timedelta(days=i)
+        cells.append((day, day.isoformat()))
+    return tuple(cells)
+
+
+@functools.lru_cache(maxsize=8)
+def year_cells(year):
+    # 年视图的格子 (列, 行, date, 'YYYY-MM-DD')：每列一周，每行是周一到周日
+    first_day = datetime.date(year, 1, 1)
+    offset = first_day.weekday()
+    cells = []
+    day = first_day
+    while day.year == year:
+        index = (day - first_day).days + offset
+        cells.append((index // 7, index % 7, day, day.isoformat()))
+        day += datetime.timedelta(days=1)
+    return tuple(cells)
+
+
+def day_activity(task_repo, stats, dates):
+    # 每个日期的 (任务数, 完成的番茄数)。任务数取自仓库按月维护的计数，
+    # 番茄数取自会话统计的按天汇总，都是字典查找，不扫描历史数据
+    daily = stats.daily if stats is not None else {}
+    month_counts = {}
+    result = []
+    for date_str in dates:
+        month = date_str[:7]
+        counts = month_counts.get(month)
+        if counts is None:
+            counts = month_counts[month] = task_repo.day_counts(int(month[:4]), int(month[5:7]))
+        totals = daily.get(date_str)
+        result.append((counts.get(date_str, 0), totals['pomodoros'] if totals else 0))
+    return result
@@ -0,0 +1,171 @@
+import argparse
+import datetime
+import sys
+import time
+
+from pomodoro_engine import MODE_SETTINGS, PomodoroEngine
+from pomodoro_storage import BACKENDS, open_store
+from pomodoro_tasks import Task
+
+# 列表中显示的任务 id 长度，done 命令接受任意长度的唯一前缀
+SHORT_ID = 8
+
+
+def parse_date(text):
+    try:
+        return datetime.date.fromisoformat(text).isoformat()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"日期格式应为 YYYY-MM-DD: {text!r}")
+
+
+def find_task(task_repo, prefix):
+    # 按完整 id 或唯一的 id 前缀查找任务，找不到或有歧义时抛出 ValueError
+    if prefix in task_repo:
+        return task_repo.get(prefix)
+    matches = [task for task in task_repo if task.id.startswith(prefix)]
+    if not matches:
+        raise ValueError(f"没有 id 以 {prefix} 开头的任务")
+    if len(matches) > 1:
+        raise ValueError(f"id 前缀 {prefix} 对应 {len(matches)} 个任务，请输入更长的前缀")
+    return matches[0]
+
+
+def format_task(task):
+    return f"{task.id[:SHORT_ID]}  [{'x' if task.completed else ' '}] {task.title}"
+
+
+def cmd_add(store, args):
+    task = Task(args.name, args.date)
+    # 只需追加一条日志记录，不必读取全部任务；SQLite 的任务由仓库直接提交
+    if store.repository_commits:
+        task_repo, _ = store.load_repository()
+        task_repo.add(task)
+    store.append('add', task=task.to_dict())
+    print(f"已添加任务 {format_task(task)}  ({task.date})")
+
+
+def cmd_list(store, args):
+    task_repo, _ = store.load_repository()
+    tasks = task_repo.tasks_for_date(args.date)
+    if not tasks:
+        print(f"{args.date} 没有任务")
+        return
+    print(f"{args.date} 的任务:")
+    for task in tasks:
+        print(f"  {format_task(task)}")
+
+
+def cmd_done(store, args):
+    # 读取、修改和追加记录都在锁内完成，其他进程不能在这中间删除这个任务
+    with store.lock:
+        task_repo, _ = store.load_repository()
+        task = find_task(task_repo, args.id)
+        task = task_repo.update(task.id, completed=not args.undo)
+        store.append('complete', id=task.id, completed=task.completed)
+    print(f"{'已完成' if task.completed else '未完成'}: {format_task(task)}")
+
+
+def cmd_start(store, args):
+    task_repo, settings = store.load_repository()
+    if args.minutes:
+        settings = dict(settings)
+        settings[MODE_SETTINGS[args.mode]] = int(args.minutes * 60)
+    engine = PomodoroEngine(settings)
+    engine.set_mode(args.mode)
+    if args.task:
+        task = find_task(task_repo, args.task)
+        engine.task_id = task.id
+        print(f"任务: {task.title}")
+
+    session_log = store.open_session_log()
+    sessions = []
+    engine.on('session', sessions.append)
+    engine.on('tick', lambda remaining: show_remaining(engine, args.mode, remaining))
+
+    # 单调时钟计时，只运行一个阶段；按 Ctrl-C 提前结束并记为中断
+    engine.start()
+    try:
+        while True:
+            delay = engine.tick()
+            if delay is None:
+                break
+            time.sleep(delay)
+    except KeyboardInterrupt:
+        engine.set_mode(args.mode)
+    print()
+
+    for session in sessions:
+        session_log.append(session)
+    if sessions and sessions[0]['completed']:
+        print(f"\a{MODE_NAMES[args.mode]}结束！")
+    else:
+        print("已中断，记为未完成")
+
+
+def show_remaining(engine, mode, remaining):
+    # 阶段结束或中断后引擎会重置倒计时，不再显示
+    if engine.running:
+        print(f"\r{MODE_NAMES[mode]} {remaining // 60:02d}:{remaining % 60:02d}", end='', flush=True)
+
+
+def cmd_stats(store, args):
+    from pomodoro_sessions import load_stats, report
+
+    stats = load_stats(store.open_session_log(), store.stats_cache_file)
+    print(report(stats))
+
+
+MODE_NAMES = {
+    'work': '工作',
+    'short-break': '短休息',
+    'long-break': '长休息'
+}
+
+COMMANDS = {
+    'add': cmd_add,
+    'list': cmd_list,
+    'done': cmd_done,
+    'start': cmd_start,
+    'stats': cmd_stats
+}
+
+
+def parse_args(argv=None):
+    today = datetime.date.today().isoformat()
+    parser = argparse.ArgumentParser(description="番茄钟命令行：不启动图形界面管理任务和计时，可以与界面同时使用")
+    parser.add_argument('--backend', choices=BACKENDS, default='json')
+    parser.add_argument('--data-file')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    add_parser = subparsers.add_parser('add', help="添加任务")
+    add_parser.add_argument('name')
+    add_parser.add_argument('--date', type=parse_date, default=today, help="任务日期 YYYY-MM-DD，默认为今天")
+
+    list_parser = subparsers.add_parser('list', help="列出某天的任务")
+    list_parser.add_argument('--date', type=parse_date, default=today, help="日期 YYYY-MM-DD，默认为今天")
+
+    done_parser = subparsers.add_parser('done', help="把任务标记为完成")
+    done_parser.add_argument('id', help="任务 id 或其唯一前缀（list 显示前 8 位）")
+    done_parser.add_argument('--undo', action='store_true', help="改回未完成")
+
+    start_parser = subparsers.add_parser('start', help="在终端中开始一个计时阶段")
+    start_parser.add_argument('--mode', choices=MODE_SETTINGS, default='work')
+    start_parser.add_argument('--minutes', type=float, help="本次时长（分钟），默认使用设置中的时长")
+    start_parser.add_argument('--task', help="关联的任务 id 或其唯一前缀")
+
+    subparsers.add_parser('stats', help="显示会话统计")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    store = open_store(args.backend, args.data_file)
+    try:
+        COMMANDS[args.command](store, args)
+    except (OSError, ValueError) as e:
+        print(f"执行 {args.command} 失败: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+import math
+import time
+
+
+class FakeClock:
+    # 可手动拨动的时钟，用于测试和模拟；调用方式与 time.monotonic 相同
+    def __init__(self, start=0.0):
+        self.now = start
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+class Countdown:
+    # 基于单调时钟截止时间的倒计时：
+    # 运行时只记录截止时间，剩余时间每次都由 deadline - clock() 算出，
+    # 回调延迟不会累积；暂停时把剩余时间保存下来，继续时重新计算截止时间。
+    def __init__(self, duration, clock=time.monotonic):
+        self.clock = clock
+        self.deadline = None
+        self._remaining = float(duration)
+
+    @property
+    def running(self):
+        return self.deadline is not None
+
+    def start(self):
+        if self.deadline is None:
+            self.deadline = self.clock() + self._remaining
+
+    def pause(self):
+        if self.deadline is not None:
+            self._remaining = max(0.0, self.deadline - self.clock())
+            self.deadline = None
+
+    def reset(self, duration):
+        self._remaining = float(duration)
+        if self.deadline is not None:
+            self.deadline = self.clock() + self._remaining
+
+    def remaining(self):
+        if self.deadline is None:
+            return self._remaining
+        return max(0.0, self.deadline - self.clock())
+
+    def remaining_seconds(self):
+        # 显示用的整秒数：向上取整，开始时显示 25:00 而不是 24:59
+        return math.ceil(self.remaining())
+
+    def finished(self):
+        return self.remaining() <= 0
+
+    def next_tick_delay(self):
+        # 距离下一个整秒边界的时间，使每次刷新都落在显示值变化的时刻
+        remaining = self.remaining()
+        delay = remaining - math.floor(remaining)
+        return delay if delay > 0 else 1.0
+
+
+# 模式与设置项的对应关系
+MODE_SETTINGS = {
+    'work': 'work_time',
+    'short-break': 'short_break',
+    'long-break': 'long_break'
+}
+
+
+class PomodoroEngine:
+    # 不依赖 Tkinter 的番茄钟核心：保存模式和倒计时，通过事件通知界面。
+    # 事件：tick(剩余秒数)、phase_end(结束的模式)、mode_change(新模式)、
+    # session(会话记录：阶段完成或被中途切换模式、重置时产生)。
+    # 宿主负责定时调用 tick()，其返回值是距离下一次调用的秒数；
+    # 使用 FakeClock 时可以用 advance() 一次性拨过任意长的时间。
+    def __init__(self, settings, clock=time.monotonic, wall_clock=time.time):
+        self.settings = settings
+        self.clock = clock
+        self.wall_clock = wall_clock
+        self.mode = 'work'
+        self.countdown = Countdown(self.duration(self.mode), clock=clock)
+        # 当前阶段关联的任务 id，由宿主在开始计时前设置
+        self.task_id = None
+        self._phase_start = None
+        self._phase_length = self.duration(self.mode)
+        self._listeners = {'tick': [], 'phase_end': [], 'mode_change': [], 'session': []}
+
+    def on(self, event, callback):
+        self._listeners[event].append(callback)
+
+    def _emit(self, event, *args):
+        for callback in self._listeners[event]:
+            callback(*args)
+
+    def duration(self, mode):
+        return self.settings[MODE_SETTINGS[mode]]
+
+    @property
+    def running(self):
+        return self.countdown.running
+
+    def remaining_seconds(self):
+        return self.countdown.remaining_seconds()
+
+    def start(self):
+        if self._phase_start is None:
+            self._phase_start = self.wall_clock()
+        self.countdown.start()
+
+    def pause(self):
+        self.countdown.pause()
+
+    def set_mode(self, mode):
+        # 已经开始的阶段被切换或重置时记为中断
+        if self._phase_start is not None:
+            self._record_session(completed=False)
+        self.mode = mode
+        self._phase_length = self.duration(mode)
+        self.countdown.reset(self._phase_length)
+        self._emit('mode_change', mode)
+        self._emit('tick', self.remaining_seconds())
+
+    def refresh_duration(self):
+        # 设置修改后按当前模式的新时长重新开始倒计时
+        self._phase_length = self.duration(self.mode)
+        self.countdown.reset(self._phase_length)
+        self._emit('tick', self.remaining_seconds())
+
+    def next_mode(self):
+        return 'short-break' if self.mode == 'work' else 'work'
+
+    def tick(self):
+        self._emit('tick', self.remaining_seconds())
+        if self.countdown.finished():
+            self._finish_phase()
+            return None
+        return self.countdown.next_tick_delay()
+
+    def _finish_phase(self):
+        ended = self.mode
+        self.countdown.pause()
+        self._record_session(completed=True)
+        self._emit('phase_end', ended)
+        self.set_mode(self.next_mode())
+
+    def _record_session(self, completed):
+        session = {
+            'start': self._phase_start,
+            'end': self.wall_clock(),
+            'elapsed': self._phase_length - self.countdown.remaining(),
+            'mode': self.mode,
+            'completed': completed,
+            'task_id': self.task_id
+        }
+        self._phase_start = None
+        self._emit('session', session)
+
+    def advance(self, seconds, auto_continue=True):
+        # 只用于 FakeClock：直接跳到每个阶段的结束时刻，不逐秒触发 tick。
+        # auto_continue 为 True 时阶段结束后立即开始下一阶段，用于批量模拟。
+        while seconds > 0 and self.running:
+            remaining = self.countdown.remaining()
+            if seconds < remaining:
+                break
+            # 直接落在截止时刻，避免浮点累加误差
+            self.clock.now = self.countdown.deadline
+            seconds -= remaining
+            self._finish_phase()
+            if auto_continue:
+                self.start()
+        if seconds > 0:
+            self.clock.advance(seconds)
@@ -0,0 +1,70 @@
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    try:
+        import msvcrt
+    except ImportError:
+        msvcrt = None
+
+
+class FileLock:
+    # 基于锁文件的进程间建议锁：POSIX 上用 flock，Windows 上用 msvcrt.locking。
+    # 同一线程内可以重复获取（按次数释放）；同一进程的其他线程通过内部的线程锁互斥。
+    def __init__(self, path):
+        self.path = path
+        self._fd = None
+        self._depth = 0
+        self._thread_lock = threading.RLock()
+
+    def acquire(self):
+        self._thread_lock.acquire()
+        self._depth += 1
+        if self._depth > 1:
+            return
+        try:
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+            elif msvcrt is not None:
+                # LK_LOCK 只重试 10 秒，超时后继续等待
+                while True:
+                    try:
+                        msvcrt.locking(self._fd, msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError:
+                        time.sleep(0.1)
+        except BaseException:
+            self._close()
+            self._depth -= 1
+            self._thread_lock.release()
+            raise
+
+    def release(self):
+        self._depth -= 1
+        if self._depth == 0:
+            try:
+                if fcntl is not None:
+                    fcntl.flock(self._fd, fcntl.LOCK_UN)
+                elif msvcrt is not None:
+                    os.lseek(self._fd, 0, os.SEEK_SET)
+                    msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+            finally:
+                self._close()
+        self._thread_lock.release()
+
+    def _close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
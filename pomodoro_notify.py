@@ -0,0 +1,195 @@
+import array
+import io
+import math
+import os
+import queue
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import wave
+
+try:
+    import winsound
+except ImportError:
+    winsound = None
+
+SAMPLE_RATE = 22050
+# 外部命令（播放器、桌面通知）的最长等待时间（秒）
+COMMAND_TIMEOUT = 10
+# 按顺序尝试的命令行播放器，都接受一个 WAV 文件路径
+PLAYERS = (('paplay',), ('pw-play',), ('aplay', '-q'), ('afplay',))
+
+
+def tone(start_freq=800, end_freq=400, duration=0.5, volume=0.3, end_volume=0.01):
+    # 生成与网页版相同的提示音：频率和音量都按指数从起始值变到结束值，返回 WAV 数据
+    count = int(SAMPLE_RATE * duration)
+    samples = array.array('h')
+    phase = 0.0
+    for i in range(count):
+        t = i / count
+        phase += 2 * math.pi * start_freq * (end_freq / start_freq) ** t / SAMPLE_RATE
+        samples.append(int(32767 * volume * (end_volume / volume) ** t * math.sin(phase)))
+    if sys.byteorder == 'big':
+        samples.byteswap()
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(SAMPLE_RATE)
+        f.writeframes(samples.tobytes())
+    return buffer.getvalue()
+
+
+# 声音名称到生成函数的映射，声音在第一次使用前生成并缓存
+SOUNDS = {
+    'reminder': tone
+}
+
+
+class WinsoundSink:
+    # Windows：直接从内存播放
+    def play(self, name, data):
+        winsound.PlaySound(data, winsound.SND_MEMORY)
+
+    def close(self):
+        pass
+
+
+class CommandSink:
+    # 调用命令行播放器；每个声音只写一次临时文件，之后重复使用
+    def __init__(self, command):
+        self.command = command
+        self._files = {}
+
+    def play(self, name, data):
+        path = self._files.get(name)
+        if path is None:
+            fd, path = tempfile.mkstemp(prefix=f'pomodoro-{name}-', suffix='.wav')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            self._files[name] = path
+        subprocess.run([*self.command, path], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                       timeout=COMMAND_TIMEOUT, check=True)
+
+    def close(self):
+        for path in self._files.values():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self._files.clear()
+
+
+class RecordingSink:
+    # 不发出声音，只记录播放过的声音，用于无界面、无声卡环境下的测试；
+    # delay 模拟播放耗时
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.played = []
+        self._changed = threading.Condition()
+
+    def play(self, name, data):
+        time.sleep(self.delay)
+        with self._changed:
+            self.played.append((name, len(data), time.monotonic()))
+            self._changed.notify_all()
+
+    def wait(self, count, timeout=None):
+        # 等待累计播放 count 次，超时返回 False
+        with self._changed:
+            return self._changed.wait_for(lambda: len(self.played) >= count, timeout)
+
+    def close(self):
+        pass
+
+
+def default_sink():
+    # 按平台选择播放方式，没有可用的播放器时返回 None
+    if winsound is not None:
+        return WinsoundSink()
+    for command in PLAYERS:
+        if shutil.which(command[0]):
+            return CommandSink(command)
+    return None
+
+
+def default_desktop():
+    # 返回发送桌面通知的函数 send(title, message)，没有可用的方式时返回 None
+    if sys.platform == 'darwin' and shutil.which('osascript'):
+        def send(title, message):
+            script = f'display notification {quote_applescript(message)} with title {quote_applescript(title)}'
+            subprocess.run(['osascript', '-e', script], timeout=COMMAND_TIMEOUT, check=True)
+        return send
+    if shutil.which('notify-send'):
+        def send(title, message):
+            subprocess.run(['notify-send', '--app-name=番茄钟', title, message], timeout=COMMAND_TIMEOUT, check=True)
+        return send
+    return None
+
+
+def quote_applescript(text):
+    return '"' + text.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+class Notifier:
+    # 提醒子系统：桌面通知和提示音都在后台线程中完成，界面线程调用 notify()/play() 只是放入队列，
+    # 阶段切换不会等待通知弹出或声音播完。
+    # sink 为播放声音的对象（提供 play(name, data) 和 close()），desktop 为 send(title, message)；
+    # 为 None 时按平台自动选择，找不到时相应的提醒不可用。
+    def __init__(self, sink=None, desktop=None):
+        self.sink = default_sink() if sink is None else sink
+        self.desktop = default_desktop() if desktop is None else desktop
+        self._sounds = {}
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='pomodoro-notify', daemon=True)
+
+    @property
+    def can_play(self):
+        return self.sink is not None
+
+    def start(self):
+        self._thread.start()
+        # 启动后先生成声音，第一次提醒时不用再等
+        self._queue.put(('preload', tuple(SOUNDS)))
+
+    def notify(self, title, message):
+        self._queue.put(('notify', (title, message)))
+
+    def play(self, name='reminder'):
+        self._queue.put(('play', name))
+
+    def close(self, timeout=None):
+        # 等待已排队的提醒完成
+        done = threading.Event()
+        self._queue.put(('close', done))
+        done.wait(timeout)
+
+    def sound(self, name):
+        data = self._sounds.get(name)
+        if data is None:
+            data = self._sounds[name] = SOUNDS[name]()
+        return data
+
+    def _run(self):
+        while True:
+            kind, args = self._queue.get()
+            try:
+                if kind == 'preload':
+                    for name in args:
+                        self.sound(name)
+                elif kind == 'notify':
+                    if self.desktop is not None:
+                        self.desktop(*args)
+                elif kind == 'play':
+                    if self.sink is not None:
+                        self.sink.play(args, self.sound(args))
+                elif kind == 'close':
+                    if self.sink is not None:
+                        self.sink.close()
+                    args.set()
+                    return
+            except (OSError, subprocess.SubprocessError) as e:
+                print(f"{'播放提示音' if kind == 'play' else '发送桌面通知'}失败: {e}")
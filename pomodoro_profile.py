@@ -0,0 +1,108 @@
+import bisect
+import collections
+import functools
+import json
+import os
+import threading
+import time
+
+# 直方图各桶的上界（毫秒），最后一个桶收集更慢的样本
+HISTOGRAM_BOUNDS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250)
+SPARK_CHARS = ' ▁▂▃▄▅▆▇█'
+
+
+def percentile(values, p):
+    # values 已排序，最近秩法
+    return values[max(0, min(len(values) - 1, int(p / 100 * len(values) + 0.5) - 1))]
+
+
+class Profiler:
+    # 性能探针：wrap() 把函数包装成计时版本，每次调用记录 (名称, 开始时间, 耗时, 线程)。
+    # 最近 capacity 个事件保存在环形缓冲中用于导出跟踪文件，每个名称最近 window 个耗时用于直方图和分位数。
+    # 不启用时宿主根本不包装任何函数，没有额外开销；记录只是 deque.append，可以在任意线程中进行。
+    def __init__(self, capacity=100000, window=1000):
+        self.events = collections.deque(maxlen=capacity)
+        self.window = window
+        self.samples = {}
+        # 跟踪文件中的时间从创建探针时算起
+        self.origin = time.perf_counter_ns()
+
+    def wrap(self, name, func):
+        clock = time.perf_counter_ns
+        record = self.record
+
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            start = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(name, start, clock() - start)
+
+        return timed
+
+    def instrument(self, obj, names, prefix=''):
+        # 用计时版本替换 obj 上的这些方法（实例属性），之后通过 obj.name 的调用都会被记录
+        for name in names:
+            setattr(obj, name, self.wrap(prefix + name, getattr(obj, name)))
+
+    def record(self, name, start, duration):
+        # start 为 perf_counter_ns() 时刻，duration 为纳秒
+        samples = self.samples.get(name)
+        if samples is None:
+            samples = self.samples.setdefault(name, collections.deque(maxlen=self.window))
+        samples.append(duration)
+        self.events.append((name, start, duration, threading.get_ident()))
+
+    def summary(self):
+        # {名称: {count, p50_ms, p95_ms, max_ms, histogram}}，histogram 为各桶的样本数
+        result = {}
+        for name, samples in list(self.samples.items()):
+            values = sorted(duration / 1e6 for duration in list(samples))
+            if not values:
+                continue
+            histogram = [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)
+            for value in values:
+                histogram[bisect.bisect_left(HISTOGRAM_BOUNDS_MS, value)] += 1
+            result[name] = {
+                'count': len(values),
+                'p50_ms': percentile(values, 50),
+                'p95_ms': percentile(values, 95),
+                'max_ms': values[-1],
+                'histogram': histogram
+            }
+        return result
+
+    def dump(self, path):
+        # 扩展名为 .json 时写 Chrome 跟踪格式（chrome://tracing、Perfetto 可以打开），否则写 JSON Lines；
+        # 返回写入的事件数
+        events = list(self.events)
+        pid = os.getpid()
+        tmp_file = f"{path}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            if path.endswith('.json'):
+                trace = [{'name': name, 'ph': 'X', 'ts': (start - self.origin) / 1000, 'dur': duration / 1000,
+                          'pid': pid, 'tid': thread} for name, start, duration, thread in events]
+                json.dump({'traceEvents': trace, 'displayTimeUnit': 'ms'}, f)
+            else:
+                for name, start, duration, thread in events:
+                    f.write(json.dumps({'name': name, 'start_ms': (start - self.origin) / 1e6,
+                                        'duration_ms': duration / 1e6, 'thread': thread}) + '\n')
+        os.replace(tmp_file, path)
+        return len(events)
+
+
+def sparkline(histogram):
+    peak = max(histogram) or 1
+    return ''.join(SPARK_CHARS[0 if not count else max(1, round(count / peak * (len(SPARK_CHARS) - 1)))]
+                   for count in histogram)
+
+
+def format_summary(summary):
+    # 调试浮层中显示的文字表格，直方图的桶从左到右依次为 0.1 ms 到 250 ms 以上
+    # 中文字符占两列，表头按显示宽度对齐
+    lines = [f"{'名称':<22}{'次数':>4}{'p50':>9}{'p95':>9}{'最大':>7}  分布 0.1ms→250ms+"]
+    for name, stats in sorted(summary.items()):
+        lines.append(f"{name:<24}{stats['count']:>6}{stats['p50_ms']:>9.2f}{stats['p95_ms']:>9.2f}"
+                     f"{stats['max_ms']:>9.2f}  {sparkline(stats['histogram'])}")
+    return '\n'.join(lines)
@@ -0,0 +1,185 @@
+import bisect
+import collections
+import heapq
+import operator
+import re
+
+# 拉丁字母和数字按单词切分；中日韩文字没有空格，连续的一段单独取出再切分
+TOKEN_RE = re.compile(r'[a-z0-9]+|[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]+')
+
+
+def tokenize(text):
+    # 索引用的词：拉丁单词整词，中文取单字和相邻两字
+    terms = []
+    for run in TOKEN_RE.findall(text.lower()):
+        if run.isascii():
+            terms.append(run)
+        else:
+            terms.extend(run)
+            terms.extend(map(operator.add, run, run[1:]))
+    return terms
+
+
+def query_terms(text):
+    # 查询用的词 [(词, 是否前缀匹配)]：拉丁单词按前缀匹配（输入到一半也能找到），
+    # 中文用相邻两字，只有一个字时用单字
+    terms = []
+    for run in TOKEN_RE.findall(text.lower()):
+        if run.isascii():
+            terms.append((run, True))
+        elif len(run) == 1:
+            terms.append((run, False))
+        else:
+            terms.extend((run[i:i + 2], False) for i in range(len(run) - 1))
+    return terms
+
+
+class SearchIndex:
+    # 任务名称的倒排索引：词 -> {任务 id: 出现次数}，增删改时增量更新。
+    # 拉丁单词另存一份有序词表（新词先追加，查询前再排序），前缀匹配用二分查找定位，不扫描全部任务；
+    # 不再使用的词留在词表中，查询时跳过。
+    # 结果按匹配程度排序（整词匹配优先于前缀匹配），相同时较新的任务在前。
+    def __init__(self, tasks=()):
+        self._postings = {}
+        self._task_terms = {}
+        self._seq = {}
+        self._next_seq = 0
+        self._words = []
+        self._word_set = set()
+        self._words_sorted = True
+        for task in tasks:
+            self.add(task)
+
+    def __len__(self):
+        return len(self._task_terms)
+
+    def add(self, task):
+        task_id = task.id
+        if task_id not in self._seq:
+            self._seq[task_id] = self._next_seq
+            self._next_seq += 1
+
+        counts = collections.Counter(tokenize(task.title))
+        self._task_terms[task_id] = tuple(counts)
+        for term, count in counts.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                if term.isascii() and term not in self._word_set:
+                    self._words.append(term)
+                    self._word_set.add(term)
+                    self._words_sorted = False
+            postings[task_id] = count
+
+    def remove(self, task_id, keep_seq=False):
+        for term in self._task_terms.pop(task_id, ()):
+            postings = self._postings[term]
+            del postings[task_id]
+            if not postings:
+                del self._postings[term]
+        if not keep_seq:
+            self._seq.pop(task_id, None)
+
+    def update(self, task):
+        # 改名后重新索引，保留原来的先后顺序
+        self.remove(task.id, keep_seq=True)
+        self.add(task)
+
+    def _sorted_words(self):
+        if not self._words_sorted:
+            self._words.sort()
+            self._words_sorted = True
+        return self._words
+
+    def _expand(self, prefix):
+        words = self._sorted_words()
+        i = bisect.bisect_left(words, prefix)
+        while i < len(words) and words[i].startswith(prefix):
+            yield words[i]
+            i += 1
+
+    def _matches(self, term, prefix):
+        # 单个查询词匹配到的任务及得分：整词 3 分，前缀按长度比例打折
+        matches = None
+        for word in self._expand(term) if prefix else (term,):
+            postings = self._postings.get(word)
+            if not postings:
+                continue
+            weight = 3.0 if word == term else len(term) / len(word)
+            if matches is None:
+                matches = {task_id: weight * count for task_id, count in postings.items()}
+                continue
+            for task_id, count in postings.items():
+                score = weight * count
+                if score > matches.get(task_id, 0):
+                    matches[task_id] = score
+        return matches or {}
+
+    def search(self, query, limit=None):
+        # 返回最多 limit 个任务 id（None 时返回全部匹配）；所有查询词都要匹配
+        terms = query_terms(query)
+        if not terms:
+            return []
+
+        # 先算匹配最少的词，后面的交集都在这个小集合上进行
+        all_matches = sorted((self._matches(term, prefix) for term, prefix in set(terms)), key=len)
+        scores = all_matches[0]
+        for matches in all_matches[1:]:
+            if not scores:
+                break
+            scores = {task_id: score + matches[task_id] for task_id, score in scores.items() if task_id in matches}
+
+        seq = self._seq
+        if limit is None or len(scores) <= limit:
+            candidates = list(scores)
+        else:
+            # 得分的取值很少，先找出第 limit 高的得分，只有得分恰好相同的任务才需要按新旧取舍，
+            # 避免为全部匹配结果构造排序用的元组
+            threshold = heapq.nlargest(limit, scores.values())[-1]
+            candidates = [task_id for task_id, score in scores.items() if score > threshold]
+            tied = [task_id for task_id, score in scores.items() if score == threshold]
+            candidates += heapq.nlargest(limit - len(candidates), tied, key=seq.__getitem__)
+        candidates.sort(key=lambda task_id: (scores[task_id], seq[task_id]), reverse=True)
+        return candidates
+
+
+class DeferredSearchIndex(SearchIndex):
+    # 第一次搜索时才从任务仓库建立的索引，用于按需加载月份的仓库，启动时不必读取全部任务。
+    # 建立之前的增删改都已经反映在仓库中，直接忽略
+    def __init__(self, task_repo):
+        super().__init__()
+        self._source = task_repo
+
+    def _build(self):
+        if self._source is not None:
+            task_repo, self._source = self._source, None
+            for task in task_repo:
+                self.add(task)
+
+    def __len__(self):
+        self._build()
+        return super().__len__()
+
+    def add(self, task):
+        if self._source is None:
+            super().add(task)
+
+    def remove(self, task_id, keep_seq=False):
+        if self._source is None:
+            super().remove(task_id, keep_seq)
+
+    def update(self, task):
+        if self._source is None:
+            super().update(task)
+
+    def search(self, query, limit=None):
+        self._build()
+        return super().search(query, limit)
+
+
+def index_for(task_repo):
+    # 任务不全在内存中的仓库（loads_on_demand，如 SQLite、分片、二进制快照）推迟建立索引，
+    # 启动时不必读取全部任务；内存中的 TaskRepository 立即建立
+    if getattr(task_repo, 'loads_on_demand', False):
+        return DeferredSearchIndex(task_repo)
+    return SearchIndex(task_repo)
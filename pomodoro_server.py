@@ -0,0 +1,268 @@
+import asyncio
+import collections
+import concurrent.futures
+import json
+import os
+import re
+import threading
+import urllib.parse
+
+HOST = '127.0.0.1'
+MAX_HEADER = 16 * 1024
+MAX_BODY = 1024 * 1024
+# 每个事件流客户端最多积压的事件数，写得慢的客户端丢弃最旧的事件（计时器状态只需要最新的）
+MAX_PENDING = 32
+# 事件流的心跳间隔和单次读写的超时（秒）
+HEARTBEAT = 15
+IO_TIMEOUT = 10
+# 访问根路径时返回的网页版
+STATIC_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'index.html')
+
+REASONS = {200: 'OK', 201: 'Created', 204: 'No Content', 400: 'Bad Request', 403: 'Forbidden',
+           404: 'Not Found', 405: 'Method Not Allowed', 413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+# (方法, 路径正则, 处理函数名)；路径中的分组作为参数传给处理函数
+ROUTES = [
+    ('GET', r'/api/state', 'get_state'),
+    ('GET', r'/api/tasks', 'list_tasks'),
+    ('POST', r'/api/tasks', 'create_task'),
+    ('PATCH', r'/api/tasks/([0-9a-f]+)', 'update_task'),
+    ('DELETE', r'/api/tasks/([0-9a-f]+)', 'delete_task'),
+    ('GET', r'/api/settings', 'get_settings'),
+    ('PUT', r'/api/settings', 'update_settings'),
+    ('GET', r'/api/stats', 'get_stats'),
+    ('POST', r'/api/timer/(start|pause|reset)', 'timer_action'),
+    ('POST', r'/api/timer/mode', 'timer_mode'),
+]
+ROUTES = [(method, re.compile(pattern + '$'), name) for method, pattern, name in ROUTES]
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class _Subscriber:
+    def __init__(self):
+        self.events = collections.deque(maxlen=MAX_PENDING)
+        self.ready = asyncio.Event()
+
+    def push(self, payload):
+        self.events.append(payload)
+        self.ready.set()
+
+
+class ApiServer:
+    # 只监听本机地址的 HTTP/JSON 接口和服务器推送事件（SSE）流，标准库 asyncio 实现。
+    # 服务器在自己的线程和事件循环中运行；读写应用数据的操作通过 dispatch(func)
+    # 交给宿主线程（Tk 界面线程）执行，结果再回到事件循环。
+    # api 对象提供与 ROUTES 中处理函数同名的方法，都在宿主线程中调用。
+    # 宿主调用 publish() 只是把事件交给事件循环，编码和向所有客户端分发都不占用宿主线程。
+    def __init__(self, api, port=0, dispatch=None, static_file=STATIC_FILE):
+        self.api = api
+        self.port = port
+        self.dispatch = dispatch
+        self.static_file = static_file
+        self.loop = None
+        self._server = None
+        self._subscribers = set()
+        self._thread = None
+        self._ready = threading.Event()
+        self._error = None
+
+    @property
+    def url(self):
+        return f"http://{HOST}:{self.port}/"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='pomodoro-server', daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if self._error:
+            raise self._error
+
+    def stop(self):
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self._shutdown)
+            self._thread.join(5)
+
+    def publish(self, event, data):
+        # 可以在任意线程中调用；没有订阅者时什么也不做
+        if self.loop is not None and self._subscribers:
+            self.loop.call_soon_threadsafe(self._broadcast, event, data)
+
+    def _run(self):
+        self.loop = asyncio.new_event_loop()
+        try:
+            self._server = self.loop.run_until_complete(
+                asyncio.start_server(self._handle, HOST, self.port, limit=MAX_HEADER, backlog=512))
+        except OSError as e:
+            self._error = e
+            self.loop.close()
+            self.loop = None
+            self._ready.set()
+            return
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._ready.set()
+        try:
+            self.loop.run_forever()
+        finally:
+            self.loop.close()
+
+    def _shutdown(self):
+        self._server.close()
+        for task in asyncio.all_tasks(self.loop):
+            task.cancel()
+        self.loop.call_later(0.1, self.loop.stop)
+
+    def _broadcast(self, event, data):
+        # 每个事件只编码一次，所有订阅者共享同一份字节串
+        payload = f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, separators=(',', ':'))}\n\n".encode('utf-8')
+        for subscriber in self._subscribers:
+            subscriber.push(payload)
+
+    async def _call(self, func, *args):
+        # 在宿主线程中执行 func 并等待结果
+        if self.dispatch is None:
+            return func(*args)
+        future = concurrent.futures.Future()
+
+        def run():
+            try:
+                future.set_result(func(*args))
+            except Exception as e:
+                future.set_exception(e)
+
+        self.dispatch(run)
+        return await asyncio.wrap_future(future)
+
+    async def _handle(self, reader, writer):
+        try:
+            await self._handle_request(reader, writer)
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.TimeoutError):
+            pass
+        except asyncio.CancelledError:
+            # 服务器关闭时取消仍在进行的连接
+            pass
+        finally:
+            writer.close()
+
+    async def _handle_request(self, reader, writer):
+        try:
+            head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), IO_TIMEOUT)
+            lines = head.decode('latin-1').split('\r\n')
+            method, target, _ = lines[0].split(' ', 2)
+            headers = {}
+            for line in lines[1:]:
+                if ':' in line:
+                    name, value = line.split(':', 1)
+                    headers[name.strip().lower()] = value.strip()
+            length = int(headers.get('content-length') or 0)
+        except (asyncio.LimitOverrunError, ValueError):
+            await self._respond(writer, 400, {'error': "无法解析的请求"})
+            return
+
+        # 只接受以本机地址访问的请求，并拒绝其他网页发起的跨站请求
+        origin = headers.get('origin')
+        if not self._local_host(headers.get('host', '')) or (origin and not self._local_host(urllib.parse.urlsplit(origin).netloc)):
+            await self._respond(writer, 403, {'error': "只允许本机页面访问"})
+            return
+
+        if length > MAX_BODY:
+            await self._respond(writer, 413, {'error': "请求体过大"})
+            return
+        body = await asyncio.wait_for(reader.readexactly(length), IO_TIMEOUT) if length else b''
+
+        url = urllib.parse.urlsplit(target)
+        if method == 'GET' and url.path == '/api/events':
+            await self._stream(writer)
+            return
+        if method == 'GET' and url.path in ('/', '/index.html') and self.static_file:
+            await self._send_static(writer)
+            return
+
+        try:
+            status, payload = await self._route(method, url.path, urllib.parse.parse_qs(url.query), body)
+        except ApiError as e:
+            status, payload = e.status, {'error': str(e)}
+        except KeyError as e:
+            status, payload = 404, {'error': f"不存在: {e.args[0]}"}
+        except ValueError as e:
+            status, payload = 400, {'error': str(e)}
+        except Exception as e:
+            print(f"处理请求失败: {method} {url.path}: {e}")
+            status, payload = 500, {'error': str(e)}
+        await self._respond(writer, status, payload)
+
+    def _local_host(self, netloc):
+        return netloc in (f'{HOST}:{self.port}', f'localhost:{self.port}')
+
+    async def _route(self, method, path, query, body):
+        allowed = False
+        for route_method, pattern, name in ROUTES:
+            match = pattern.match(path)
+            if not match:
+                continue
+            if route_method != method:
+                allowed = True
+                continue
+            args = list(match.groups())
+            if method in ('POST', 'PATCH', 'PUT'):
+                try:
+                    data = json.loads(body or b'{}')
+                except ValueError:
+                    raise ApiError(400, "请求体应为 JSON")
+                if not isinstance(data, dict):
+                    raise ApiError(400, "请求体应为 JSON 对象")
+                args.append(data)
+            elif method == 'GET':
+                args.append({key: values[-1] for key, values in query.items()})
+            result = await self._call(getattr(self.api, name), *args)
+            if result is None:
+                return 204, None
+            return (201 if method == 'POST' and name == 'create_task' else 200), result
+        raise ApiError(405 if allowed else 404, "不支持的方法" if allowed else f"没有这个接口: {path}")
+
+    async def _respond(self, writer, status, payload):
+        body = b'' if payload is None else json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        await self._send(writer, status, 'application/json; charset=utf-8', body)
+
+    async def _send_static(self, writer):
+        with open(self.static_file, 'rb') as f:
+            body = f.read()
+        await self._send(writer, 200, 'text/html; charset=utf-8', body)
+
+    async def _send(self, writer, status, content_type, body):
+        head = (f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                "Cache-Control: no-store\r\n"
+                "Connection: close\r\n\r\n")
+        writer.write(head.encode('latin-1') + body)
+        await asyncio.wait_for(writer.drain(), IO_TIMEOUT)
+
+    async def _stream(self, writer):
+        # 事件流：先发送一次完整的计时器状态，之后转发 publish() 的事件
+        subscriber = _Subscriber()
+        state = await self._call(self.api.get_state, {})
+        writer.write(b"HTTP/1.1 200 OK\r\n"
+                     b"Content-Type: text/event-stream; charset=utf-8\r\n"
+                     b"Cache-Control: no-store\r\n"
+                     b"Connection: keep-alive\r\n\r\n"
+                     b"retry: 2000\n\n" +
+                     f"event: tick\ndata: {json.dumps(state, ensure_ascii=False)}\n\n".encode('utf-8'))
+        self._subscribers.add(subscriber)
+        try:
+            while True:
+                await asyncio.wait_for(writer.drain(), IO_TIMEOUT)
+                try:
+                    await asyncio.wait_for(subscriber.ready.wait(), HEARTBEAT)
+                except asyncio.TimeoutError:
+                    writer.write(b': ping\n\n')
+                    continue
+                subscriber.ready.clear()
+                writer.write(b''.join(subscriber.events))
+                subscriber.events.clear()
+        finally:
+            self._subscribers.discard(subscriber)
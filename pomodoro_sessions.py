@@ -0,0 +1,180 @@
+import argparse
+import datetime
+import json
+import os
+
+
+def new_totals():
+    return {'pomodoros': 0, 'focus_seconds': 0, 'breaks': 0, 'aborted': 0}
+
+
+class SessionLog:
+    # 追加写入的会话日志（JSON Lines），每个结束或中断的阶段一行。
+    # 位置为字节偏移，统计缓存据此只读取上次之后新增的记录。
+    # 每行用一次追加写入，多个进程同时记录会话时行之间不会交错。
+    def __init__(self, log_file):
+        self.log_file = log_file
+
+    def append(self, session):
+        # 返回写入后的位置，统计缓存据此跳过已经统计过的记录
+        line = json.dumps(session, ensure_ascii=False, separators=(',', ':')) + '\n'
+        with open(self.log_file, 'a', encoding='utf-8') as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+            return f.tell()
+
+    def read_since(self, position=0):
+        # 逐行读取 position 之后的会话，产出 (新位置, 会话)
+        if not os.path.exists(self.log_file):
+            return
+        with open(self.log_file, 'rb') as f:
+            f.seek(position)
+            for line in f:
+                # 写了一半的最后一行留到下次再读
+                if not line.endswith(b'\n'):
+                    break
+                position += len(line)
+                try:
+                    session = json.loads(line)
+                except ValueError:
+                    continue
+                yield position, session
+
+
+class StatsAggregator:
+    # 按天、ISO 周和月份累计的会话统计，每条会话增量更新一次，不需要重新扫描历史。
+    # position 记录已经统计到的日志位置，连同统计结果一起缓存到文件。
+    def __init__(self):
+        self.position = 0
+        self.daily = {}
+        self.weekly = {}
+        self.monthly = {}
+
+    @staticmethod
+    def keys(day):
+        iso_year, iso_week, _ = day.isocalendar()
+        return day.isoformat(), f"{iso_year}-W{iso_week:02d}", day.strftime("%Y-%m")
+
+    def add(self, session):
+        day = datetime.datetime.fromtimestamp(session['start']).date()
+        for table, key in zip((self.daily, self.weekly, self.monthly), self.keys(day)):
+            totals = table.get(key)
+            if totals is None:
+                totals = table[key] = new_totals()
+            if session['mode'] == 'work':
+                totals['focus_seconds'] += session.get('elapsed', session['end'] - session['start'])
+                if session['completed']:
+                    totals['pomodoros'] += 1
+            elif session['completed']:
+                totals['breaks'] += 1
+            if not session['completed']:
+                totals['aborted'] += 1
+
+    def day(self, day):
+        return self.daily.get(day.isoformat(), new_totals())
+
+    def week(self, day):
+        return self.weekly.get(self.keys(day)[1], new_totals())
+
+    def month(self, day):
+        return self.monthly.get(self.keys(day)[2], new_totals())
+
+    def catch_up(self, log):
+        # 统计日志中缓存之后新增的会话，返回新增条数
+        count = 0
+        for position, session in log.read_since(self.position):
+            self.add(session)
+            self.position = position
+            count += 1
+        return count
+
+    def to_dict(self):
+        return {
+            'position': self.position,
+            'daily': {k: dict(v) for k, v in self.daily.items()},
+            'weekly': {k: dict(v) for k, v in self.weekly.items()},
+            'monthly': {k: dict(v) for k, v in self.monthly.items()}
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls()
+        stats.position = data.get('position', 0)
+        stats.daily = data.get('daily', {})
+        stats.weekly = data.get('weekly', {})
+        stats.monthly = data.get('monthly', {})
+        return stats
+
+
+def load_stats(log, cache_file):
+    # 读取统计缓存并补上之后的新会话；缓存损坏时从头统计
+    stats = StatsAggregator()
+    if os.path.exists(cache_file):
+        try:
+            with open(cache_file, 'r', encoding='utf-8') as f:
+                stats = StatsAggregator.from_dict(json.load(f))
+        except (OSError, ValueError) as e:
+            print(f"读取统计缓存失败: {e}")
+            stats = StatsAggregator()
+    if stats.catch_up(log):
+        save_stats(stats.to_dict(), cache_file)
+    return stats
+
+
+def save_stats(data, cache_file):
+    # 临时文件名带进程号，界面和命令行同时保存缓存时互不覆盖
+    tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(data, f, separators=(',', ':'))
+    os.replace(tmp_file, cache_file)
+
+
+def format_duration(seconds):
+    minutes = int(seconds) // 60
+    return f"{minutes // 60}小时{minutes % 60:02d}分" if minutes >= 60 else f"{minutes}分钟"
+
+
+def format_totals(totals):
+    return (f"番茄 {totals['pomodoros']:>3}  专注 {format_duration(totals['focus_seconds']):>9}  "
+            f"休息 {totals['breaks']:>3}  中断 {totals['aborted']:>3}")
+
+
+def report(stats, today=None, days=7, weeks=4, months=6):
+    today = today or datetime.date.today()
+    lines = ["最近每天:"]
+    for i in range(days - 1, -1, -1):
+        day = today - datetime.timedelta(days=i)
+        lines.append(f"  {day.isoformat()}  {format_totals(stats.day(day))}")
+
+    lines.append("最近每周:")
+    for i in range(weeks - 1, -1, -1):
+        day = today - datetime.timedelta(weeks=i)
+        lines.append(f"  {StatsAggregator.keys(day)[1]:<10}  {format_totals(stats.week(day))}")
+
+    lines.append("最近每月:")
+    year, month = today.year, today.month
+    month_days = []
+    for _ in range(months):
+        month_days.append(datetime.date(year, month, 1))
+        year, month = (year - 1, 12) if month == 1 else (year, month - 1)
+    for day in reversed(month_days):
+        lines.append(f"  {day.strftime('%Y-%m'):<10}  {format_totals(stats.month(day))}")
+    return '\n'.join(lines)
+
+
+def main():
+    from pomodoro_storage import BACKENDS, open_store
+
+    parser = argparse.ArgumentParser(description="番茄钟会话统计")
+    parser.add_argument('--backend', choices=BACKENDS, default='json')
+    parser.add_argument('--data-file')
+    args = parser.parse_args()
+
+    store = open_store(args.backend, args.data_file)
+    stats = load_stats(store.open_session_log(), store.stats_cache_file)
+    print(report(stats))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,634 @@
+import argparse
+import collections
+import datetime
+import gzip
+import json
+import os
+import queue
+import threading
+
+from pomodoro_lock import FileLock
+from pomodoro_storage import JournalStore, DEFAULT_SETTINGS
+from pomodoro_tasks import Task, set_fields
+
+MANIFEST_FILE = 'manifest.json'
+IDS_FILE = 'ids.log'
+# id 索引中被后面的行覆盖的行超过这个数时，压缩时重写索引
+ID_LOG_SLACK = 1000
+# 当前月和上个月的分片经常修改，保存为普通 JSON；更早的月份压缩保存
+PLAIN_MONTHS = 2
+
+
+def _file_state(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+def _empty_manifest():
+    # months: 月份 -> {'file': 分片文件名, 'days': {日期: 任务数}}
+    return {'format': 1, 'settings': {}, 'months': {}}
+
+
+def _old_months_before():
+    # 早于返回值的月份算作旧月份
+    today = datetime.date.today()
+    index = today.year * 12 + today.month - PLAIN_MONTHS
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+
+def shard_name(month):
+    return f"{month}.json.gz" if month < _old_months_before() else f"{month}.json"
+
+
+def write_json(path, data):
+    # 先写临时文件再原子替换；扩展名为 .gz 时压缩（最快一档，压缩率与默认档相差不大，修改旧月份时少等一些）
+    content = json.dumps(data, ensure_ascii=False).encode('utf-8')
+    if path.endswith('.gz'):
+        content = gzip.compress(content, compresslevel=1, mtime=0)
+    write_bytes(path, content)
+
+
+def write_bytes(path, content):
+    tmp_file = path + '.tmp'
+    with open(tmp_file, 'wb') as f:
+        f.write(content)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, path)
+
+
+def read_json(path):
+    with open(path, 'rb') as f:
+        content = f.read()
+    if path.endswith('.gz'):
+        content = gzip.decompress(content)
+    return json.loads(content)
+
+
+def read_manifest(directory):
+    path = os.path.join(directory, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return _empty_manifest()
+    return read_json(path)
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class IdIndex:
+    # 任务 id -> 月份 的索引文件（ids.log）：每行 "<id> <月份>"，月份为 - 表示任务已删除，
+    # 后面的行覆盖前面的。只在添加任务、任务换了月份和删除时追加，
+    # 按 id 查找时直接定位分片，不存在的 id 不必逐月读取。所有方法的调用方都持有锁
+    def __init__(self, path):
+        self.path = path
+        self._months = {}
+        self._offset = 0
+        self._lines = 0
+        self._inode = None
+
+    def _reset(self):
+        self._months.clear()
+        self._offset = 0
+        self._lines = 0
+
+    def sync(self):
+        # 读入上次之后追加的行（包括其他进程的）；崩溃留下的半行截掉
+        try:
+            f = open(self.path, 'r+b')
+        except FileNotFoundError:
+            self._reset()
+            return
+        with f:
+            inode = os.fstat(f.fileno()).st_ino
+            if inode != self._inode:
+                # 索引被重建（替换）过
+                self._reset()
+                self._inode = inode
+            f.seek(self._offset)
+            for line in f:
+                if not line.endswith(b'\n'):
+                    f.truncate(self._offset)
+                    break
+                task_id, month = line.decode('utf-8').split()
+                if month == '-':
+                    self._months.pop(task_id, None)
+                else:
+                    self._months[task_id] = month
+                self._offset += len(line)
+                self._lines += 1
+
+    def get(self, task_id):
+        return self._months.get(task_id)
+
+    def append(self, locations):
+        # locations 为 (id, 月份或 None) 序列，None 表示删除
+        lines = ''.join(f"{task_id} {month or '-'}\n" for task_id, month in locations).encode('utf-8')
+        with open(self.path, 'ab') as f:
+            f.write(lines)
+            f.flush()
+            os.fsync(f.fileno())
+        self.sync()
+
+    def rebuild(self, locations):
+        # 用 (id, 月份) 序列重写整个索引
+        write_bytes(self.path, ''.join(f"{task_id} {month}\n" for task_id, month in locations).encode('utf-8'))
+        self.sync()
+
+    def needs_compaction(self):
+        return self._lines - len(self._months) > ID_LOG_SLACK
+
+    def compact(self):
+        # 只保留每个任务的当前位置，去掉被覆盖的行和已删除的任务
+        self.rebuild(list(self._months.items()))
+
+
+def shard_locations(directory, manifest):
+    # 逐个读取分片，产出 (id, 月份)；用于给旧版本的分片目录建立 id 索引
+    for month, entry in sorted(manifest['months'].items()):
+        for task in read_json(os.path.join(directory, entry['file'])):
+            yield task['id'], month
+
+
+class ShardedTaskRepository:
+    # 与 TaskRepository 接口相同的按月分片任务仓库：
+    # 每月的任务保存在一个分片文件中，清单文件记录各月的分片和每天的任务数。
+    # 日历、年视图和任务总数只读清单，分片在第一次需要某月的任务时才读取，
+    # 并缓存最近访问的几个月；prefetch() 在后台线程中预读即将显示的月份。
+    # 修改只作用于内存中的月份和清单计数，分片由后台持久化线程按日志记录写入
+    # （见 ShardedStore.append_many）。修改过的月份固定在缓存中不被挤出，
+    # 直到 refresh() 读入其他进程的修改时整体重新加载（调用方应先等待写入完成）。
+    loads_on_demand = True
+
+    def __init__(self, directory, lock, cached_months=6):
+        self.directory = directory
+        self.lock = lock
+        self.cached_months = cached_months
+        self._months = collections.OrderedDict()
+        self._pinned = set()
+        # 缓存也会被预读线程修改
+        self._cache_lock = threading.Lock()
+        # 读过的分片和本进程修改过的任务 id -> 月份；其余的 id 查索引文件
+        self._locations = {}
+        self._ids = IdIndex(os.path.join(directory, IDS_FILE))
+        self._prefetch_queue = None
+        self._changed = False
+        with self.lock:
+            self._load_manifest()
+
+    @property
+    def settings(self):
+        settings = dict(DEFAULT_SETTINGS)
+        settings.update(self._manifest['settings'])
+        return settings
+
+    def _manifest_file(self):
+        return os.path.join(self.directory, MANIFEST_FILE)
+
+    def _load_manifest(self):
+        self._manifest = read_manifest(self.directory)
+        self._state = _file_state(self._manifest_file())
+        self._count = sum(sum(entry['days'].values()) for entry in self._manifest['months'].values())
+        with self._cache_lock:
+            self._months.clear()
+            self._pinned.clear()
+        self._locations.clear()
+
+    def refresh(self):
+        # 返回上次调用之后是否读到过其他进程的修改；有修改时清空缓存重新读取清单
+        with self.lock:
+            if _file_state(self._manifest_file()) != self._state:
+                self._load_manifest()
+                self._changed = True
+        changed, self._changed = self._changed, False
+        return changed
+
+    def _read_month(self, month):
+        # 调用方持有锁；从分片读取某月按日期分组的任务
+        by_date = {}
+        entry = self._manifest['months'].get(month)
+        if entry is None:
+            return by_date
+        try:
+            data = read_json(os.path.join(self.directory, entry['file']))
+        except FileNotFoundError:
+            # 其他进程已把分片改为压缩保存，按磁盘上的清单读取
+            entry = read_manifest(self.directory)['months'].get(month)
+            data = read_json(os.path.join(self.directory, entry['file'])) if entry else []
+        for item in data:
+            task = Task.from_dict(item)
+            by_date.setdefault(task.date, {})[task.id] = task
+            self._locations[task.id] = month
+        return by_date
+
+    def _remember(self, month, by_date, pin=False):
+        # 放入缓存，已经缓存时以缓存中的为准（界面线程可能已经修改过）；只挤出没有修改过的月份
+        with self._cache_lock:
+            by_date = self._months.setdefault(month, by_date)
+            self._months.move_to_end(month)
+            if pin:
+                self._pinned.add(month)
+            excess = len(self._months) - self.cached_months
+            for old in [old for old in self._months if old not in self._pinned][:max(0, excess)]:
+                del self._months[old]
+        return by_date
+
+    def _cached(self, month, pin=False):
+        with self._cache_lock:
+            by_date = self._months.get(month)
+            if by_date is not None:
+                self._months.move_to_end(month)
+                if pin:
+                    self._pinned.add(month)
+            return by_date
+
+    def _month(self, month, pin=False):
+        # pin 为 True 时该月将被修改，固定在缓存中
+        by_date = self._cached(month, pin)
+        if by_date is None:
+            with self.lock:
+                by_date = self._cached(month, pin)
+                if by_date is None:
+                    by_date = self._remember(month, self._read_month(month), pin)
+        return by_date
+
+    def prefetch(self, months):
+        # 在后台线程中读取这些月份（'YYYY-MM'）的分片，已缓存或没有任务的月份跳过
+        if self._prefetch_queue is None:
+            self._prefetch_queue = queue.Queue()
+            threading.Thread(target=self._run_prefetch, name='pomodoro-prefetch', daemon=True).start()
+        for month in months:
+            if month in self._manifest['months'] and self._cached(month) is None:
+                self._prefetch_queue.put(month)
+
+    def _run_prefetch(self):
+        while True:
+            month = self._prefetch_queue.get()
+            try:
+                with self.lock:
+                    if self._cached(month) is None:
+                        self._remember(month, self._read_month(month))
+            except (OSError, ValueError) as e:
+                print(f"预读 {month} 失败: {e}")
+
+    def _find(self, task_id, pin=False, sync=True):
+        # 返回 (月份, 该月按日期分组的任务, 任务)，找不到时抛出 KeyError。
+        # 月份先查已知位置再查 id 索引，只读取这一个分片；sync 为 False 时调用方已经读过索引
+        month = self._locations.get(task_id)
+        if month is None:
+            with self.lock:
+                if sync:
+                    self._ids.sync()
+                month = self._ids.get(task_id)
+        if month is None:
+            raise KeyError(task_id)
+        by_date = self._month(month, pin)
+        for day in by_date.values():
+            if task_id in day:
+                return month, by_date, day[task_id]
+        raise KeyError(task_id)
+
+    def _count_day(self, date, delta):
+        # 清单中每天的任务数随内存中的修改更新，日历和年视图不必等分片写入
+        months = self._manifest['months']
+        entry = months.setdefault(date[:7], {'file': shard_name(date[:7]), 'days': {}})
+        days = entry['days']
+        days[date] = days.get(date, 0) + delta
+        if not days[date]:
+            del days[date]
+        if not days:
+            del months[date[:7]]
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        return self.iter_range()
+
+    def __contains__(self, task_id):
+        try:
+            self.get(task_id)
+        except KeyError:
+            return False
+        return True
+
+    def get(self, task_id):
+        return self._find(task_id)[2]
+
+    def _contains(self, task_id):
+        try:
+            self._find(task_id, sync=False)
+        except KeyError:
+            return False
+        return True
+
+    def add(self, task):
+        self.add_many([task])
+        return task
+
+    def add_many(self, tasks):
+        # 跳过 id 已存在（在任何月份中）的任务，与 ShardedStore.append_many 一致；返回实际添加的任务
+        added = []
+        with self.lock:
+            self._ids.sync()
+        for task in tasks:
+            if self._contains(task.id):
+                continue
+            month = task.date[:7]
+            by_date = self._month(month, pin=True)
+            by_date.setdefault(task.date, {})[task.id] = task
+            self._locations[task.id] = month
+            self._count_day(task.date, 1)
+            added.append(task)
+        self._count += len(added)
+        return added
+
+    def update(self, task_id, **fields):
+        month, by_date, task = self._find(task_id, pin=True)
+        old_date = task.date
+        set_fields(task, fields)
+        if task.date != old_date:
+            del by_date[old_date][task_id]
+            if not by_date[old_date]:
+                del by_date[old_date]
+            self._count_day(old_date, -1)
+            new_month = task.date[:7]
+            if new_month != month:
+                by_date = self._month(new_month, pin=True)
+                self._locations[task_id] = new_month
+            by_date.setdefault(task.date, {})[task_id] = task
+            self._count_day(task.date, 1)
+        return task
+
+    def remove(self, task_id):
+        month, by_date, task = self._find(task_id, pin=True)
+        del by_date[task.date][task_id]
+        if not by_date[task.date]:
+            del by_date[task.date]
+        self._locations.pop(task_id, None)
+        self._count_day(task.date, -1)
+        self._count -= 1
+        return task
+
+    def page(self, offset, limit):
+        # 按月份顺序分页，用清单中的计数跳过前面的月份，只读取落在这一页中的分片
+        result = []
+        position = 0
+        for month in sorted(self._manifest['months']):
+            count = sum(self._manifest['months'][month]['days'].values())
+            if position + count > offset and len(result) < limit:
+                tasks = [task for day in self._month(month).values() for task in day.values()]
+                start = max(0, offset - position)
+                result.extend(tasks[start:start + limit - len(result)])
+            position += count
+            if len(result) >= limit:
+                break
+        return result
+
+    def iter_range(self, start=None, end=None):
+        # 逐月读取，不放入缓存，导出全部任务或建立搜索索引时不会挤掉正在显示的月份
+        for month in sorted(self._manifest['months']):
+            if (start and month < start[:7]) or (end and month > end[:7]):
+                continue
+            by_date = self._cached(month)
+            if by_date is None:
+                with self.lock:
+                    by_date = self._read_month(month)
+            for date, day in list(by_date.items()):
+                if (start is None or date >= start) and (end is None or date <= end):
+                    yield from list(day.values())
+
+    def tasks_for_date(self, date_str):
+        return list(self._month(date_str[:7]).get(date_str, {}).values())
+
+    def has_tasks(self, date_str):
+        entry = self._manifest['months'].get(date_str[:7])
+        return entry is not None and date_str in entry['days']
+
+    def month_count(self, year, month):
+        entry = self._manifest['months'].get(f"{year:04d}-{month:02d}")
+        return sum(entry['days'].values()) if entry else 0
+
+    def day_counts(self, year, month):
+        # 返回清单中的字典，调用方只读
+        entry = self._manifest['months'].get(f"{year:04d}-{month:02d}")
+        return entry['days'] if entry else {}
+
+
+def compress_old_shards(directory, lock):
+    # 把已经变成旧月份、仍为普通 JSON 的分片改为压缩保存，返回处理的分片数
+    with lock:
+        manifest = read_manifest(directory)
+        stale = []
+        for month, entry in manifest['months'].items():
+            name = shard_name(month)
+            if entry['file'] != name:
+                write_json(os.path.join(directory, name), read_json(os.path.join(directory, entry['file'])))
+                stale.append(entry['file'])
+                entry['file'] = name
+        if stale:
+            write_json(os.path.join(directory, MANIFEST_FILE), manifest)
+            for name in stale:
+                _remove(os.path.join(directory, name))
+    return len(stale)
+
+
+class ShardedStore:
+    # 与 JournalStore 对应的按月分片存储（一个目录）：
+    # 日志记录在后台持久化线程中成批应用到分片上（append_many），设置保存在清单中；
+    # 启动时把变旧的月份改为压缩保存。
+    snapshot_tasks = False
+    repository_commits = False
+
+    def __init__(self, directory, import_from=None):
+        self.directory = directory
+        self.manifest_file = os.path.join(directory, MANIFEST_FILE)
+        self.stats_cache_file = os.path.join(directory, 'stats.json')
+        self.import_from = import_from
+        # 锁文件在目录中，目录要先于第一次加锁创建
+        os.makedirs(directory, exist_ok=True)
+        self.lock = FileLock(os.path.join(directory, 'manifest.lock'))
+        self.ids = IdIndex(os.path.join(directory, IDS_FILE))
+        self.pending = 0
+        self.compact_threshold = float('inf')
+        self._state = None
+        self._changed = False
+
+    def load_repository(self):
+        # 目录中没有清单而旧的 JSON 数据文件存在时，自动导入一次；启动时只读取当前月份的分片
+        with self.lock:
+            if not os.path.exists(self.manifest_file) and self.import_from and os.path.exists(self.import_from):
+                import_json(self.import_from, self.directory)
+            if not os.path.exists(self.ids.path):
+                # 旧版本的分片目录没有 id 索引，读一遍全部分片建立它
+                self.ids.rebuild(shard_locations(self.directory, read_manifest(self.directory)))
+            compress_old_shards(self.directory, self.lock)
+            self._state = _file_state(self.manifest_file)
+        repo = ShardedTaskRepository(self.directory, self.lock)
+        repo.tasks_for_date(datetime.date.today().isoformat())
+        return repo, repo.settings
+
+    def _read_manifest(self):
+        # 调用方持有锁；清单在上次读写之后被其他进程改过时，记下需要通知界面刷新
+        self._note_state()
+        return read_manifest(self.directory)
+
+    def _write_manifest(self, manifest):
+        # 调用方持有锁；记下写入后的状态，check() 不会把自己的写入当成其他进程的修改
+        write_json(self.manifest_file, manifest)
+        self._state = _file_state(self.manifest_file)
+
+    def _note_state(self):
+        state = _file_state(self.manifest_file)
+        if self._state is not None and state != self._state:
+            self._changed = True
+        self._state = state
+
+    def append_many(self, records):
+        # 一批 (op, fields) 记录在锁内一起应用：每个涉及的分片只读写一次，最后写 id 索引和清单。
+        # 与 apply_record 相同，修改、完成、删除已经不存在的任务时跳过
+        with self.lock:
+            manifest = self._read_manifest()
+            self.ids.sync()
+            shards = {}
+            # 本批记录中添加、换了月份或删除的任务 id -> 月份（删除为 None）
+            locations = {}
+            settings_changed = False
+
+            def shard(month):
+                tasks = shards.get(month)
+                if tasks is None:
+                    entry = manifest['months'].get(month)
+                    data = read_json(os.path.join(self.directory, entry['file'])) if entry else []
+                    tasks = shards[month] = {task['id']: task for task in data}
+                return tasks
+
+            def locate(task_id):
+                return locations[task_id] if task_id in locations else self.ids.get(task_id)
+
+            for op, fields in records:
+                if op in ('add', 'add_many'):
+                    for task in [fields['task']] if op == 'add' else fields['tasks']:
+                        if locate(task['id']) is None:
+                            shard(task['date'][:7])[task['id']] = task
+                            locations[task['id']] = task['date'][:7]
+                    continue
+                if op == 'settings':
+                    manifest['settings'] = fields['settings']
+                    settings_changed = True
+                    continue
+                task_id = fields['id']
+                month = locate(task_id)
+                if month is None or task_id not in shard(month):
+                    continue
+                if op == 'edit':
+                    task = dict(fields['task'], id=task_id)
+                    new_month = task['date'][:7]
+                    if new_month == month:
+                        shard(month)[task_id] = task
+                    else:
+                        del shard(month)[task_id]
+                        shard(new_month)[task_id] = task
+                        locations[task_id] = new_month
+                elif op == 'complete':
+                    shard(month)[task_id]['completed'] = fields['completed']
+                elif op == 'delete':
+                    del shard(month)[task_id]
+                    locations[task_id] = None
+
+            stale = []
+            for month, tasks in shards.items():
+                old = manifest['months'].get(month)
+                if not tasks:
+                    manifest['months'].pop(month, None)
+                    if old:
+                        stale.append(old['file'])
+                    continue
+                name = shard_name(month)
+                write_json(os.path.join(self.directory, name), list(tasks.values()))
+                if old and old['file'] != name:
+                    stale.append(old['file'])
+                days = collections.Counter(task['date'] for task in tasks.values())
+                manifest['months'][month] = {'file': name, 'days': dict(sorted(days.items()))}
+            if locations:
+                self.ids.append(locations.items())
+            if shards or settings_changed:
+                self._write_manifest(manifest)
+            # 清单已指向新的分片，再删除不再使用的文件
+            for name in stale:
+                _remove(os.path.join(self.directory, name))
+            # id 索引积累了太多被覆盖的行时请求压缩
+            return self.ids.needs_compaction()
+
+    def append(self, op, **fields):
+        return self.append_many([(op, fields)])
+
+    def compact(self, tasks, settings, external_seq=None):
+        # 任务已经随日志记录写入分片，这里保存设置，并在需要时重写 id 索引
+        with self.lock:
+            manifest = self._read_manifest()
+            manifest['settings'] = settings
+            self._write_manifest(manifest)
+            self.ids.sync()
+            if self.ids.needs_compaction():
+                self.ids.compact()
+        return True
+
+    def watch_paths(self):
+        # 每次修改最后都会替换清单
+        return [self.manifest_file]
+
+    def check(self):
+        # 其他进程改过清单时通知界面刷新；本进程写入后记下的状态不算
+        self._note_state()
+
+    def take_external(self):
+        if not self._changed:
+            return []
+        self._changed = False
+        return [{'op': 'refresh'}]
+
+    def open_session_log(self):
+        from pomodoro_sessions import SessionLog
+        return SessionLog(os.path.join(self.directory, 'sessions.jsonl'))
+
+
+def import_json(json_file, directory):
+    # 把 pomodoro_data.json（及其日志）按月拆成分片，返回导入的任务数
+    tasks, settings = JournalStore(json_file).load()
+    os.makedirs(directory, exist_ok=True)
+    by_month = {}
+    for task in tasks:
+        by_month.setdefault(task['date'][:7], []).append(task)
+
+    manifest = _empty_manifest()
+    manifest['settings'] = settings
+    for month, month_tasks in sorted(by_month.items()):
+        name = shard_name(month)
+        write_json(os.path.join(directory, name), month_tasks)
+        days = collections.Counter(task['date'] for task in month_tasks)
+        manifest['months'][month] = {'file': name, 'days': dict(sorted(days.items()))}
+    IdIndex(os.path.join(directory, IDS_FILE)).rebuild(
+        (task['id'], month) for month, month_tasks in sorted(by_month.items()) for task in month_tasks)
+    # 清单最后写入，中途失败时下次启动会重新导入
+    write_json(os.path.join(directory, MANIFEST_FILE), manifest)
+    return len(tasks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="把 JSON 数据文件拆成按月分片的数据目录")
+    parser.add_argument('json_file', nargs='?', default='pomodoro_data.json')
+    parser.add_argument('directory', nargs='?', default='pomodoro_data.shards')
+    args = parser.parse_args()
+    count = import_json(args.json_file, args.directory)
+    print(f"已导入 {count} 个任务到 {args.directory}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,383 @@
+import argparse
+import collections
+import json
+import os
+import sqlite3
+import threading
+
+from pomodoro_lock import FileLock
+from pomodoro_storage import JournalStore, DEFAULT_SETTINGS
+from pomodoro_tasks import Task, set_fields
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS tasks (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL UNIQUE,
+    date TEXT NOT NULL,
+    name TEXT NOT NULL,
+    completed INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_date ON tasks (date, completed);
+CREATE INDEX IF NOT EXISTS idx_tasks_completed ON tasks (completed, date);
+
+CREATE TABLE IF NOT EXISTS settings (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    start REAL NOT NULL,
+    end REAL NOT NULL,
+    elapsed REAL NOT NULL DEFAULT 0,
+    mode TEXT NOT NULL,
+    completed INTEGER NOT NULL,
+    task_id TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_start ON sessions (start);
+'''
+
+TASK_COLUMNS = 'id, date, name, completed'
+
+
+def connect(db_file):
+    # WAL 模式下读写互不阻塞，synchronous=NORMAL 时提交不做 fsync，只在检查点时同步
+    conn = sqlite3.connect(db_file, check_same_thread=False)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.executescript(SCHEMA)
+    # 早期版本的 sessions 表没有 elapsed 列
+    columns = [row[1] for row in conn.execute('PRAGMA table_info(sessions)')]
+    if 'elapsed' not in columns:
+        conn.execute('ALTER TABLE sessions ADD COLUMN elapsed REAL NOT NULL DEFAULT 0')
+    return conn
+
+
+def _row_to_task(row):
+    # 数据库中的名称与 JSON 数据文件相同，带有日期前缀
+    return Task.from_dict({'id': row[0], 'date': row[1], 'name': row[2], 'completed': bool(row[3])})
+
+
+def _task_params(task):
+    data = task.to_dict()
+    return data['date'], data['name'], int(data['completed']), data['id']
+
+
+def _month_range(month):
+    # 'YYYY-MM' -> 该月第一天和下个月第一天，用于按日期范围查询
+    year, mon = int(month[:4]), int(month[5:7])
+    next_year, next_mon = (year + 1, 1) if mon == 12 else (year, mon + 1)
+    return f"{month}-01", f"{next_year:04d}-{next_mon:02d}-01"
+
+
+def load_settings(conn):
+    settings = dict(DEFAULT_SETTINGS)
+    for key, value in conn.execute('SELECT key, value FROM settings'):
+        settings[key] = json.loads(value)
+    return settings
+
+
+def save_settings(conn, settings):
+    with conn:
+        conn.executemany('INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)',
+                         [(key, json.dumps(value)) for key, value in settings.items()])
+
+
+class SqliteTaskRepository:
+    # 与 TaskRepository 接口相同的 SQLite 任务仓库：
+    # 渲染时只按日期范围查询当前显示的月份，并缓存最近访问的几个月；
+    # 修改直接在同一连接上提交（WAL + synchronous=NORMAL，不做 fsync）。
+    # 任务不全在内存中，搜索索引推迟到第一次搜索时建立
+    loads_on_demand = True
+
+    def __init__(self, conn, cached_months=6):
+        self.conn = conn
+        self.cached_months = cached_months
+        self._months = collections.OrderedDict()
+        # 月份 -> {日期: 任务数}；只有几十个整数，全部保留，修改时按月失效
+        self._day_counts = {}
+        self._count = conn.execute('SELECT COUNT(*) FROM tasks').fetchone()[0]
+        # 其他连接（如命令行进程）提交修改后 data_version 会变化，本连接自己的提交不会
+        self._data_version = conn.execute('PRAGMA data_version').fetchone()[0]
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        cursor = self.conn.execute(f'SELECT {TASK_COLUMNS} FROM tasks ORDER BY seq')
+        return (_row_to_task(row) for row in cursor)
+
+    def __contains__(self, task_id):
+        return self.conn.execute('SELECT 1 FROM tasks WHERE id = ?', (task_id,)).fetchone() is not None
+
+    def _month(self, month):
+        # 某个月按日期分组的任务；未缓存时用一次范围查询加载
+        if month in self._months:
+            self._months.move_to_end(month)
+            return self._months[month]
+
+        by_date = {}
+        cursor = self.conn.execute(f'SELECT {TASK_COLUMNS} FROM tasks WHERE date >= ? AND date < ? ORDER BY seq',
+                                   _month_range(month))
+        for row in cursor:
+            task = _row_to_task(row)
+            by_date.setdefault(task.date, {})[task.id] = task
+
+        self._months[month] = by_date
+        while len(self._months) > self.cached_months:
+            self._months.popitem(last=False)
+        return by_date
+
+    def _invalidate(self, date):
+        self._months.pop(date[:7], None)
+        self._day_counts.pop(date[:7], None)
+
+    def refresh(self):
+        # 其他连接提交过修改时清空所有缓存，返回是否有变化
+        version = self.conn.execute('PRAGMA data_version').fetchone()[0]
+        if version == self._data_version:
+            return False
+        self._data_version = version
+        self._months.clear()
+        self._day_counts.clear()
+        self._count = self.conn.execute('SELECT COUNT(*) FROM tasks').fetchone()[0]
+        return True
+
+    def get(self, task_id):
+        row = self.conn.execute(f'SELECT {TASK_COLUMNS} FROM tasks WHERE id = ?', (task_id,)).fetchone()
+        if row is None:
+            raise KeyError(task_id)
+        return _row_to_task(row)
+
+    def add(self, task):
+        with self.conn:
+            self.conn.execute('INSERT INTO tasks (date, name, completed, id) VALUES (?, ?, ?, ?)', _task_params(task))
+        self._count += 1
+        self._invalidate(task.date)
+        return task
+
+    def add_many(self, tasks, lookup_size=500):
+        # 一个事务插入一批任务，跳过 id 已存在的任务，返回实际添加的任务
+        tasks = list(tasks)
+        existing = set()
+        ids = [task.id for task in tasks]
+        for start in range(0, len(ids), lookup_size):
+            chunk = ids[start:start + lookup_size]
+            cursor = self.conn.execute(f"SELECT id FROM tasks WHERE id IN ({', '.join('?' * len(chunk))})", chunk)
+            existing.update(row[0] for row in cursor)
+
+        added = []
+        for task in tasks:
+            if task.id not in existing:
+                existing.add(task.id)
+                added.append(task)
+        with self.conn:
+            self.conn.executemany('INSERT INTO tasks (date, name, completed, id) VALUES (?, ?, ?, ?)', map(_task_params, added))
+
+        self._count += len(added)
+        for date in {task.date for task in added}:
+            self._invalidate(date)
+        return added
+
+    def update(self, task_id, **fields):
+        task = self.get(task_id)
+        old_date = task.date
+        set_fields(task, fields)
+        with self.conn:
+            self.conn.execute('UPDATE tasks SET date = ?, name = ?, completed = ? WHERE id = ?', _task_params(task))
+        self._invalidate(old_date)
+        self._invalidate(task.date)
+        return task
+
+    def remove(self, task_id):
+        task = self.get(task_id)
+        with self.conn:
+            self.conn.execute('DELETE FROM tasks WHERE id = ?', (task_id,))
+        self._count -= 1
+        self._invalidate(task.date)
+        return task
+
+    def page(self, offset, limit):
+        cursor = self.conn.execute(f'SELECT {TASK_COLUMNS} FROM tasks ORDER BY seq LIMIT ? OFFSET ?', (limit, offset))
+        return [_row_to_task(row) for row in cursor]
+
+    def iter_range(self, start=None, end=None):
+        # 游标逐行读取，导出大量任务时不会一次载入内存
+        cursor = self.conn.execute(f'SELECT {TASK_COLUMNS} FROM tasks WHERE date >= ? AND date <= ? ORDER BY seq',
+                                   (start or '', end or '9999-99-99'))
+        return (_row_to_task(row) for row in cursor)
+
+    def tasks_for_date(self, date_str):
+        return list(self._month(date_str[:7]).get(date_str, {}).values())
+
+    def has_tasks(self, date_str):
+        return date_str in self._month(date_str[:7])
+
+    def month_count(self, year, month):
+        month = f"{year:04d}-{month:02d}"
+        if month in self._months:
+            return sum(len(day) for day in self._months[month].values())
+        return self.conn.execute('SELECT COUNT(*) FROM tasks WHERE date >= ? AND date < ?', _month_range(month)).fetchone()[0]
+
+    def day_counts(self, year, month):
+        # 用分组计数查询，不把整月的任务读进缓存，年视图一次取 12 个月也很快
+        month = f"{year:04d}-{month:02d}"
+        counts = self._day_counts.get(month)
+        if counts is None:
+            cursor = self.conn.execute('SELECT date, COUNT(*) FROM tasks WHERE date >= ? AND date < ? GROUP BY date',
+                                       _month_range(month))
+            counts = self._day_counts[month] = dict(cursor.fetchall())
+        return counts
+
+    def prefetch(self, months):
+        # 按月的范围查询只需几毫秒，不预读
+        pass
+
+
+class SqliteStore:
+    # 与 JournalStore 对应的 SQLite 存储：
+    # 任务的修改已由 SqliteTaskRepository 直接提交，这里只负责设置；
+    # 由后台持久化线程调用时使用它自己的连接。
+    snapshot_tasks = False
+    repository_commits = True
+
+    def __init__(self, db_file, import_from=None):
+        self.db_file = db_file
+        # 与 JSON 数据文件的统计缓存区分开，两者的位置含义不同
+        self.stats_cache_file = db_file + '.stats.json'
+        self.import_from = import_from
+        # 与其他存储一样提供进程间的锁，命令行的“读取-修改-追加”在锁内完成
+        self.lock = FileLock(db_file + '.lock')
+        self.pending = 0
+        self.compact_threshold = float('inf')
+        self._conn = None
+        # 最近加载的任务仓库：它自己的提交不改变它所在连接的 data_version，检查时用这个连接
+        self._repository = None
+        self._data_version = None
+        self._changed = False
+
+    def load_repository(self):
+        # 数据库不存在而旧的 JSON 数据文件存在时，自动导入一次
+        if not os.path.exists(self.db_file) and self.import_from and os.path.exists(self.import_from):
+            import_json(self.import_from, self.db_file)
+        conn = connect(self.db_file)
+        self._repository = SqliteTaskRepository(conn)
+        self._data_version = self._repository._data_version
+        return self._repository, load_settings(conn)
+
+    def _connection(self):
+        if self._conn is None:
+            self._conn = connect(self.db_file)
+        return self._conn
+
+    def append_many(self, records):
+        settings = None
+        for op, fields in records:
+            if op == 'settings':
+                settings = fields['settings']
+        if settings is not None:
+            save_settings(self._connection(), settings)
+            self._note_own_commit()
+        return False
+
+    def append(self, op, **fields):
+        return self.append_many([(op, fields)])
+
+    def compact(self, tasks, settings, external_seq=None):
+        save_settings(self._connection(), settings)
+        self._note_own_commit()
+        return True
+
+    def watch_paths(self):
+        # 其他进程的提交先写入 WAL 文件
+        return [self.db_file, self.db_file + '-wal']
+
+    def _version(self):
+        conn = self._repository.conn if self._repository is not None else self._connection()
+        return conn.execute('PRAGMA data_version').fetchone()[0]
+
+    def _note_own_commit(self):
+        # 本进程在其他连接上的提交（设置、会话日志）之后记下新的版本，不当作其他进程的修改
+        self._data_version = self._version()
+
+    def check(self):
+        # 多个进程共用数据库时由 SQLite 的事务保证一致，这里只发现其他进程的提交：
+        # 在任务仓库的连接上比较 data_version，界面自己的任务修改不会触发刷新
+        version = self._version()
+        if self._data_version is not None and version != self._data_version:
+            self._changed = True
+        self._data_version = version
+
+    def take_external(self):
+        # 没有需要合并的日志记录，有其他连接的提交时返回一条 {'op': 'refresh'}
+        if not self._changed:
+            return []
+        self._changed = False
+        return [{'op': 'refresh'}]
+
+    def open_session_log(self):
+        return SqliteSessionLog(self.db_file, on_commit=self._note_own_commit)
+
+
+class SqliteSessionLog:
+    # 与 SessionLog 接口相同，会话保存在 sessions 表中，位置为自增 id。
+    # 追加（后台线程）和读取（界面线程）共用一个连接，第一次使用时才连接并建表；
+    # 两个线程的使用由线程锁串行，读取时先取出全部行再逐个产出
+    def __init__(self, db_file, on_commit=None):
+        self.db_file = db_file
+        self.on_commit = on_commit
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connection(self):
+        # 调用方持有 _lock
+        if self._conn is None:
+            self._conn = connect(self.db_file)
+        return self._conn
+
+    def append(self, session):
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                cursor = conn.execute('INSERT INTO sessions (start, end, elapsed, mode, completed, task_id) VALUES (?, ?, ?, ?, ?, ?)',
+                                      (session['start'], session['end'], session['elapsed'], session['mode'],
+                                       int(session['completed']), session.get('task_id')))
+        if self.on_commit:
+            self.on_commit()
+        return cursor.lastrowid
+
+    def read_since(self, position=0):
+        with self._lock:
+            rows = self._connection().execute('SELECT id, start, end, elapsed, mode, completed, task_id FROM sessions '
+                                              'WHERE id > ? ORDER BY id', (position,)).fetchall()
+        for row in rows:
+            yield row[0], {'start': row[1], 'end': row[2], 'elapsed': row[3], 'mode': row[4],
+                           'completed': bool(row[5]), 'task_id': row[6]}
+
+
+def import_json(json_file, db_file, batch_size=10000):
+    # 把 pomodoro_data.json（及其日志）一次性导入 SQLite 数据库，返回导入的任务数
+    tasks, settings = JournalStore(json_file).load()
+    conn = connect(db_file)
+    try:
+        with conn:
+            for start in range(0, len(tasks), batch_size):
+                conn.executemany('INSERT OR REPLACE INTO tasks (id, date, name, completed) VALUES (?, ?, ?, ?)',
+                                 [(t['id'], t['date'], t['name'], int(t['completed'])) for t in tasks[start:start + batch_size]])
+        save_settings(conn, settings)
+    finally:
+        conn.close()
+    return len(tasks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="把 JSON 数据文件导入 SQLite 数据库")
+    parser.add_argument('json_file', nargs='?', default='pomodoro_data.json')
+    parser.add_argument('db_file', nargs='?', default='pomodoro_data.db')
+    args = parser.parse_args()
+    count = import_json(args.json_file, args.db_file)
+    print(f"已导入 {count} 个任务到 {args.db_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,612 @@
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+
+from pomodoro_lock import FileLock
+from pomodoro_tasks import Task, TaskRepository, ensure_task_ids
+
+DEFAULT_SETTINGS = {
+    'work_time': 1500,
+    'short_break': 300,
+    'long_break': 900,
+    'reminder': 'none'
+}
+
+BACKENDS = ('json', 'sqlite', 'shards', 'binary')
+
+
+def open_store(backend='json', data_file=None):
+    # 按后端名称创建存储；SQLite、分片和二进制快照后端按需导入，首次打开时自动导入同名的 JSON 数据文件
+    if backend == 'sqlite':
+        from pomodoro_sqlite import SqliteStore
+        data_file = data_file or 'pomodoro_data.db'
+        return SqliteStore(data_file, import_from=os.path.splitext(data_file)[0] + '.json')
+    if backend == 'shards':
+        # data_file 为分片目录
+        from pomodoro_shards import ShardedStore
+        data_file = data_file or 'pomodoro_data.shards'
+        return ShardedStore(data_file, import_from=os.path.splitext(data_file.rstrip('/\\'))[0] + '.json')
+    if backend == 'binary':
+        from pomodoro_binary import BinaryStore
+        data_file = data_file or 'pomodoro_data.pmdb'
+        return BinaryStore(data_file, import_from=os.path.splitext(data_file)[0] + '.json')
+    return JournalStore(data_file or 'pomodoro_data.json')
+
+
+def _record_task_id(tasks, record):
+    if 'id' in record:
+        return record['id']
+    # 旧版本日志按列表位置记录任务，这里换算成 id（字典保持插入顺序，与原列表一致）
+    return list(tasks)[record['index']]
+
+
+def apply_record(tasks, settings, record):
+    # 将一条日志记录应用到内存数据上，tasks 为 id -> 任务 的字典。
+    # 修改、完成、删除的任务已经不存在时跳过这条记录（例如命令行读取任务之后、
+    # 追加记录之前，界面进程删除了它），不能因为一条过时的记录而无法加载
+    op = record['op']
+    if op == 'add':
+        task = record['task']
+        ensure_task_ids([task])
+        tasks[task['id']] = task
+    elif op == 'add_many':
+        ensure_task_ids(record['tasks'])
+        for task in record['tasks']:
+            tasks[task['id']] = task
+    elif op == 'edit':
+        task_id = _record_task_id(tasks, record)
+        if task_id in tasks:
+            task = record['task']
+            task['id'] = task_id
+            tasks[task_id] = task
+    elif op == 'complete':
+        task = tasks.get(_record_task_id(tasks, record))
+        if task is not None:
+            task['completed'] = record['completed']
+    elif op == 'delete':
+        tasks.pop(_record_task_id(tasks, record), None)
+    elif op == 'settings':
+        settings.clear()
+        settings.update(record['settings'])
+
+
+def apply_to_repository(task_repo, record, search_index=None):
+    # 把一条日志记录应用到任务仓库（以及搜索索引）上，返回涉及的日期；设置记录由调用方处理。
+    # 与 apply_record 相同，修改、完成、删除已经不存在的任务时跳过，不会把删除的任务加回来
+    op = record['op']
+    dates = set()
+    if op in ('add', 'add_many'):
+        tasks = [record['task']] if op == 'add' else record['tasks']
+        for task in task_repo.add_many([Task.from_dict(task) for task in tasks]):
+            if search_index is not None:
+                search_index.add(task)
+            dates.add(task.date)
+        return dates
+
+    task_id = record.get('id')
+    if op not in ('edit', 'complete', 'delete') or task_id is None or task_id not in task_repo:
+        return dates
+    dates.add(task_repo.get(task_id).date)
+    if op == 'edit':
+        task = Task.from_dict(record['task'])
+        task = task_repo.update(task_id, title=task.title, date=task.date, completed=task.completed)
+        if search_index is not None:
+            search_index.update(task)
+        dates.add(task.date)
+    elif op == 'complete':
+        task_repo.update(task_id, completed=record['completed'])
+    else:
+        task_repo.remove(task_id)
+        if search_index is not None:
+            search_index.remove(task_id)
+    return dates
+
+
+def merge_record(tasks, settings, record):
+    # 把本机的一条日志记录合并到外部版本的数据上，返回是否没有冲突：
+    # 只改写记录涉及的字段，外部版本对其他字段的修改得以保留；
+    # 任务在外部版本中已被删除时放弃这条修改，已存在的同 id 任务以外部版本为准
+    op = record['op']
+    if op in ('add', 'add_many'):
+        for task in [record['task']] if op == 'add' else record['tasks']:
+            tasks.setdefault(task['id'], task)
+        return True
+    if op == 'settings':
+        apply_record(tasks, settings, record)
+        return True
+
+    task_id = record.get('id')
+    if op == 'delete':
+        tasks.pop(task_id, None)
+        return True
+    task = tasks.get(task_id)
+    if task is None:
+        return False
+    if op == 'edit':
+        task['name'] = record['task']['name']
+        task['date'] = record['task']['date']
+    elif op == 'complete':
+        task['completed'] = record['completed']
+    return True
+
+
+class JournalStore:
+    # 快照 + 追加日志的存储引擎：
+    # 每次修改只向日志末尾追加一行记录，记录数达到阈值后再压缩成一个新的快照。
+    # 快照中的 journal_seq 表示已经合并进快照的最后一条记录，
+    # 因此即使在替换快照和清空日志之间崩溃，重放时也不会重复应用记录。
+    # snapshot_tasks 表示压缩时调用方要提交全部任务（为 False 的存储收到 None，
+    # 自己保存或重建任务）；repository_commits 表示任务的修改由仓库直接提交（SQLite），
+    # 不必再追加日志记录。
+    #
+    # 多个进程（如界面和命令行）可以同时使用同一个数据文件：所有读写都在锁文件的
+    # 排他锁内进行，追加前先读入其他进程追加的记录，序号因此不会重复。
+    # 其他进程的记录通过 take_external() 交给调用方；压缩时把调用方尚未应用的记录
+    # 合并进快照。数据文件被其他进程替换（压缩）后，调用方需要重新加载。
+    #
+    # 每个快照有一个随机的 version，日志第一行记录它对应的快照版本。数据文件变化而
+    # 日志仍属于旧版本，说明文件是被外部替换的（如同步工具带来另一台机器上的版本），
+    # 这时把本机日志中的修改逐条合并到新文件上（见 merge_record）再写回。
+    # 数据文件在运行中被删除时不重新加载（那会得到空的任务列表），而是通知调用方
+    # 用内存中的数据重新写一个快照。
+    snapshot_tasks = True
+    repository_commits = False
+
+    def __init__(self, data_file, compact_threshold=500):
+        self.data_file = data_file
+        self.journal_file = data_file + '.journal'
+        self.stats_cache_file = os.path.splitext(data_file)[0] + '.stats.json'
+        self.compact_threshold = compact_threshold
+        self.lock = FileLock(data_file + '.lock')
+        self.seq = 0
+        self.pending = 0
+        # 已经读到的日志位置；None 表示没有加载过数据，追加时只需接着最后一个序号
+        self.journal_offset = None
+        # 加载或压缩后数据文件的 (inode, 大小, 修改时间)，用来发现其他进程的压缩
+        self.file_state = None
+        # 其他进程追加、调用方可能还没有应用的记录，以及其中还没有交给调用方的部分
+        self.external = []
+        self.unseen = []
+        self.reload_needed = False
+        # 数据文件在加载后被删除，以及是否已经通知调用方恢复
+        self.missing = False
+        self.restore_needed = False
+        # 加载或写入的快照版本，以及最近一次合并外部版本的 (合并的记录数, 冲突数)
+        self.version = None
+        self.merge_result = None
+
+    def load(self):
+        with self.lock:
+            tasks, settings, migrated = self._read()
+            task_list = list(tasks.values())
+            # 新分配的 id 必须立即落盘，否则下次加载会得到不同的 id
+            if migrated:
+                self._compact(task_list, settings)
+        return task_list, settings
+
+    def load_repository(self):
+        tasks, settings = self.load()
+        return TaskRepository(Task.from_dict(task) for task in tasks), settings
+
+    def open_session_log(self):
+        from pomodoro_sessions import SessionLog
+        return SessionLog(os.path.splitext(self.data_file)[0] + '.sessions.jsonl')
+
+    def watch_paths(self):
+        return [self.data_file, self.journal_file, os.path.splitext(self.data_file)[0] + '.sessions.jsonl']
+
+    def check(self):
+        # 读入其他进程或外部工具的修改（由文件监视触发），结果通过 take_external() 取得
+        with self.lock:
+            self._sync()
+
+    def take_external(self):
+        # 返回其他进程追加、调用方还没有见过的记录；需要重新加载时只返回一条
+        # {'op': 'reload'}，合并过外部版本时带上 merged 和 conflicts 两个计数；
+        # 数据文件被删除时返回一次 {'op': 'restore'}，调用方应写入完整快照
+        if self.restore_needed:
+            self.restore_needed = False
+            return [{'op': 'restore'}]
+        if self.reload_needed:
+            self.unseen = []
+            record = {'op': 'reload'}
+            if self.merge_result:
+                record['merged'], record['conflicts'] = self.merge_result
+                self.merge_result = None
+            return [record]
+        records, self.unseen = self.unseen, []
+        return records
+
+    def _file_state(self):
+        try:
+            st = os.stat(self.data_file)
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+    def _read(self):
+        # 读取快照并重放日志，返回 (id -> 任务, 设置, 是否迁移了旧数据)；调用方持有锁
+        task_list = []
+        settings = dict(DEFAULT_SETTINGS)
+        snapshot_seq = 0
+
+        data = self._read_snapshot()
+        if data is not None:
+            task_list = data.get('tasks', [])
+            settings = data.get('settings', settings)
+            snapshot_seq = data.get('journal_seq', 0)
+            self.version = data.get('version')
+
+        migrated = ensure_task_ids(task_list)
+        tasks = {task['id']: task for task in task_list}
+
+        for record in self._replay_records(snapshot_seq):
+            if 'index' in record or ('task' in record and 'id' not in record['task']):
+                migrated = True
+            apply_record(tasks, settings, record)
+
+        return tasks, settings, migrated
+
+    def _replay_records(self, snapshot_seq):
+        # 读完快照后重置读取状态，返回日志中快照之后的记录；调用方持有锁
+        self.seq = snapshot_seq
+        self.journal_offset = 0
+        self.file_state = self._file_state()
+        self.external = []
+        self.unseen = []
+        self.reload_needed = False
+        records = [record for record in self._read_journal() if record['seq'] > snapshot_seq]
+        self.pending = len(records)
+        return records
+
+    def _read_snapshot(self):
+        # 快照的全部内容 {'version', 'tasks', 'settings', 'journal_seq'}，文件不存在时返回 None
+        if not os.path.exists(self.data_file):
+            return None
+        with open(self.data_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _snapshot_seq(self):
+        data = self._read_snapshot()
+        return 0 if data is None else data.get('journal_seq', 0)
+
+    def _write_snapshot(self, data):
+        # 先写临时文件再原子替换，保证快照文件始终完整
+        tmp_file = self.data_file + '.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.data_file)
+
+    def _read_journal(self):
+        # 从 journal_offset 读到日志末尾，返回读到的记录并前移位置。
+        # 崩溃时可能留下写了一半的最后一行，丢弃它及其之后的内容（调用方持有锁，
+        # 不会有其他进程正在写入）
+        records = []
+        try:
+            f = open(self.journal_file, 'r+b')
+        except FileNotFoundError:
+            return records
+        with f:
+            f.seek(self.journal_offset)
+            good_offset = self.journal_offset
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                good_offset += len(line)
+                records.append(record)
+                self.seq = max(self.seq, record['seq'])
+
+            if good_offset != f.seek(0, os.SEEK_END):
+                f.truncate(good_offset)
+        self.journal_offset = good_offset
+        return records
+
+    def _last_seq(self):
+        # 日志中最后一条记录的序号，只读取文件末尾；日志为空时取快照中的 journal_seq
+        try:
+            with open(self.journal_file, 'rb') as f:
+                size = f.seek(0, os.SEEK_END)
+                f.seek(max(0, size - 65536))
+                lines = f.read().split(b'\n')
+        except FileNotFoundError:
+            size, lines = 0, [b'']
+        # 最后一个元素是换行之后的内容：正常为空，否则是写了一半的行；
+        # 第一个元素可能只是某一行的后半段
+        for line in reversed(lines[:-1]):
+            try:
+                seq = json.loads(line)['seq']
+            except ValueError:
+                continue
+            self.journal_offset = size - len(lines[-1])
+            return seq
+        if size:
+            # 末尾一行过长：从头扫描整个日志
+            self.journal_offset = 0
+            self._read_journal()
+            return self.seq
+        self.journal_offset = 0
+        return self._snapshot_seq()
+
+    def _sync(self):
+        # 读入其他进程在本进程上次读写之后追加的记录；调用方持有锁
+        if self.journal_offset is None:
+            self.seq = self._last_seq()
+            self._read_journal()
+            self.file_state = self._file_state()
+            return
+
+        state = self._file_state()
+        if state is None and self.file_state is not None:
+            # 数据文件被删除：保留当前状态，等调用方压缩时重新写出
+            if not self.missing:
+                self.missing = True
+                self.restore_needed = True
+            return
+        self.missing = False
+
+        if state != self.file_state and self.version is not None and self._journal_version() == self.version:
+            self._merge_replaced()
+            return
+
+        if state != self.file_state or self._journal_size() < self.journal_offset:
+            # 其他进程压缩过：新快照已经包含它读到的所有记录，调用方需要重新加载
+            self.reload_needed = True
+            self.file_state = self._file_state()
+            self.journal_offset = 0
+            self.external = []
+            self.pending = len(self._read_journal())
+            return
+
+        records = self._read_journal()
+        self.external.extend(records)
+        self.unseen.extend(records)
+        self.pending += len(records)
+
+    def _journal_version(self):
+        # 日志第一行记录的快照版本
+        try:
+            with open(self.journal_file, 'rb') as f:
+                record = json.loads(f.readline())
+        except (OSError, ValueError):
+            return None
+        return record.get('version') if record.get('op') == 'base' else None
+
+    def _journal_size(self):
+        try:
+            return os.path.getsize(self.journal_file)
+        except FileNotFoundError:
+            return 0
+
+    def _merge_replaced(self):
+        # 数据文件被外部替换，日志中是本机自上个版本以来的全部修改（包括其他本机进程的）：
+        # 读取新文件，按顺序合并这些修改后写成新的快照；调用方持有锁
+        self.journal_offset = 0
+        records = [record for record in self._read_journal() if record['op'] != 'base']
+        data = self._read_snapshot()
+        task_list = data.get('tasks', [])
+        ensure_task_ids(task_list)
+        tasks = {task['id']: task for task in task_list}
+        settings = data.get('settings', dict(DEFAULT_SETTINGS))
+
+        conflicts = sum(not merge_record(tasks, settings, record) for record in records)
+        # 新快照的序号要大于两边已经用过的序号
+        self.seq = max(self.seq, data.get('journal_seq', 0))
+        self._compact(tasks.values(), settings)
+        self.external = []
+        self.unseen = []
+        self.reload_needed = True
+        self.merge_result = (len(records) - conflicts, conflicts)
+
+    def append(self, op, **fields):
+        # 追加一条记录，返回是否需要压缩
+        return self.append_many([(op, fields)])
+
+    def append_many(self, records):
+        # 一次写入多条 (op, fields) 记录，只打开文件和 fsync 一次
+        with self.lock:
+            self._sync()
+            seq = self.seq
+            lines = []
+            for op, fields in records:
+                seq += 1
+                record = {'seq': seq, 'op': op}
+                record.update(fields)
+                lines.append(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n')
+
+            with open(self.journal_file, 'ab') as f:
+                start = f.tell()
+                try:
+                    f.write(''.join(lines).encode('utf-8'))
+                    f.flush()
+                    os.fsync(f.fileno())
+                except Exception:
+                    # 写入失败时截掉可能写了一半的内容，避免后续记录接在残缺行之后
+                    try:
+                        f.truncate(start)
+                    except OSError:
+                        pass
+                    raise
+                self.journal_offset = f.tell()
+
+            self.seq = seq
+            self.pending += len(lines)
+            return self.pending >= self.compact_threshold
+
+    def compact(self, tasks, settings, external_seq=None):
+        # external_seq 为调用方已经应用过的其他进程记录的最大序号，
+        # 序号更大的其他进程记录在写快照前合并进去。
+        # 数据文件已被其他进程替换时不写快照：本进程的修改都已追加到日志中，
+        # 磁盘上的数据是完整的，返回 False，由调用方重新加载后再压缩
+        with self.lock:
+            self._sync()
+            if self.reload_needed:
+                return False
+
+            # 调用方还没有应用的记录在它确认之前一直保留，之后的每次压缩都要合并
+            unapplied = [record for record in self.external if record['seq'] > (external_seq or 0)]
+            if unapplied:
+                merged = {task['id']: task for task in tasks}
+                settings = dict(settings)
+                for record in unapplied:
+                    apply_record(merged, settings, record)
+                tasks = merged.values()
+
+            self._compact(tasks, settings)
+            self.external = unapplied
+            return True
+
+    def _compact(self, tasks, settings):
+        version = uuid.uuid4().hex
+        data = {
+            'version': version,
+            'tasks': list(tasks),
+            'settings': settings,
+            'journal_seq': self.seq
+        }
+        self._write_snapshot(data)
+
+        # 快照已包含所有记录，日志只保留一行记录当前序号和快照版本，
+        # 其他进程追加时不必读取整个快照就能接着编号
+        base = json.dumps({'seq': self.seq, 'op': 'base', 'version': version}) + '\n'
+        with open(self.journal_file, 'w', encoding='utf-8') as f:
+            f.write(base)
+        self.journal_offset = len(base)
+        self.file_state = self._file_state()
+        self.version = version
+        self.external = []
+        self.pending = 0
+
+
+class PersistenceWorker:
+    # 后台持久化线程：界面线程只把日志记录或快照放入队列，
+    # 线程在 debounce 秒的窗口内收集连续的修改，合并成一次写入。
+    # 快照之前的记录同样追加到日志中：数据文件被其他进程替换时快照不会写入，
+    # 修改只能靠日志保存。
+    # 写入失败时保留这批数据稍后重试，并通过 on_error 回调报告错误；
+    # 每次写入后把其他进程追加的记录交给 on_external 回调。两个回调都在后台线程中调用。
+    def __init__(self, store, debounce=0.5, on_error=None, on_external=None):
+        self.store = store
+        self.debounce = debounce
+        self.on_error = on_error
+        self.on_external = on_external
+        # 日志记录数达到压缩阈值后置位，由界面线程提交一份快照
+        self.needs_snapshot = False
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='pomodoro-persistence', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def submit(self, op, **fields):
+        # fields 提交后由后台线程序列化，调用方之后不能再修改其中的对象
+        # （任务用 to_dict() 生成新的字典，设置传入副本）
+        self._queue.put(('record', (op, fields)))
+
+    def submit_call(self, func, *args):
+        # 在后台线程中按提交顺序执行其他写入操作（如会话日志），失败时只报告不重试
+        self._queue.put(('call', (func, args)))
+
+    def submit_check(self):
+        # 数据文件可能被其他进程修改过（由文件监视触发）：没有修改要写时也检查一次，
+        # 发现的修改同样交给 on_external；防抖窗口内的多次检查合并为一次
+        self._queue.put(('check', None))
+
+    def submit_snapshot(self, tasks, settings, external_seq=None):
+        self.needs_snapshot = False
+        self._queue.put(('snapshot', (tasks, settings, external_seq)))
+
+    def flush(self, timeout=None):
+        # 等待队列中已有的修改全部写入磁盘
+        done = threading.Event()
+        self._queue.put(('flush', done))
+        return done.wait(timeout)
+
+    def close(self, timeout=None):
+        done = threading.Event()
+        self._queue.put(('close', done))
+        done.wait(timeout)
+
+    def _run(self):
+        items = []
+        while True:
+            # 有写入失败的数据时定期重试，否则一直等待新的修改
+            try:
+                items.append(self._queue.get(timeout=max(self.debounce, 1.0) if items else None))
+            except queue.Empty:
+                pass
+
+            deadline = time.monotonic() + self.debounce
+            while items and items[-1][0] not in ('flush', 'close'):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    items.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            waiters = [payload for kind, payload in items if kind in ('flush', 'close')]
+            closing = any(kind == 'close' for kind, _ in items)
+            calls = [payload for kind, payload in items if kind == 'call']
+            check = any(kind == 'check' for kind, _ in items)
+            items = self._write([item for item in items if item[0] in ('record', 'snapshot')], check)
+            for func, args in calls:
+                try:
+                    func(*args)
+                except Exception as e:
+                    if self.on_error:
+                        self.on_error(e)
+
+            for done in waiters:
+                done.set()
+            if closing:
+                return
+
+    def _write(self, items, check=False):
+        # 按提交顺序写入一批修改：最后一个快照之前的记录、快照、快照之后的记录；
+        # 更早的快照已被最后一个取代。写入前会先读入其他进程的修改，
+        # 因此只有 check 而没有修改时才单独检查。返回写入失败、需要重试的部分
+        snapshots = [i for i, (kind, _) in enumerate(items) if kind == 'snapshot']
+        split = snapshots[-1] if snapshots else len(items)
+        before = [payload for kind, payload in items[:split] if kind == 'record']
+        snapshot = items[split][1] if snapshots else None
+        after = [payload for _, payload in items[split + 1:]]
+
+        try:
+            if check and not items:
+                self.store.check()
+            if before:
+                self._append(before)
+                before = []
+            if snapshot is not None:
+                self.store.compact(*snapshot)
+                snapshot = None
+            if after:
+                self._append(after)
+                after = []
+            return []
+        except Exception as e:
+            if self.on_error:
+                self.on_error(e)
+            retry = [('record', record) for record in before]
+            if snapshot is not None:
+                retry.append(('snapshot', snapshot))
+            return retry + [('record', record) for record in after]
+        finally:
+            if self.on_external:
+                external = self.store.take_external()
+                if external:
+                    self.on_external(external)
+
+    def _append(self, records):
+        if self.store.append_many(records):
+            self.needs_snapshot = True
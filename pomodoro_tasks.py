@@ -0,0 +1,158 @@
+import sys
+import uuid
+
+
+def new_task_id():
+    return uuid.uuid4().hex
+
+
+def set_fields(task, fields):
+    for key, value in fields.items():
+        setattr(task, key, sys.intern(value) if key == 'date' else value)
+
+
+def ensure_task_ids(tasks):
+    # 为旧数据文件中没有 id 的任务补上 id，返回是否发生了迁移
+    migrated = False
+    for task in tasks:
+        if 'id' not in task:
+            task['id'] = new_task_id()
+            migrated = True
+    return migrated
+
+
+class Task:
+    # 单个任务。名称只保存不带日期前缀的部分，日期字符串经过 intern，同一天的任务共用一个对象。
+    # 数据文件中的格式 {'id', 'name': "日期 - 名称", 'completed', 'date'} 只在读写时转换
+    __slots__ = ('id', 'title', 'date', 'completed')
+
+    def __init__(self, title, date, completed=False, task_id=None):
+        self.id = task_id or new_task_id()
+        self.title = title
+        self.date = sys.intern(date)
+        self.completed = completed
+
+    def __repr__(self):
+        return f"Task({self.title!r}, {self.date!r}, completed={self.completed}, task_id={self.id!r})"
+
+    @classmethod
+    def from_dict(cls, data):
+        name = data['name']
+        title = name.split(' - ', 1)[1] if ' - ' in name else name
+        return cls(title, data['date'], bool(data.get('completed', False)), data.get('id'))
+
+    def to_dict(self):
+        return {'id': self.id, 'name': f"{self.date} - {self.title}", 'completed': self.completed, 'date': self.date}
+
+
+class TaskRepository:
+    # 任务仓库：id -> 任务 的字典保存全部任务（保持插入顺序），
+    # 另外维护按日期的索引、按月份的计数和每月各天的计数，增删改时增量更新，查询为 O(1)
+    def __init__(self, tasks=None):
+        self._tasks = {}
+        # 按顺序排列的 id 列表，供分页使用；删除后置空，下次分页时重建
+        self._order = None
+        self._by_date = {}
+        self._month_counts = {}
+        # 月份 -> {日期: 任务数}，供日历热力图按月直接取用
+        self._day_counts = {}
+        for task in tasks or []:
+            self.add(task)
+
+    def __len__(self):
+        return len(self._tasks)
+
+    def __iter__(self):
+        return iter(self._tasks.values())
+
+    def __contains__(self, task_id):
+        return task_id in self._tasks
+
+    def _index(self, task):
+        date = task.date
+        self._by_date.setdefault(date, {})[task.id] = task
+        month = date[:7]
+        self._month_counts[month] = self._month_counts.get(month, 0) + 1
+        day_counts = self._day_counts.setdefault(month, {})
+        day_counts[date] = day_counts.get(date, 0) + 1
+
+    def _unindex(self, task):
+        date = task.date
+        day_tasks = self._by_date[date]
+        del day_tasks[task.id]
+        if not day_tasks:
+            del self._by_date[date]
+        month = date[:7]
+        self._month_counts[month] -= 1
+        if not self._month_counts[month]:
+            del self._month_counts[month]
+        day_counts = self._day_counts[month]
+        day_counts[date] -= 1
+        if not day_counts[date]:
+            del day_counts[date]
+            if not day_counts:
+                del self._day_counts[month]
+
+    def get(self, task_id):
+        return self._tasks[task_id]
+
+    def add(self, task):
+        self._tasks[task.id] = task
+        self._index(task)
+        if self._order is not None:
+            self._order.append(task.id)
+        return task
+
+    def add_many(self, tasks):
+        # 批量添加，跳过 id 已存在的任务，返回实际添加的任务
+        added = []
+        for task in tasks:
+            if task.id not in self._tasks:
+                self.add(task)
+                added.append(task)
+        return added
+
+    def update(self, task_id, **fields):
+        # fields 为 Task 的属性：title、date、completed
+        task = self._tasks[task_id]
+        if 'date' in fields and fields['date'] != task.date:
+            self._unindex(task)
+            set_fields(task, fields)
+            self._index(task)
+        else:
+            set_fields(task, fields)
+        return task
+
+    def remove(self, task_id):
+        task = self._tasks.pop(task_id)
+        self._unindex(task)
+        self._order = None
+        return task
+
+    def page(self, offset, limit):
+        if self._order is None:
+            self._order = list(self._tasks)
+        return [self._tasks[task_id] for task_id in self._order[offset:offset + limit]]
+
+    def iter_range(self, start=None, end=None):
+        # 按添加顺序产出日期在 [start, end] 内的任务，start、end 为 None 时不限
+        for task in self._tasks.values():
+            if (start is None or task.date >= start) and (end is None or task.date <= end):
+                yield task
+
+    def tasks_for_date(self, date_str):
+        return list(self._by_date.get(date_str, {}).values())
+
+    def has_tasks(self, date_str):
+        return date_str in self._by_date
+
+    def month_count(self, year, month):
+        return self._month_counts.get(f"{year:04d}-{month:02d}", 0)
+
+    def day_counts(self, year, month):
+        # 返回内部字典，调用方只读
+        return self._day_counts.get(f"{year:04d}-{month:02d}", {})
+
+    def prefetch(self, months):
+        # 全部任务都在内存中，不需要预读
+        pass
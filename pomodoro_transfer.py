@@ -0,0 +1,211 @@
+import argparse
+import csv
+import datetime
+import itertools
+import json
+import os
+import sys
+
+from pomodoro_tasks import Task
+
+FORMATS = ('csv', 'jsonl')
+CSV_FIELDS = ['id', 'date', 'name', 'completed']
+
+TRUE_VALUES = {'1', 'true', 'yes', 'y', '是', '完成'}
+FALSE_VALUES = {'', '0', 'false', 'no', 'n', '否', '未完成'}
+
+
+def detect_format(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.csv':
+        return 'csv'
+    if ext in ('.jsonl', '.ndjson', '.json'):
+        return 'jsonl'
+    raise ValueError(f"无法识别的文件格式: {path}（支持 .csv 和 .jsonl）")
+
+
+class ImportReport:
+    # 导入结果：成功条数、跳过条数（格式错误和 id 重复），以及前 max_errors 条错误的 (行号, 原因)
+    def __init__(self, max_errors=20):
+        self.imported = 0
+        self.skipped = 0
+        self.duplicates = 0
+        self.errors = []
+        self.max_errors = max_errors
+
+    def error(self, line, message):
+        self.skipped += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append((line, message))
+
+    def add_batch(self, batch, added):
+        self.imported += len(added)
+        self.duplicates += len(batch) - len(added)
+
+    def summary(self):
+        lines = [f"导入 {self.imported} 个任务，跳过 {self.skipped + self.duplicates} 行"]
+        if self.duplicates:
+            lines.append(f"  {self.duplicates} 个任务的 id 已存在")
+        lines.extend(f"  第 {line} 行: {message}" for line, message in self.errors)
+        if self.skipped > len(self.errors):
+            lines.append(f"  ……另有 {self.skipped - len(self.errors)} 行错误未显示")
+        return '\n'.join(lines)
+
+
+def parse_row(row):
+    # 校验一行数据并转换为 Task；格式错误时抛出 ValueError
+    name = str(row.get('name') or '').strip()
+    if not name:
+        raise ValueError("缺少任务名称")
+
+    date_str = str(row.get('date') or '').strip()
+    try:
+        date_str = datetime.date.fromisoformat(date_str).isoformat()
+    except ValueError:
+        raise ValueError(f"日期格式应为 YYYY-MM-DD: {date_str!r}")
+
+    # 也接受数据文件中带日期前缀的名称
+    if name.startswith(f"{date_str} - "):
+        name = name[len(date_str) + 3:]
+
+    completed = row.get('completed', False)
+    if not isinstance(completed, bool):
+        value = str(completed).strip().lower()
+        if value in TRUE_VALUES:
+            completed = True
+        elif value in FALSE_VALUES:
+            completed = False
+        else:
+            raise ValueError(f"无法识别的完成状态: {completed!r}")
+
+    task_id = str(row.get('id') or '').strip() or None
+    return Task(name, date_str, completed, task_id)
+
+
+def _csv_rows(f):
+    reader = csv.DictReader(f)
+    if not reader.fieldnames or not {'name', 'date'} <= set(reader.fieldnames):
+        raise ValueError("CSV 文件的第一行必须是包含 name 和 date 的表头")
+    # 表头占第 1 行
+    for line, row in enumerate(reader, 2):
+        yield line, row
+
+
+def _jsonl_rows(f):
+    for line, text in enumerate(f, 1):
+        if not text.strip():
+            continue
+        try:
+            row = json.loads(text)
+        except ValueError as e:
+            yield line, e
+            continue
+        yield line, row if isinstance(row, dict) else ValueError("每行应为一个 JSON 对象")
+
+
+def read_tasks(path, fmt=None, report=None):
+    # 逐行读取并校验，产出 Task；错误的行记入 report 后跳过。整个文件不会一次读入内存
+    fmt = fmt or detect_format(path)
+    report = report if report is not None else ImportReport()
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        rows = _csv_rows(f) if fmt == 'csv' else _jsonl_rows(f)
+        for line, row in rows:
+            if isinstance(row, Exception):
+                report.error(line, f"无法解析: {row}")
+                continue
+            try:
+                yield parse_row(row)
+            except ValueError as e:
+                report.error(line, str(e))
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def import_tasks(task_repo, path, fmt=None, batch_size=5000, report=None, imported=None):
+    # 分批写入任务仓库（SQLite 每批一个事务）；id 已存在的任务跳过，实际添加的任务追加到 imported 中
+    report = report if report is not None else ImportReport()
+    for batch in batched(read_tasks(path, fmt, report), batch_size):
+        added = task_repo.add_many(batch)
+        report.add_batch(batch, added)
+        if imported is not None:
+            imported.extend(added)
+    return report
+
+
+def task_record(task):
+    return {'id': task.id, 'date': task.date, 'name': task.title, 'completed': task.completed}
+
+
+def export_tasks(tasks, path, fmt=None):
+    # 逐个写出任务，tasks 可以是任务仓库的 iter_range() 等迭代器；返回写出的条数
+    fmt = fmt or detect_format(path)
+    count = 0
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        if fmt == 'csv':
+            writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+            writer.writeheader()
+            for task in tasks:
+                writer.writerow(task_record(task))
+                count += 1
+        else:
+            for task in tasks:
+                f.write(json.dumps(task_record(task), ensure_ascii=False) + '\n')
+                count += 1
+    return count
+
+
+def main():
+    from pomodoro_storage import BACKENDS, open_store
+
+    parser = argparse.ArgumentParser(description="批量导入、导出任务（CSV 或 JSON Lines）")
+    parser.add_argument('--backend', choices=BACKENDS, default='json')
+    parser.add_argument('--data-file')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    import_parser = subparsers.add_parser('import', help="从文件导入任务")
+    import_parser.add_argument('file')
+    import_parser.add_argument('--format', choices=FORMATS)
+    import_parser.add_argument('--batch-size', type=int, default=5000)
+
+    export_parser = subparsers.add_parser('export', help="导出任务到文件")
+    export_parser.add_argument('file')
+    export_parser.add_argument('--format', choices=FORMATS)
+    export_parser.add_argument('--start', help="起始日期 YYYY-MM-DD（含）")
+    export_parser.add_argument('--end', help="结束日期 YYYY-MM-DD（含）")
+    args = parser.parse_args()
+
+    store = open_store(args.backend, args.data_file)
+    task_repo, settings = store.load_repository()
+
+    if args.command == 'import':
+        imported = []
+        try:
+            report = import_tasks(task_repo, args.file, args.format, args.batch_size, imported=imported)
+        except (OSError, ValueError) as e:
+            print(f"导入任务失败: {e}")
+            sys.exit(1)
+        # 追加一条包含全部新任务的记录（分片后端由此写入分片），再压缩一次
+        # （其他进程在导入期间压缩过数据文件时快照不会写入，任务仍在日志中）；
+        # SQLite 的任务在导入时已经逐批提交
+        if report.imported and not store.repository_commits:
+            store.append('add_many', tasks=[task.to_dict() for task in imported])
+            store.compact([task.to_dict() for task in task_repo] if store.snapshot_tasks else None, settings)
+        print(report.summary())
+    else:
+        try:
+            count = export_tasks(task_repo.iter_range(args.start, args.end), args.file, args.format)
+        except (OSError, ValueError) as e:
+            print(f"导出任务失败: {e}")
+            sys.exit(1)
+        print(f"已导出 {count} 个任务到 {args.file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+
+# inotify 事件：文件内容写入、写完关闭、被改名替换（原子替换）、新建和删除
+IN_MODIFY = 0x002
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+EVENT_HEADER = struct.Struct('iIII')
+
+
+def _load_inotify():
+    # Linux 上通过 ctypes 调用 libc 的 inotify，其他平台或调用失败时返回 None
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+
+def _file_state(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+class FileWatcher:
+    # 监视几个文件，发生变化时在监视线程中调用 callback()（不带参数）。
+    # 有 inotify 时监视文件所在的目录（文件被原子替换后仍能收到事件），
+    # 否则每 interval 秒比较一次各文件的 (inode, 大小, 修改时间)。
+    # inotify 下 0.2 秒内接连发生的变化合并为一次回调。
+    def __init__(self, paths, callback, interval=1.0):
+        self.paths = [os.path.abspath(path) for path in paths]
+        self.callback = callback
+        self.interval = interval
+        self.method = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        libc = _load_inotify()
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC) if libc else -1
+        if fd >= 0:
+            for directory in {os.path.dirname(path) for path in self.paths}:
+                if libc.inotify_add_watch(fd, os.fsencode(directory), WATCH_MASK) < 0:
+                    os.close(fd)
+                    fd = -1
+                    break
+        if fd >= 0:
+            self.method = 'inotify'
+            target, args = self._run_inotify, (fd,)
+        else:
+            self.method = 'polling'
+            target, args = self._run_polling, ()
+        self._thread = threading.Thread(target=target, args=args, name='pomodoro-watch', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run_inotify(self, fd):
+        names = {os.fsencode(os.path.basename(path)) for path in self.paths}
+        try:
+            while not self._stop.is_set():
+                # 超时用来定期检查是否已停止
+                if not select.select([fd], [], [], self.interval)[0]:
+                    continue
+                changed = False
+                try:
+                    while True:
+                        changed = self._read_events(fd, names) or changed
+                except BlockingIOError:
+                    pass
+                if changed:
+                    # 等一小段时间，把紧接着的其他事件（如替换快照后改写日志）合并进来
+                    self._stop.wait(min(self.interval, 0.2))
+                    try:
+                        while True:
+                            self._read_events(fd, names)
+                    except BlockingIOError:
+                        pass
+                    self.callback()
+        finally:
+            os.close(fd)
+
+    def _read_events(self, fd, names):
+        data = os.read(fd, 4096)
+        changed = False
+        offset = 0
+        while offset < len(data):
+            _, _, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            changed = changed or name in names
+        return changed
+
+    def _run_polling(self):
+        states = [_file_state(path) for path in self.paths]
+        while not self._stop.wait(self.interval):
+            current = [_file_state(path) for path in self.paths]
+            if current != states:
+                states = current
+                self.callback()
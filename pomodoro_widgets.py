@@ -0,0 +1,267 @@
+import bisect
+import contextlib
+
+
+def _longest_increasing_run(positions):
+    # 最长递增子序列（耐心排序），返回其在 positions 中的下标集合
+    tails = []
+    tail_indexes = []
+    parents = [-1] * len(positions)
+    for i, pos in enumerate(positions):
+        k = bisect.bisect_left(tails, pos)
+        if k == len(tails):
+            tails.append(pos)
+            tail_indexes.append(i)
+        else:
+            tails[k] = pos
+            tail_indexes[k] = i
+        parents[i] = tail_indexes[k - 1] if k > 0 else -1
+
+    result = set()
+    i = tail_indexes[-1] if tail_indexes else -1
+    while i >= 0:
+        result.add(i)
+        i = parents[i]
+    return result
+
+
+class TreeviewReconciler:
+    # 把 Treeview 的顶层行与目标行列表对齐，只发出最少的 insert/item/move/delete 调用。
+    # 保持在最长递增子序列中的行不动，其余行移动到它前一行之后。
+    # op_counts 记录每次渲染实际发出的 Tk 操作数，total_op_counts 为累计值。
+    def __init__(self, tree):
+        self.tree = tree
+        self._order = []
+        self._values = {}
+        self.op_counts = self._empty_counts()
+        self.total_op_counts = self._empty_counts()
+
+    @staticmethod
+    def _empty_counts():
+        return {'insert': 0, 'update': 0, 'move': 0, 'delete': 0}
+
+    def _count(self, op, n=1):
+        self.op_counts[op] += n
+        self.total_op_counts[op] += n
+
+    def reconcile(self, rows):
+        # rows: [(iid, values), ...]，按显示顺序排列
+        self.op_counts = self._empty_counts()
+        new_values = dict(rows)
+
+        removed = [iid for iid in self._order if iid not in new_values]
+        if removed:
+            self.tree.delete(*removed)
+            self._count('delete', len(removed))
+            removed_set = set(removed)
+            self._order = [iid for iid in self._order if iid not in removed_set]
+
+        old_pos = {iid: i for i, iid in enumerate(self._order)}
+        kept = [i for i, (iid, _) in enumerate(rows) if iid in old_pos]
+        stable = {kept[i] for i in _longest_increasing_run([old_pos[rows[k][0]] for k in kept])}
+
+        order = self._order
+        prev = None
+        # prev 在 order 中的位置；只有刚插入或移动过的行才已知，否则按需查找
+        prev_index = -1
+        for i, (iid, values) in enumerate(rows):
+            if iid not in old_pos:
+                if prev_index is None:
+                    prev_index = order.index(prev)
+                index = prev_index + 1
+                self.tree.insert('', index, iid=iid, values=values)
+                order.insert(index, iid)
+                prev_index = index
+                self._count('insert')
+            else:
+                if i not in stable:
+                    if prev_index is None:
+                        prev_index = order.index(prev)
+                    # Tk 的 move 下标按包含该行自身的当前列表计算
+                    self.tree.move(iid, '', prev_index + 1)
+                    old_index = order.index(iid)
+                    del order[old_index]
+                    index = prev_index + 1 if old_index > prev_index else prev_index
+                    order.insert(index, iid)
+                    prev_index = index
+                    self._count('move')
+                else:
+                    prev_index = None
+                if self._values[iid] != values:
+                    self.tree.item(iid, values=values)
+                    self._count('update')
+            prev = iid
+
+        self._values = new_values
+        return self.op_counts
+
+
+class VirtualTreeview:
+    # 虚拟滚动的 Treeview：控件里只放可见区域加少量缓冲的行，
+    # 滚动条由这里按偏移量和总行数驱动，滚动时再通过 fetch(offset, limit) 分页取数据。
+    # 选中的行用 id 记录，滚出可见区域后依然保留。
+    def __init__(self, tree, scrollbar, row_builder, on_select=None, buffer=5):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.row_builder = row_builder
+        self.on_select = on_select
+        self.buffer = buffer
+        self.view = TreeviewReconciler(tree)
+        self.count = 0
+        self.fetch = lambda offset, limit: []
+        self.offset = 0
+        self.visible_rows = int(tree.cget('height'))
+        self.selected_id = None
+        self._ids = []
+
+        tree.configure(yscrollcommand='', selectmode='browse')
+        scrollbar.configure(command=self.yview)
+        tree.bind('<<TreeviewSelect>>', self._on_select)
+        tree.bind('<Configure>', self._on_configure)
+        tree.bind('<MouseWheel>', self._on_mousewheel)
+        tree.bind('<Button-4>', lambda event: self._scroll_units(-3))
+        tree.bind('<Button-5>', lambda event: self._scroll_units(3))
+        tree.bind('<Up>', lambda event: self._move_selection(-1))
+        tree.bind('<Down>', lambda event: self._move_selection(1))
+        tree.bind('<Prior>', lambda event: self._move_selection(-self.visible_rows))
+        tree.bind('<Next>', lambda event: self._move_selection(self.visible_rows))
+
+    def set_source(self, count, fetch, reset_scroll=False):
+        self.count = count
+        self.fetch = fetch
+        if reset_scroll:
+            self.offset = 0
+        self.refresh()
+
+    def refresh(self):
+        self.offset = max(0, min(self.offset, self.count - self.visible_rows))
+        rows = [self.row_builder(item) for item in self.fetch(self.offset, self.visible_rows + self.buffer)]
+        self._ids = [iid for iid, _ in rows]
+        self.view.reconcile(rows)
+        # 窗口内的行总是从第一行开始显示，真正的滚动位置由 offset 表示
+        self.tree.yview_moveto(0)
+
+        if self.selected_id in self._ids and self.tree.selection() != (self.selected_id,):
+            self.tree.selection_set(self.selected_id)
+
+        if self.count:
+            self.scrollbar.set(self.offset / self.count, min(1.0, (self.offset + self.visible_rows) / self.count))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def selection(self):
+        return self.selected_id
+
+    def clear_selection(self):
+        self.selected_id = None
+        if self.tree.selection():
+            self.tree.selection_remove(self.tree.selection())
+
+    def yview(self, *args):
+        # 滚动条回调：('moveto', 比例) 或 ('scroll', 数量, 'units'/'pages')
+        if args[0] == 'moveto':
+            self.offset = int(float(args[1]) * self.count)
+        elif args[0] == 'scroll':
+            amount = int(args[1])
+            if args[2] == 'pages':
+                amount *= self.visible_rows
+            self.offset += amount
+        self.refresh()
+
+    def _scroll_units(self, amount):
+        self.offset += amount
+        self.refresh()
+        return 'break'
+
+    def _on_mousewheel(self, event):
+        # Windows 上 delta 为 120 的倍数，macOS 上为较小的整数
+        step = event.delta // 120 if abs(event.delta) >= 120 else event.delta
+        return self._scroll_units(-3 * step)
+
+    def _on_configure(self, event):
+        children = self.tree.get_children()
+        bbox = self.tree.bbox(children[0]) if children else None
+        if bbox:
+            heading_height, row_height = bbox[1], bbox[3]
+        else:
+            heading_height, row_height = 25, 20
+        visible_rows = max(1, (event.height - heading_height) // row_height)
+        if visible_rows != self.visible_rows:
+            self.visible_rows = visible_rows
+            self.refresh()
+
+    def _on_select(self, event):
+        selected = self.tree.selection()
+        # 行被滚出窗口而删除时 Tk 也会触发该事件，此时保留原来的选中项
+        if selected:
+            self.selected_id = selected[0]
+        if self.on_select:
+            self.on_select(event)
+
+    def _move_selection(self, delta):
+        if not self.count:
+            return 'break'
+        if self.selected_id in self._ids:
+            index = self.offset + self._ids.index(self.selected_id) + delta
+        else:
+            index = self.offset
+        index = max(0, min(index, self.count - 1))
+
+        if index < self.offset:
+            self.offset = index
+        elif index >= self.offset + self.visible_rows:
+            self.offset = index - self.visible_rows + 1
+        self.refresh()
+
+        self.selected_id = self._ids[index - self.offset]
+        self.tree.selection_set(self.selected_id)
+        self.tree.focus(self.selected_id)
+        return 'break'
+
+
+class RenderScheduler:
+    # 合并渲染：修改数据的代码只用 invalidate() 标记哪些视图需要重新渲染，
+    # 由 schedule（Tk 的 after_idle）安排一次空闲时的渲染，每个视图每轮最多渲染一次。
+    # renderers 为 {视图名: render(**options)}，按字典顺序渲染；同一视图多次标记时选项合并，
+    # 例如任意一次要求 reset_scroll=True 就会回到顶部。渲染中再标记的视图在同一轮或下一轮渲染。
+    # batch() 上下文中只标记不安排，退出最外层时才安排一次。
+    def __init__(self, schedule, renderers):
+        self.schedule = schedule
+        self.renderers = renderers
+        self.dirty = {}
+        self.render_counts = dict.fromkeys(renderers, 0)
+        self._scheduled = False
+        self._depth = 0
+
+    def invalidate(self, *views, **options):
+        for view in views:
+            self.dirty.setdefault(view, {}).update(options)
+        self._schedule()
+
+    def _schedule(self):
+        if self.dirty and not self._scheduled and not self._depth:
+            self._scheduled = True
+            self.schedule(self.flush)
+
+    def flush(self):
+        # 立即渲染所有被标记的视图（空闲回调也调用这里）；
+        # 渲染期间不安排新的一轮，排在后面的视图被标记时在本轮渲染，排在前面的留到下一轮
+        self._scheduled = True
+        try:
+            for view, render in self.renderers.items():
+                options = self.dirty.pop(view, None)
+                if options is not None:
+                    self.render_counts[view] += 1
+                    render(**options)
+        finally:
+            self._scheduled = False
+            self._schedule()
+
+    @contextlib.contextmanager
+    def batch(self):
+        self._depth += 1
+        try:
+            yield self
+        finally:
+            self._depth -= 1
+            self._schedule()
@@ -0,0 +1,109 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pomodoro_binary import MappedTaskRepository, Snapshot, date_key, encode_snapshot, open_snapshot, write_snapshot
+from pomodoro_storage import DEFAULT_SETTINGS
+from pomodoro_tasks import Task
+
+
+def summary(tasks):
+    return [(task.title, task.date, task.completed) for task in tasks]
+
+
+class SnapshotTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.tasks = [Task('写报告', '2024-01-15', True), Task('Read paper', '2024-01-01'),
+                      Task('开会', '2024-02-01'), Task('复盘', '2024-01-15')]
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_round_trip_through_a_file(self):
+        path = os.path.join(self.tmpdir.name, 'pomodoro_data.bin')
+        settings = dict(DEFAULT_SETTINGS, work_time=1200)
+        write_snapshot(path, [task.to_dict() for task in self.tasks], settings, journal_seq=7, version='v' * 32)
+        self.assertFalse(os.path.exists(path + '.tmp'))
+
+        snapshot = open_snapshot(path)
+        self.assertEqual((snapshot.count, snapshot.journal_seq, snapshot.version), (4, 7, 'v' * 32))
+        self.assertEqual(snapshot.settings, settings)
+        self.assertEqual(snapshot.to_dicts(), [task.to_dict() for task in self.tasks])
+
+    def test_find_and_date_range_use_the_indexes(self):
+        snapshot = Snapshot(encode_snapshot([task.to_dict() for task in self.tasks], DEFAULT_SETTINGS))
+        for i, task in enumerate(self.tasks):
+            self.assertEqual(snapshot.find(task.id), i)
+        self.assertIsNone(snapshot.find('missing'))
+        # 按日期排列，同一天保持添加顺序
+        self.assertEqual(list(snapshot.date_range(date_key('2024-01-01'), date_key('2024-02-01'))), [1, 0, 3])
+        self.assertEqual(list(snapshot.date_range(date_key('2024-01-02'), date_key('2024-01-15'))), [])
+
+    def test_other_files_are_rejected(self):
+        with self.assertRaises(ValueError):
+            Snapshot(b'JSON' + encode_snapshot([], DEFAULT_SETTINGS)[4:])
+
+
+class MappedTaskRepositoryTest(unittest.TestCase):
+    def setUp(self):
+        self.tasks = [Task('写报告', '2024-01-15'), Task('读论文', '2024-01-01'),
+                      Task('开会', '2024-02-01'), Task('复盘', '2024-01-15')]
+        self.repo = MappedTaskRepository(Snapshot(encode_snapshot([task.to_dict() for task in self.tasks],
+                                                                  DEFAULT_SETTINGS)))
+
+    def test_reads_come_from_the_snapshot(self):
+        self.assertEqual(len(self.repo), 4)
+        self.assertIn(self.tasks[2].id, self.repo)
+        self.assertEqual(self.repo.get(self.tasks[2].id).title, '开会')
+        with self.assertRaises(KeyError):
+            self.repo.get('missing')
+        self.assertEqual(self.repo.day_counts(2024, 1), {'2024-01-01': 1, '2024-01-15': 2})
+        self.assertEqual(summary(self.repo.tasks_for_date('2024-01-15')), summary([self.tasks[0], self.tasks[3]]))
+
+    def test_added_tasks_follow_the_snapshot(self):
+        self.repo.day_counts(2024, 1)
+        added = self.repo.add_many([Task('重复', '2024-01-01', task_id=self.tasks[1].id), Task('新任务', '2024-01-15')])
+        self.assertEqual([task.title for task in added], ['新任务'])
+        self.assertEqual(len(self.repo), 5)
+        self.assertEqual(self.repo.day_counts(2024, 1), {'2024-01-01': 1, '2024-01-15': 3})
+        self.assertEqual([task.title for task in self.repo.tasks_for_date('2024-01-15')], ['写报告', '复盘', '新任务'])
+        self.assertEqual([task.title for task in self.repo.page(3, 10)], ['复盘', '新任务'])
+
+    def test_moving_a_snapshot_task_between_dates(self):
+        self.repo.day_counts(2024, 1)
+        self.repo.update(self.tasks[0].id, date='2024-02-01', completed=True)
+        self.assertEqual(self.repo.day_counts(2024, 1), {'2024-01-01': 1, '2024-01-15': 1})
+        self.assertEqual(self.repo.day_counts(2024, 2), {'2024-02-01': 2})
+        self.assertEqual([task.title for task in self.repo.tasks_for_date('2024-02-01')], ['开会', '写报告'])
+        self.assertTrue(self.repo.get(self.tasks[0].id).completed)
+        self.assertEqual([task.title for task in self.repo.iter_range('2024-02-01', '2024-02-29')], ['写报告', '开会'])
+
+        # 改回原来的日期后回到快照中的位置
+        self.repo.update(self.tasks[0].id, date='2024-01-15')
+        self.assertEqual([task.title for task in self.repo.tasks_for_date('2024-01-15')], ['写报告', '复盘'])
+        self.assertEqual(self.repo.day_counts(2024, 2), {'2024-02-01': 1})
+
+    def test_removed_tasks_disappear_everywhere(self):
+        moved = self.repo.update(self.tasks[3].id, date='2024-03-01')
+        self.repo.remove(moved.id)
+        self.repo.remove(self.tasks[1].id)
+        new = self.repo.add(Task('新任务', '2024-01-01'))
+        self.repo.remove(new.id)
+
+        self.assertEqual(len(self.repo), 2)
+        self.assertNotIn(self.tasks[1].id, self.repo)
+        with self.assertRaises(KeyError):
+            self.repo.get(moved.id)
+        self.assertEqual(self.repo.day_counts(2024, 1), {'2024-01-15': 1})
+        self.assertEqual(self.repo.day_counts(2024, 3), {})
+        self.assertEqual([task.title for task in self.repo.page(0, 10)], ['写报告', '开会'])
+        self.assertEqual([task.title for task in self.repo.page(1, 1)], ['开会'])
+        self.assertEqual([task.title for task in self.repo], ['写报告', '开会'])
+
+
+if __name__ == "__main__":
+    unittest.main()
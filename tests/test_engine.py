@@ -0,0 +1,124 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pomodoro_engine import Countdown, FakeClock, PomodoroEngine
+from pomodoro_storage import DEFAULT_SETTINGS
+
+
+class CountdownTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock(100.0)
+        self.countdown = Countdown(1500, clock=self.clock)
+
+    def test_remaining_follows_the_deadline(self):
+        self.assertFalse(self.countdown.running)
+        self.countdown.start()
+        self.clock.advance(0.25)
+        self.assertEqual(self.countdown.remaining(), 1499.75)
+        # 显示值向上取整
+        self.assertEqual(self.countdown.remaining_seconds(), 1500)
+        self.clock.advance(1500)
+        self.assertEqual(self.countdown.remaining(), 0.0)
+        self.assertTrue(self.countdown.finished())
+
+    def test_late_callbacks_do_not_accumulate_drift(self):
+        self.countdown.start()
+        for _ in range(100):
+            # 每次回调都晚到 0.1 秒
+            self.clock.advance(self.countdown.next_tick_delay() + 0.1)
+        self.assertAlmostEqual(self.clock() - 100.0, 1500 - self.countdown.remaining())
+
+    def test_pause_keeps_the_remaining_time(self):
+        self.countdown.start()
+        self.clock.advance(60)
+        self.countdown.pause()
+        self.clock.advance(3600)
+        self.assertEqual(self.countdown.remaining(), 1440)
+        self.countdown.start()
+        self.clock.advance(40)
+        self.assertEqual(self.countdown.remaining(), 1400)
+
+    def test_reset_while_running_restarts_from_now(self):
+        self.countdown.start()
+        self.clock.advance(10)
+        self.countdown.reset(300)
+        self.assertTrue(self.countdown.running)
+        self.clock.advance(100)
+        self.assertEqual(self.countdown.remaining(), 200)
+
+    def test_next_tick_delay_lands_on_whole_seconds(self):
+        self.countdown.start()
+        self.assertEqual(self.countdown.next_tick_delay(), 1.0)
+        self.clock.advance(0.3)
+        self.assertAlmostEqual(self.countdown.next_tick_delay(), 0.7)
+
+
+class PomodoroEngineTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.engine = PomodoroEngine(dict(DEFAULT_SETTINGS, work_time=1500, short_break=300),
+                                     clock=self.clock, wall_clock=self.clock)
+        self.events = []
+        for event in ('tick', 'phase_end', 'mode_change', 'session'):
+            self.engine.on(event, lambda *args, event=event: self.events.append((event,) + args))
+
+    def sessions(self):
+        return [event[1] for event in self.events if event[0] == 'session']
+
+    def test_tick_reports_the_delay_until_the_next_second(self):
+        self.engine.start()
+        self.clock.advance(0.4)
+        self.assertAlmostEqual(self.engine.tick(), 0.6)
+        self.assertEqual(self.events, [('tick', 1500)])
+
+    def test_finished_phase_switches_mode_and_records_a_session(self):
+        self.engine.task_id = 'task-1'
+        self.engine.start()
+        self.clock.advance(1500)
+        self.assertIsNone(self.engine.tick())
+
+        self.assertEqual(self.engine.mode, 'short-break')
+        self.assertFalse(self.engine.running)
+        self.assertEqual(self.sessions(), [{'start': 0.0, 'end': 1500.0, 'elapsed': 1500.0, 'mode': 'work',
+                                            'completed': True, 'task_id': 'task-1'}])
+        self.assertEqual([event for event in self.events if event[0] != 'session'],
+                         [('tick', 0), ('phase_end', 'work'), ('mode_change', 'short-break'), ('tick', 300)])
+
+    def test_switching_mode_mid_phase_records_an_interruption(self):
+        self.engine.start()
+        self.clock.advance(600)
+        self.engine.set_mode('long-break')
+        self.assertEqual(len(self.sessions()), 1)
+        self.assertEqual((self.sessions()[0]['elapsed'], self.sessions()[0]['completed']), (600.0, False))
+        # 尚未开始的阶段再次切换时不产生记录
+        self.engine.set_mode('work')
+        self.assertEqual(len(self.sessions()), 1)
+
+    def test_advance_jumps_over_whole_phases(self):
+        self.engine.start()
+        self.engine.advance(1500 + 300 + 100)
+        self.assertEqual([(session['mode'], session['completed']) for session in self.sessions()],
+                         [('work', True), ('short-break', True)])
+        self.assertEqual(self.engine.mode, 'work')
+        self.assertEqual(self.engine.remaining_seconds(), 1400)
+        self.assertEqual(self.clock(), 1900.0)
+
+    def test_advance_without_auto_continue_stops_after_the_phase(self):
+        self.engine.start()
+        self.engine.advance(2000, auto_continue=False)
+        self.assertEqual(len(self.sessions()), 1)
+        self.assertFalse(self.engine.running)
+        self.assertEqual(self.engine.remaining_seconds(), 300)
+
+    def test_refresh_duration_uses_the_new_settings(self):
+        self.engine.settings['work_time'] = 600
+        self.engine.refresh_duration()
+        self.assertEqual(self.engine.remaining_seconds(), 600)
+        self.assertEqual(self.events[-1], ('tick', 600))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pomodoro_storage import DEFAULT_SETTINGS, JournalStore
+from pomodoro_tasks import Task
+
+
+class JournalStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.data_file = os.path.join(self.tmpdir.name, 'pomodoro_data.json')
+        self.store = JournalStore(self.data_file, compact_threshold=3)
+        self.store.load()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def journal(self):
+        with open(self.data_file + '.journal', encoding='utf-8') as f:
+            return [json.loads(line) for line in f]
+
+    def test_records_are_replayed_on_load(self):
+        first, second = Task('写报告', '2024-01-01'), Task('读论文', '2024-01-02')
+        self.store.append('add', task=first.to_dict())
+        self.store.append('add', task=second.to_dict())
+        self.store.append('complete', id=first.id, completed=True)
+        self.store.append('settings', settings=dict(DEFAULT_SETTINGS, work_time=1200))
+
+        self.assertEqual([record['seq'] for record in self.journal()], [1, 2, 3, 4])
+        tasks, settings = JournalStore(self.data_file).load()
+        self.assertEqual([(task['id'], task['completed']) for task in tasks], [(first.id, True), (second.id, False)])
+        self.assertEqual(settings['work_time'], 1200)
+
+    def test_append_reports_when_compaction_is_due(self):
+        task = Task('写报告', '2024-01-01')
+        self.assertFalse(self.store.append('add', task=task.to_dict()))
+        self.assertFalse(self.store.append('complete', id=task.id, completed=True))
+        self.assertTrue(self.store.append('complete', id=task.id, completed=False))
+
+    def test_compaction_leaves_a_base_record(self):
+        task = Task('写报告', '2024-01-01')
+        self.store.append('add', task=task.to_dict())
+        self.store.append('complete', id=task.id, completed=True)
+        self.assertTrue(self.store.compact([dict(task.to_dict(), completed=True)], dict(DEFAULT_SETTINGS)))
+
+        with open(self.data_file, encoding='utf-8') as f:
+            snapshot = json.load(f)
+        self.assertEqual(snapshot['journal_seq'], 2)
+        self.assertEqual(self.journal(), [{'seq': 2, 'op': 'base', 'version': snapshot['version']}])
+
+        # 其他进程追加时接着快照之后的序号
+        JournalStore(self.data_file).append('delete', id=task.id)
+        self.assertEqual(self.journal()[-1]['seq'], 3)
+        tasks, _ = JournalStore(self.data_file).load()
+        self.assertEqual(tasks, [])
+
+    def test_records_already_in_the_snapshot_are_not_replayed(self):
+        # 替换快照之后、清空日志之前崩溃：日志中的记录已包含在快照里
+        task = Task('写报告', '2024-01-01')
+        self.store.append('add', task=task.to_dict())
+        self.store.append('edit', id=task.id, task=Task('改过的标题', '2024-01-01', task_id=task.id).to_dict())
+        with open(self.data_file, 'w', encoding='utf-8') as f:
+            json.dump({'version': 'v', 'tasks': [task.to_dict()], 'settings': {}, 'journal_seq': 2}, f)
+
+        tasks, _ = JournalStore(self.data_file).load()
+        self.assertEqual([task['name'] for task in tasks], ['2024-01-01 - 写报告'])
+
+    def test_partial_last_line_is_dropped(self):
+        task = Task('写报告', '2024-01-01')
+        self.store.append('add', task=task.to_dict())
+        with open(self.data_file + '.journal', 'a', encoding='utf-8') as f:
+            f.write('{"seq": 2, "op": "del')
+
+        tasks, _ = JournalStore(self.data_file).load()
+        self.assertEqual(len(tasks), 1)
+        # 截掉残缺的行之后，新记录从下一个序号开始
+        JournalStore(self.data_file).append('delete', id=task.id)
+        self.assertEqual([record['seq'] for record in self.journal()], [1, 2])
+
+    def test_tasks_without_ids_are_migrated(self):
+        with open(self.data_file, 'w', encoding='utf-8') as f:
+            json.dump({'tasks': [{'name': '2024-01-01 - 旧任务', 'completed': False, 'date': '2024-01-01'}]}, f)
+
+        tasks, _ = JournalStore(self.data_file).load()
+        self.assertIn('id', tasks[0])
+        # 新分配的 id 已经写回，再次加载时不变
+        again, _ = JournalStore(self.data_file).load()
+        self.assertEqual(again[0]['id'], tasks[0]['id'])
+
+
+if __name__ == "__main__":
+    unittest.main()
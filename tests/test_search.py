@@ -0,0 +1,74 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pomodoro_search import DeferredSearchIndex, SearchIndex, index_for, query_terms, tokenize
+from pomodoro_tasks import Task, TaskRepository
+
+
+class SearchIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.tasks = [Task('Write report', '2024-01-01'), Task('写周报', '2024-01-02'),
+                      Task('Review the reporting tool', '2024-01-03'), Task('report report 周报', '2024-01-04')]
+        self.index = SearchIndex(self.tasks)
+
+    def ids(self, *positions):
+        return [self.tasks[i].id for i in positions]
+
+    def test_tokenize_splits_words_and_cjk_pairs(self):
+        self.assertEqual(tokenize('Write 周报2'), ['write', '周', '报', '周报', '2'])
+        self.assertEqual(query_terms('rep 写周报 周'), [('rep', True), ('写周', False), ('周报', False), ('周', False)])
+
+    def test_whole_words_rank_above_prefixes(self):
+        # 出现两次的整词得分最高，前缀匹配排在整词之后
+        self.assertEqual(self.index.search('report'), self.ids(3, 0, 2))
+        self.assertEqual(self.index.search('rep'), self.ids(3, 0, 2))
+        self.assertEqual(self.index.search('周报'), self.ids(3, 1))
+        self.assertEqual(self.index.search(''), [])
+
+    def test_every_query_term_must_match(self):
+        self.assertEqual(self.index.search('report 周报'), self.ids(3))
+        self.assertEqual(self.index.search('write missing'), [])
+
+    def test_limit_prefers_newer_tasks_on_ties(self):
+        self.assertEqual(self.index.search('周', limit=1), self.ids(3))
+        self.assertEqual(self.index.search('rep', limit=2), self.ids(3, 0))
+
+    def test_updates_keep_the_original_order(self):
+        renamed = Task('Write summary', '2024-01-01', task_id=self.tasks[0].id)
+        self.index.update(renamed)
+        self.assertEqual(self.index.search('report'), self.ids(3, 2))
+        self.assertEqual(self.index.search('write'), self.ids(0))
+        self.index.remove(self.tasks[3].id)
+        self.assertEqual(self.index.search('周报'), self.ids(1))
+        self.assertEqual(len(self.index), 3)
+
+
+class DeferredSearchIndexTest(unittest.TestCase):
+    def test_index_is_built_from_the_repository_on_first_search(self):
+        repo = TaskRepository([Task('Write report', '2024-01-01')])
+        repo.loads_on_demand = True
+        index = index_for(repo)
+        self.assertIsInstance(index, DeferredSearchIndex)
+
+        # 建立索引之前的修改已经在仓库里，不会重复加入
+        task = repo.add(Task('Read report', '2024-01-02'))
+        index.add(task)
+        self.assertEqual(len(index.search('report')), 2)
+        self.assertEqual(len(index), 2)
+
+        # 建立之后的修改照常生效
+        later = repo.add(Task('Report again', '2024-01-03'))
+        index.add(later)
+        index.remove(task.id)
+        self.assertEqual(index.search('report')[0], later.id)
+        self.assertEqual(len(index), 2)
+
+    def test_in_memory_repository_is_indexed_immediately(self):
+        self.assertIs(type(index_for(TaskRepository())), SearchIndex)
+
+
+if __name__ == "__main__":
+    unittest.main()
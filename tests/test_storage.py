@@ -0,0 +1,288 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pomodoro_cli
+import pomodoro_shards
+import pomodoro_sqlite
+import pomodoro_transfer
+from pomodoro_binary import BinaryStore, open_snapshot
+from pomodoro_shards import ShardedStore
+from pomodoro_sqlite import SqliteStore
+from pomodoro_storage import JournalStore, apply_to_repository
+from pomodoro_tasks import Task, TaskRepository
+
+
+class StaleRecordTest(unittest.TestCase):
+    # 命令行读取任务之后、追加记录之前，界面进程删除了这个任务
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.data_file = os.path.join(self.tmpdir.name, 'pomodoro_data.json')
+        self.task = Task('写报告', '2024-01-01')
+        gui = JournalStore(self.data_file)
+        gui.load()
+        gui.append('add', task=self.task.to_dict())
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_stale_records_are_skipped_on_load(self):
+        cli = JournalStore(self.data_file)
+        cli.load_repository()
+        JournalStore(self.data_file).append('delete', id=self.task.id)
+        cli.append('complete', id=self.task.id, completed=True)
+        cli.append('edit', id=self.task.id, task=self.task.to_dict())
+
+        tasks, _ = JournalStore(self.data_file).load()
+        self.assertEqual(tasks, [])
+
+    def test_stale_records_are_skipped_by_a_running_app(self):
+        # 界面读到其他进程的记录时，本地已经删除的任务不会被修改记录加回来
+        task_repo = TaskRepository()
+        edited = Task('改过的标题', '2024-01-02', task_id=self.task.id)
+        for record in ({'op': 'edit', 'id': self.task.id, 'task': edited.to_dict()},
+                       {'op': 'complete', 'id': self.task.id, 'completed': True},
+                       {'op': 'delete', 'id': self.task.id}):
+            self.assertEqual(apply_to_repository(task_repo, record), set())
+        self.assertEqual(len(task_repo), 0)
+
+        task_repo.add(self.task)
+        dates = apply_to_repository(task_repo, {'op': 'edit', 'id': self.task.id, 'task': edited.to_dict()})
+        self.assertEqual(dates, {'2024-01-01', '2024-01-02'})
+        self.assertEqual(task_repo.get(self.task.id).title, '改过的标题')
+
+    def test_done_holds_the_lock_until_the_record_is_written(self):
+        store = JournalStore(self.data_file)
+        load_repository = store.load_repository
+        deleter = threading.Thread(target=lambda: JournalStore(self.data_file).append('delete', id=self.task.id))
+
+        def load_then_delete():
+            # 命令行读到任务之后，另一个进程立即尝试删除它
+            result = load_repository()
+            deleter.start()
+            deleter.join(0.2)
+            self.assertTrue(deleter.is_alive(), "删除应当等到命令行追加完记录")
+            return result
+
+        store.load_repository = load_then_delete
+        pomodoro_cli.cmd_done(store, argparse.Namespace(id=self.task.id[:8], undo=False))
+        deleter.join()
+
+        with open(self.data_file + '.journal', encoding='utf-8') as f:
+            ops = [json.loads(line)['op'] for line in f]
+        self.assertEqual(ops[-2:], ['complete', 'delete'])
+        tasks, _ = JournalStore(self.data_file).load()
+        self.assertEqual(tasks, [])
+
+
+class DeletedDataFileTest(unittest.TestCase):
+    # 运行中数据文件被删除：不能重新加载成空列表，而是按内存中的数据重新写出
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.data_file = os.path.join(self.tmpdir.name, 'pomodoro_data.json')
+        self.task = Task('写报告', '2024-01-01')
+        self.store = JournalStore(self.data_file)
+        self.store.load()
+        self.store.compact([self.task.to_dict()], {})
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_deleted_data_file_is_restored(self):
+        os.remove(self.data_file)
+        self.store.check()
+        self.assertEqual(self.store.take_external(), [{'op': 'restore'}])
+        self.store.check()
+        self.assertEqual(self.store.take_external(), [])
+
+        self.assertTrue(self.store.compact([self.task.to_dict()], {}))
+        tasks, _ = JournalStore(self.data_file).load()
+        self.assertEqual([task['id'] for task in tasks], [self.task.id])
+
+
+class ShardedStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.store = ShardedStore(os.path.join(self.tmpdir.name, 'pomodoro_data.shards'))
+        self.store.load_repository()
+        self.tasks = [Task(f"任务 {i}", f"2024-0{i % 3 + 1}-01") for i in range(9)]
+        self.store.append('add_many', tasks=[task.to_dict() for task in self.tasks])
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def count_calls(self, name):
+        # 替换模块中的函数，记录每次调用的路径
+        paths = []
+        func = getattr(pomodoro_shards, name)
+
+        def counting(path, *args):
+            paths.append(os.path.basename(path))
+            return func(path, *args)
+
+        setattr(pomodoro_shards, name, counting)
+        self.addCleanup(setattr, pomodoro_shards, name, func)
+        return paths
+
+    def test_batch_writes_each_shard_once(self):
+        writes = self.count_calls('write_json')
+        self.store.append_many([('complete', {'id': task.id, 'completed': True}) for task in self.tasks])
+        self.assertEqual(sorted(writes), ['2024-01.json.gz', '2024-02.json.gz', '2024-03.json.gz', 'manifest.json'])
+
+        task_repo, _ = ShardedStore(self.store.directory).load_repository()
+        self.assertTrue(all(task.completed for task in task_repo))
+
+    def test_unknown_id_is_missed_without_reading_shards(self):
+        task_repo, _ = ShardedStore(self.store.directory).load_repository()
+        reads = self.count_calls('read_json')
+        self.assertNotIn('0' * 32, task_repo)
+        self.assertEqual(reads, [])
+        self.assertIn(self.tasks[4].id, task_repo)
+        self.assertEqual(reads, ['2024-02.json.gz'])
+
+    def test_import_round_trip(self):
+        # pomodoro_transfer 导入到分片目录后，重新加载和导出都能读到任务
+        csv_file = os.path.join(self.tmpdir.name, 'in.csv')
+        with open(csv_file, 'w', encoding='utf-8') as f:
+            f.write("name,date,completed\n导入一,2024-05-01,是\n导入二,2024-06-02,否\n")
+
+        def transfer(*argv):
+            with mock.patch.object(sys, 'argv', ['pomodoro_transfer.py', '--backend', 'shards',
+                                                 '--data-file', self.store.directory, *argv]):
+                with contextlib.redirect_stdout(io.StringIO()):
+                    pomodoro_transfer.main()
+
+        transfer('import', csv_file)
+        task_repo, _ = ShardedStore(self.store.directory).load_repository()
+        self.assertEqual(len(task_repo), 11)
+        self.assertEqual([(task.title, task.completed) for task in task_repo.tasks_for_date('2024-05-01')],
+                         [('导入一', True)])
+
+        out_file = os.path.join(self.tmpdir.name, 'out.jsonl')
+        transfer('export', out_file, '--start', '2024-05-01')
+        with open(out_file, encoding='utf-8') as f:
+            self.assertEqual([json.loads(line)['name'] for line in f], ['导入一', '导入二'])
+
+    def test_duplicate_ids_are_skipped_across_months(self):
+        # 任务移到其他月份之后再导入同一个 id，内存和磁盘都应跳过
+        task_repo, _ = ShardedStore(self.store.directory).load_repository()
+        moved = task_repo.update(self.tasks[0].id, date='2024-05-01')
+        self.store.append('edit', id=moved.id, task=moved.to_dict())
+        again = Task(self.tasks[0].title, '2024-01-01', task_id=self.tasks[0].id)
+        self.assertEqual(task_repo.add_many([again]), [])
+        self.assertEqual(len(task_repo), 9)
+        self.assertEqual(task_repo.day_counts(2024, 1), {'2024-01-01': 2})
+
+        self.store.append('add', task=again.to_dict())
+        task_repo, _ = ShardedStore(self.store.directory).load_repository()
+        self.assertEqual(len(task_repo), 9)
+        self.assertEqual(task_repo.get(again.id).date, '2024-05-01')
+
+    def test_id_index_is_compacted(self):
+        self.addCleanup(setattr, pomodoro_shards, 'ID_LOG_SLACK', pomodoro_shards.ID_LOG_SLACK)
+        pomodoro_shards.ID_LOG_SLACK = 4
+        needs_compaction = False
+        for task in self.tasks[:5]:
+            needs_compaction = self.store.append('delete', id=task.id)
+        self.assertTrue(needs_compaction)
+
+        self.store.compact([], {})
+        with open(self.store.ids.path, encoding='utf-8') as f:
+            self.assertEqual(sorted(line.split()[0] for line in f), sorted(task.id for task in self.tasks[5:]))
+        task_repo, _ = ShardedStore(self.store.directory).load_repository()
+        self.assertIn(self.tasks[8].id, task_repo)
+        self.assertNotIn(self.tasks[0].id, task_repo)
+
+    def test_stale_records_are_skipped(self):
+        self.store.append('delete', id=self.tasks[0].id)
+        self.store.append_many([('complete', {'id': self.tasks[0].id, 'completed': True}),
+                                ('edit', {'id': self.tasks[0].id, 'task': self.tasks[0].to_dict()})])
+        task_repo, _ = ShardedStore(self.store.directory).load_repository()
+        self.assertEqual(len(task_repo), 8)
+        self.assertNotIn(self.tasks[0].id, task_repo)
+
+
+class SqliteStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.store = SqliteStore(os.path.join(self.tmpdir.name, 'pomodoro_data.db'))
+        self.task_repo, _ = self.store.load_repository()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_session_log_reuses_one_connection(self):
+        session_log = self.store.open_session_log()
+        connect = pomodoro_sqlite.connect
+        connections = []
+
+        def counting(db_file):
+            connections.append(db_file)
+            return connect(db_file)
+
+        with mock.patch.object(pomodoro_sqlite, 'connect', counting):
+            for i in range(3):
+                session_log.append({'start': i, 'end': i + 1, 'elapsed': 1, 'mode': 'work', 'completed': True})
+                self.assertEqual(len(list(session_log.read_since(0))), i + 1)
+        self.assertEqual(len(connections), 1)
+
+    def test_check_ignores_own_commits(self):
+        self.store.check()
+        self.task_repo.add(Task('界面添加', '2024-01-01'))
+        self.store.append('settings', settings={'work_time': 1200})
+        self.store.open_session_log().append({'start': 0, 'end': 1, 'elapsed': 1, 'mode': 'work', 'completed': True})
+        self.store.check()
+        self.assertEqual(self.store.take_external(), [])
+
+        # 其他进程（命令行）的提交
+        other, _ = SqliteStore(self.store.db_file).load_repository()
+        other.add(Task('命令行添加', '2024-01-02'))
+        self.store.check()
+        self.assertEqual(self.store.take_external(), [{'op': 'refresh'}])
+
+
+class BinaryCompactionTest(unittest.TestCase):
+    # 压缩时界面不提交任务，存储用旧快照和日志重建
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.data_file = os.path.join(self.tmpdir.name, 'pomodoro_data.pmdb')
+        self.tasks = [Task(f"任务 {i}", '2024-03-0' + str(i + 1)) for i in range(3)]
+        store = BinaryStore(self.data_file)
+        store.load_repository()
+        store.compact([task.to_dict() for task in self.tasks], {'work_time': 1200})
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_compact_rebuilds_from_snapshot_and_journal(self):
+        store = BinaryStore(self.data_file)
+        store.load_repository()
+        added = Task('新任务', '2024-04-01')
+        store.append_many([('add', {'task': added.to_dict()}),
+                           ('complete', {'id': self.tasks[0].id, 'completed': True}),
+                           ('delete', {'id': self.tasks[1].id}),
+                           ('settings', {'settings': {'work_time': 1500}})])
+        self.assertTrue(store.compact(None, {}))
+
+        snapshot = open_snapshot(self.data_file)
+        self.assertEqual(snapshot.count, 3)
+        self.assertEqual(snapshot.settings, {'work_time': 1500})
+        with open(self.data_file + '.journal', encoding='utf-8') as f:
+            self.assertEqual([json.loads(line)['op'] for line in f], ['base'])
+
+        task_repo, _ = BinaryStore(self.data_file).load_repository()
+        self.assertEqual(sorted((task.title, task.completed) for task in task_repo),
+                         [('任务 0', True), ('任务 2', False), ('新任务', False)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pomodoro_tasks import Task, TaskRepository
+
+
+class TaskRepositoryTest(unittest.TestCase):
+    def setUp(self):
+        self.tasks = [Task('写报告', '2024-01-01'), Task('读论文', '2024-01-01'),
+                      Task('开会', '2024-01-15'), Task('复盘', '2024-02-01')]
+        self.repo = TaskRepository(self.tasks)
+
+    def test_date_and_month_indexes(self):
+        self.assertEqual(self.repo.tasks_for_date('2024-01-01'), self.tasks[:2])
+        self.assertEqual(self.repo.tasks_for_date('2024-01-02'), [])
+        self.assertTrue(self.repo.has_tasks('2024-01-15'))
+        self.assertEqual(self.repo.month_count(2024, 1), 3)
+        self.assertEqual(self.repo.day_counts(2024, 1), {'2024-01-01': 2, '2024-01-15': 1})
+        self.assertEqual(self.repo.day_counts(2024, 3), {})
+
+    def test_lookup_by_id(self):
+        self.assertIn(self.tasks[2].id, self.repo)
+        self.assertIs(self.repo.get(self.tasks[2].id), self.tasks[2])
+        self.assertNotIn('missing', self.repo)
+        with self.assertRaises(KeyError):
+            self.repo.get('missing')
+
+    def test_moving_a_task_updates_the_indexes(self):
+        self.repo.update(self.tasks[0].id, date='2024-02-01', completed=True)
+        self.assertEqual(self.repo.tasks_for_date('2024-01-01'), [self.tasks[1]])
+        self.assertEqual(self.repo.tasks_for_date('2024-02-01'), [self.tasks[3], self.tasks[0]])
+        self.assertEqual(self.repo.month_count(2024, 1), 2)
+        self.assertEqual(self.repo.day_counts(2024, 2), {'2024-02-01': 2})
+        self.assertTrue(self.tasks[0].completed)
+
+    def test_removing_the_last_task_of_a_month_drops_its_counts(self):
+        self.repo.remove(self.tasks[3].id)
+        self.assertFalse(self.repo.has_tasks('2024-02-01'))
+        self.assertEqual(self.repo.month_count(2024, 2), 0)
+        self.assertEqual(self.repo.day_counts(2024, 2), {})
+        self.assertEqual(len(self.repo), 3)
+
+    def test_add_many_skips_existing_ids(self):
+        added = self.repo.add_many([Task('重复', '2024-03-01', task_id=self.tasks[0].id), Task('新任务', '2024-03-01')])
+        self.assertEqual([task.title for task in added], ['新任务'])
+        self.assertEqual(self.repo.get(self.tasks[0].id).title, '写报告')
+
+    def test_page_and_range_follow_insertion_order(self):
+        self.repo.remove(self.tasks[1].id)
+        extra = self.repo.add(Task('补充', '2023-12-31'))
+        self.assertEqual(self.repo.page(1, 2), [self.tasks[2], self.tasks[3]])
+        self.assertEqual(self.repo.page(3, 10), [extra])
+        self.assertEqual(list(self.repo.iter_range('2024-01-02', '2024-02-01')), [self.tasks[2], self.tasks[3]])
+
+    def test_dict_round_trip_strips_the_date_prefix(self):
+        data = self.tasks[0].to_dict()
+        self.assertEqual(data['name'], '2024-01-01 - 写报告')
+        task = Task.from_dict(data)
+        self.assertEqual((task.id, task.title, task.date, task.completed), (self.tasks[0].id, '写报告', '2024-01-01', False))
+        # 同一天的日期字符串共用一个对象
+        self.assertIs(task.date, self.tasks[1].date)
+
+
+if __name__ == "__main__":
+    unittest.main()
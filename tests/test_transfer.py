@@ -0,0 +1,84 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pomodoro_tasks import Task, TaskRepository
+from pomodoro_transfer import ImportReport, detect_format, export_tasks, import_tasks, parse_row, read_tasks
+
+
+class TransferTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write(self, name, text):
+        path = os.path.join(self.tmpdir.name, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        return path
+
+    def test_detect_format(self):
+        self.assertEqual(detect_format('tasks.CSV'), 'csv')
+        self.assertEqual(detect_format('tasks.ndjson'), 'jsonl')
+        with self.assertRaises(ValueError):
+            detect_format('tasks.xlsx')
+
+    def test_parse_row(self):
+        task = parse_row({'name': ' 2024-01-05 - 写报告 ', 'date': '2024-01-05', 'completed': '是', 'id': 'abc'})
+        self.assertEqual((task.id, task.title, task.date, task.completed), ('abc', '写报告', '2024-01-05', True))
+        self.assertFalse(parse_row({'name': '写报告', 'date': '2024-01-05'}).completed)
+        for row in ({'date': '2024-01-05'}, {'name': '写报告', 'date': '2024/01/05'},
+                    {'name': '写报告', 'date': '2024-01-05', 'completed': 'maybe'}):
+            with self.assertRaises(ValueError):
+                parse_row(row)
+
+    def test_csv_errors_are_reported_with_line_numbers(self):
+        path = self.write('tasks.csv', 'name,date,completed\n写报告,2024-01-05,1\n,2024-01-06,0\n读论文,2024-13-01,0\n开会,2024-01-07,\n')
+        report = ImportReport()
+        tasks = list(read_tasks(path, report=report))
+        self.assertEqual([(task.title, task.completed) for task in tasks], [('写报告', True), ('开会', False)])
+        self.assertEqual([line for line, _ in report.errors], [3, 4])
+        self.assertEqual(report.skipped, 2)
+
+    def test_csv_without_header_is_rejected(self):
+        path = self.write('tasks.csv', '写报告,2024-01-05\n')
+        with self.assertRaises(ValueError):
+            list(read_tasks(path))
+
+    def test_jsonl_errors_are_reported_with_line_numbers(self):
+        path = self.write('tasks.jsonl', '{"name": "写报告", "date": "2024-01-05", "completed": true}\n\n{"name": \n[1, 2]\n')
+        report = ImportReport()
+        tasks = list(read_tasks(path, report=report))
+        self.assertEqual([task.title for task in tasks], ['写报告'])
+        self.assertEqual([line for line, _ in report.errors], [3, 4])
+
+    def test_import_skips_existing_ids(self):
+        existing = Task('旧任务', '2024-01-01', task_id='a')
+        repo = TaskRepository([existing])
+        path = self.write('tasks.jsonl', '{"id": "a", "name": "重复", "date": "2024-01-05"}\n'
+                                         '{"id": "b", "name": "新任务", "date": "2024-01-05"}\n'
+                                         '{"name": "没有 id", "date": "2024-01-06"}\n')
+        imported = []
+        report = import_tasks(repo, path, batch_size=2, imported=imported)
+        self.assertEqual((report.imported, report.duplicates), (2, 1))
+        self.assertEqual([task.title for task in imported], ['新任务', '没有 id'])
+        self.assertEqual(repo.get('a').title, '旧任务')
+        self.assertIn('1 个任务的 id 已存在', report.summary())
+
+    def test_export_round_trip(self):
+        tasks = [Task('写报告, 第二版', '2024-01-05', True), Task('"读"论文', '2024-01-06')]
+        for name in ('tasks.csv', 'tasks.jsonl'):
+            path = os.path.join(self.tmpdir.name, name)
+            self.assertEqual(export_tasks(iter(tasks), path), 2)
+            again = list(read_tasks(path))
+            self.assertEqual([(task.id, task.title, task.date, task.completed) for task in again],
+                             [(task.id, task.title, task.date, task.completed) for task in tasks])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pomodoro_widgets import TreeviewReconciler, _longest_increasing_run
+
+
+class FakeTree:
+    # 按 Tk 的语义维护顶层行的顺序和值：move 的下标按包含该行自身的当前列表计算
+    def __init__(self):
+        self.children = []
+        self.values = {}
+
+    def insert(self, parent, index, iid=None, values=()):
+        self.children.insert(index, iid)
+        self.values[iid] = values
+
+    def delete(self, *items):
+        for iid in items:
+            self.children.remove(iid)
+            del self.values[iid]
+
+    def move(self, item, parent, index):
+        old = self.children.index(item)
+        del self.children[old]
+        self.children.insert(index if old >= index else index - 1, item)
+
+    def item(self, item, values=()):
+        self.values[item] = values
+
+
+def rows_for(ids, suffix=''):
+    return [(iid, (iid + suffix,)) for iid in ids]
+
+
+class TreeviewReconcilerTest(unittest.TestCase):
+    def setUp(self):
+        self.tree = FakeTree()
+        self.view = TreeviewReconciler(self.tree)
+        self.view.reconcile(rows_for('abcdef'))
+
+    def assertShows(self, rows):
+        self.assertEqual(self.tree.children, [iid for iid, _ in rows])
+        self.assertEqual(self.tree.values, dict(rows))
+
+    def test_first_render_inserts_every_row(self):
+        self.assertShows(rows_for('abcdef'))
+        self.assertEqual(self.view.op_counts, {'insert': 6, 'update': 0, 'move': 0, 'delete': 0})
+
+    def test_unchanged_rows_issue_no_calls(self):
+        self.assertEqual(self.view.reconcile(rows_for('abcdef')), {'insert': 0, 'update': 0, 'move': 0, 'delete': 0})
+
+    def test_changed_values_are_updated_in_place(self):
+        rows = rows_for('abcdef')
+        rows[2] = ('c', ('改过',))
+        self.assertEqual(self.view.reconcile(rows), {'insert': 0, 'update': 1, 'move': 0, 'delete': 0})
+        self.assertShows(rows)
+
+    def test_only_rows_outside_the_longest_run_move(self):
+        rows = rows_for('bcdefa')
+        self.assertEqual(self.view.reconcile(rows)['move'], 1)
+        self.assertShows(rows)
+        # 当前顺序 bcdefa 中 f 和 a 已经相对有序，其余四行需要移动
+        rows = rows_for('fedcba')
+        self.assertEqual(self.view.reconcile(rows)['move'], 4)
+        self.assertShows(rows)
+
+    def test_mixed_changes_reach_the_target_order(self):
+        rng = random.Random(7)
+        pool = [chr(ord('a') + i) for i in range(20)]
+        for round_number in range(200):
+            ids = rng.sample(pool, rng.randint(0, len(pool)))
+            rows = rows_for(ids, str(rng.randint(0, 2)))
+            self.view.reconcile(rows)
+            self.assertShows(rows)
+        self.assertGreater(sum(self.view.total_op_counts.values()), 0)
+
+    def test_longest_increasing_run(self):
+        positions = [3, 0, 1, 5, 2, 4]
+        run = _longest_increasing_run(positions)
+        self.assertEqual(len(run), 4)
+        values = [positions[i] for i in sorted(run)]
+        self.assertEqual(values, sorted(values))
+        self.assertEqual(_longest_increasing_run([]), set())
+
+
+if __name__ == "__main__":
+    unittest.main()